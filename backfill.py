@@ -0,0 +1,150 @@
+"""
+Backfill: render every missing or outdated image under a FAIL_WFM tree.
+
+The watchers only plot folders they see being created; fails produced while
+they were down never get an image.  This walks whole roots, finds DUT folders
+whose `<BARCODE>_AC_<TEST>_<High|Low>_Side.jpg` is missing or older than the
+newest input txt, and renders them on all cores.
+
+    python backfill.py C:\\!FAIL_WFM --site jincheon
+    python backfill.py C:\\!FAIL_WFM --site paju --since 2025-03-01 --limit 500
+    python backfill.py C:\\jincheon\\!AC_SC_Waves_01 --site viewer --dry-run
+    python backfill.py C:\\!FAIL_WFM --force          # re‑plot all, e.g. after a scale change
+"""
+
+import argparse
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import wave_metrics
+from wave_loader import find_dut_dirs
+
+SITES = {
+    "jincheon": "jincheon_wave_img_maker",
+    "paju": "paju_wave_img_maker",
+    "viewer": "jincheon_real_wave_form_viewer",   # merged H/L image next to the folder
+}
+
+
+# ---------- job discovery ----------------------------------------------------
+def site_jobs(site, dut_dir: str) -> list:
+    """[(render_fn, args, output_path)] of one DUT folder for *site*."""
+    if hasattr(site, "render_side"):
+        return [
+            (site.render_side, (dut_dir, is_high), os.path.join(dut_dir, site.get_img_name(dut_dir, is_high)))
+            for is_high in (True, False)
+        ]
+    return [(site.render_merged, (dut_dir,), site.get_img_name(dut_dir) + site.OUTPUT.ext)]
+
+
+def newest_input(dut_dir: str) -> float:
+    mtimes = [e.stat().st_mtime for e in os.scandir(dut_dir) if e.name.endswith(".txt")]
+    return max(mtimes, default=0.0)
+
+
+def is_outdated(output_path: str, input_mtime: float) -> bool:
+    try:
+        return os.path.getmtime(output_path) < input_mtime
+    except OSError:
+        return True  # missing
+
+
+def find_work(site, roots: list, since: float = None, force: bool = False) -> list:
+    """Outdated jobs, newest DUT first: [(input_mtime, dut_dir, [jobs])]."""
+    work = []
+    for root in roots:
+        for dut_dir in find_dut_dirs(root):
+            t_in = newest_input(dut_dir)
+            if since is not None and t_in < since:
+                continue
+            try:
+                jobs = site_jobs(site, dut_dir)
+            except (IndexError, ValueError) as e:
+                print(f"[Warning] Unexpected folder layout, skipped : {dut_dir} ({e!r})")
+                continue
+            todo = [j for j in jobs if force or is_outdated(j[2], t_in)]
+            if todo:
+                work.append((t_in, dut_dir, todo))
+    work.sort(key=lambda w: w[0], reverse=True)
+    return work
+
+
+# ---------- rendering --------------------------------------------------------
+def _fmt_eta(seconds: float) -> str:
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h}h{m:02d}m" if h else f"{m}m{s:02d}s"
+
+
+def render_job(fn, args: tuple):
+    """Worker entry: run *fn* and wait for its images, so an encode error fails the job."""
+    wave_metrics.start_timer()
+    try:
+        out = fn(*args)
+    except BaseException:
+        wave_metrics.finish_timer(wait=False)
+        raise
+    wave_metrics.finish_timer()   # raises the first encode error
+    return out
+
+
+def run(work: list, workers: int) -> int:
+    """Render all jobs of *work*; return the number of failed images."""
+    jobs = [(fn, args, out) for _, _, todo in work for fn, args, out in todo]
+    total, done, failed = len(jobs), 0, 0
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_job, fn, args): out for fn, args, out in jobs}
+        for fut in as_completed(futures):
+            done += 1
+            err = fut.exception()
+            if err is not None:
+                failed += 1
+                print(f"[Error] {futures[fut]} : {err!r}")
+            rate = done / max(time.time() - t0, 1e-6)
+            eta = (total - done) / rate
+            print(f"[{done}/{total}] {rate:.1f} img/s  ETA {_fmt_eta(eta)}  {futures[fut]}")
+    print(f"[INFO] Backfill finished : {total - failed} rendered, {failed} failed, {_fmt_eta(time.time() - t0)}")
+    return failed
+
+
+# ---------- main -------------------------------------------------------------
+def parse_since(text: str) -> float:
+    return datetime.fromisoformat(text).timestamp()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render missing / outdated waveform images.")
+    ap.add_argument("roots", nargs="+", help=r"tree(s) to scan, e.g. C:\!FAIL_WFM")
+    ap.add_argument("--site", choices=sorted(SITES), default="jincheon")
+    ap.add_argument("--since", type=parse_since, help="only inputs modified on/after this date (YYYY-MM-DD[THH:MM])")
+    ap.add_argument("--limit", type=int, help="render at most N DUT folders (newest first)")
+    ap.add_argument("--dry-run", action="store_true", help="list what would be rendered")
+    ap.add_argument("--force", action="store_true", help="re-render even if the image is up to date")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="render processes (default: all cores)")
+    args = ap.parse_args(argv)
+
+    site = importlib.import_module(SITES[args.site])
+    work = find_work(site, args.roots, args.since, args.force)
+    if args.limit is not None:
+        work = work[:args.limit]
+    n_img = sum(len(todo) for _, _, todo in work)
+    print(f"[INFO] {len(work)} DUT folders, {n_img} images to render")
+
+    if args.dry_run or not work:
+        for t_in, dut_dir, todo in work:
+            stamp = datetime.fromtimestamp(t_in).strftime("%Y-%m-%d %H:%M")
+            for _, _, out in todo:
+                print(f"{stamp}  {out}")
+        return 0
+    return 1 if run(work, args.workers) else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Incremental line / keyword index over the DLK logs of a shift (no Qt dependency).
+
+Every followed file is read once, front to back, in bounded steps
+(`LogIndex.update`), independently of what the log view displays.  Per file
+the index keeps
+  • the byte offset of every line (array of int64), and
+  • a keyword posting list: upper‑cased token -> line numbers that contain it.
+Tokens are runs of letters, digits and `_ - .` of at least 3 characters, so
+barcodes, error codes and words like FAIL are all keys.  Tokens found on more
+than `COMMON_LIMIT` lines (dates, station names) stop being tracked.
+
+`search("JR590181 E203")` intersects, per query token, the union of the
+posting lists of every key that contains it (substring match, so E203 also
+finds ERR-E203), then reads only the candidate lines by offset to confirm the
+match.  The keys containing a token are found through a trigram map (3‑byte
+slice -> keys), not by scanning every key.  The files are never rescanned.
+"""
+
+import re
+from array import array
+
+from dlk_tail import TailReader, MAX_BYTES_PER_TICK
+
+TOKEN = re.compile(rb"[A-Za-z0-9][A-Za-z0-9_.\-]{2,}")
+COMMON_LIMIT = 50000   # postings per token before it is treated as a stop word
+MAX_RESULTS = 1000
+
+
+class FileIndex:
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.reader = TailReader(path, encoding)
+        self.clear()
+
+    def clear(self):
+        self.offsets = array("q")   # line number -> byte offset
+        self.postings = {}          # token -> array('I') of line numbers
+        self.common = set()         # tokens dropped as too frequent
+        self.grams = {}             # 3‑byte slice -> set of tokens (posting or common) containing it
+
+    @property
+    def n_lines(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def pending(self) -> bool:
+        return self.reader.pending
+
+    def update(self, max_bytes: int = MAX_BYTES_PER_TICK) -> int:
+        """Index up to *max_bytes* of not yet indexed data; return the lines added."""
+        raw, reset = self.reader.read_new_raw(max_bytes)
+        if reset:
+            self.clear()
+            raw, _ = self.reader.read_new_raw(max_bytes)
+        postings, common = self.postings, self.common
+        for offset, line in raw:
+            n = len(self.offsets)
+            self.offsets.append(offset)
+            for tok in set(TOKEN.findall(line.upper())):
+                if tok in common:
+                    continue
+                lines = postings.get(tok)
+                if lines is None:
+                    postings[tok] = array("I", (n,))
+                    self._add_key(tok)
+                elif len(lines) >= COMMON_LIMIT:
+                    del postings[tok]
+                    common.add(tok)
+                else:
+                    lines.append(n)
+        return len(raw)
+
+    def _add_key(self, key: bytes):
+        grams = self.grams
+        for i in range(len(key) - 2):
+            g = key[i:i + 3]
+            keys = grams.get(g)
+            if keys is None:
+                grams[g] = {key}
+            else:
+                keys.add(key)
+
+    def _keys_containing(self, token: bytes) -> list:
+        """Tokens (keys) that contain *token*, via the trigram map."""
+        sets = []
+        for i in range(len(token) - 2):
+            keys = self.grams.get(token[i:i + 3])
+            if keys is None:
+                return []
+            sets.append(keys)
+        if not sets:
+            return []
+        sets.sort(key=len)
+        return [k for k in sets[0].intersection(*sets[1:]) if token in k]
+
+    def _candidates(self, token: bytes):
+        """Line numbers that may contain *token*; None when it cannot narrow the search."""
+        keys = self._keys_containing(token)   # the exact key is one of them
+        if any(k in self.common for k in keys):
+            return None
+        found = set()
+        for key in keys:
+            found.update(self.postings[key])
+        return found
+
+    def read_lines(self, line_nos):
+        """Yield (line number, text) of *line_nos*, read by offset."""
+        with open(self.path, "rb") as f:
+            for n in line_nos:
+                f.seek(self.offsets[n])
+                raw = f.readline().rstrip(b"\r\n")
+                yield n, raw.decode(self.encoding, errors="replace")
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> list:
+        words = query.upper().split()   # every word must occur in the line
+        if not words:
+            return []
+        tokens = TOKEN.findall(" ".join(words).encode(self.encoding, errors="replace"))
+        cands = None
+        for tok in tokens:
+            lines = self._candidates(tok)
+            if lines is None:
+                continue
+            cands = lines if cands is None else cands & lines
+        if cands is None:
+            cands = range(self.n_lines)   # only stop words / no tokens: scan by offset
+        hits = []
+        for n, text in self.read_lines(sorted(cands)):
+            upper = text.upper()
+            if all(w in upper for w in words):
+                hits.append((n, text))
+                if len(hits) >= limit:
+                    break
+        return hits
+
+
+class LogIndex:
+    """FileIndex of every followed DLK file."""
+
+    def __init__(self, encoding: str = "utf-8"):
+        self.encoding = encoding
+        self.files = {}   # path -> FileIndex
+
+    def add_file(self, path: str):
+        if path not in self.files:
+            self.files[path] = FileIndex(path, self.encoding)
+
+    def remove_file(self, path: str):
+        self.files.pop(path, None)
+
+    @property
+    def pending(self) -> bool:
+        return any(fi.pending for fi in self.files.values())
+
+    def update(self, max_bytes: int = MAX_BYTES_PER_TICK) -> int:
+        """Spend at most *max_bytes* of reading, shared by the files with new data."""
+        busy = [fi for fi in self.files.values() if fi.pending]
+        if not busy:
+            return 0
+        share = max(max_bytes // len(busy), 1 << 16)
+        return sum(fi.update(share) for fi in busy)
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> list:
+        """[(path, line number, text)] over all files."""
+        results = []
+        for path, fi in self.files.items():
+            for n, text in fi.search(query, limit - len(results)):
+                results.append((path, n, text))
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,167 @@
+"""
+Incremental tail reader for DLK log files (no Qt dependency).
+
+`TailReader` follows one growing text file:
+  • reads at most `max_bytes` per call in `chunk_size` pieces, so a
+    multi‑hundred‑MB backlog is consumed over several GUI ticks instead of
+    freezing one,
+  • returns complete lines only; a trailing line without '\\n' is kept (as
+    bytes, so a split UTF‑8 sequence is never decoded) until it is finished,
+  • notices truncation (size smaller than the read position) and replacement
+    (different file id); the caller then re‑opens it, with open_tail() or,
+    when the old lines are still shown, resume_after_reset().
+
+Attaching to a large existing log does not read it from the start:
+`open_tail(n)` seeks backwards from the end for the last *n* lines and
+continues from there, and `read_older(n)` pages further back on demand.
+Only the requested lines are ever held in memory.
+"""
+
+import os
+
+CHUNK_SIZE = 1 << 20          # bytes per read()
+MAX_BYTES_PER_TICK = 8 << 20  # bytes consumed per read_new() call
+BACK_BLOCK = 64 << 10         # bytes per backward seek
+
+
+def _line_end_before(f, end: int) -> int:
+    """Offset just after the last b'\n' before *end* (0 if there is none)."""
+    pos = end
+    while pos > 0:
+        step = min(BACK_BLOCK, pos)
+        f.seek(pos - step)
+        i = f.read(step).rfind(b"\n")
+        if i >= 0:
+            return pos - step + i + 1
+        pos -= step
+    return 0
+
+
+def _lines_before(f, end: int, n_lines: int):
+    """
+    (start, [raw lines]): up to *n_lines* complete lines ending at *end*,
+    which must be a line boundary; *start* is the offset of the first one.
+    """
+    pos, buf = end, b""
+    while pos > 0 and buf.count(b"\n") <= n_lines:
+        step = min(BACK_BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+    parts = buf.split(b"\n")
+    parts.pop()                           # after the final b'\n'
+    keep = parts[-n_lines:] if n_lines > 0 else []
+    return end - sum(len(p) + 1 for p in keep), keep
+
+
+class TailReader:
+    def __init__(self, path: str, encoding: str = "utf-8", chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.position = 0      # byte offset of the next read
+        self._partial = b""    # unfinished trailing line
+        self._file_id = None   # st_ino of the file being followed
+        self.head = 0          # offset of the oldest line handed out (for read_older)
+        self.reset_end = 0     # end of the last complete line read before a reset
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    @property
+    def pending(self) -> bool:
+        """More bytes are waiting than the last read_new() consumed."""
+        return self.size() > self.position
+
+    @property
+    def has_older(self) -> bool:
+        return self.head > 0
+
+    def seek(self, position: int):
+        self.position = position
+        self.head = position
+        self._partial = b""
+
+    def open_tail(self, n_lines: int) -> list:
+        """Last *n_lines* complete lines; following continues after them."""
+        try:
+            st = os.stat(self.path)
+            with open(self.path, "rb") as f:
+                end = _line_end_before(f, st.st_size)
+                start, raw = _lines_before(f, end, n_lines)
+        except OSError:
+            return []
+        self._file_id = st.st_ino
+        self.seek(end)
+        self.head = start
+        return [self._decode(r) for r in raw]
+
+    def read_older(self, n_lines: int) -> list:
+        """Up to *n_lines* lines just before the oldest line handed out so far."""
+        if self.head <= 0:
+            return []
+        try:
+            with open(self.path, "rb") as f:
+                self.head, raw = _lines_before(f, self.head, n_lines)
+        except OSError:
+            return []
+        return [self._decode(r) for r in raw]
+
+    def resume_after_reset(self):
+        """
+        Continue a truncated / replaced file without handing out its lines again:
+        after the old end if the file still reaches it (rewritten in place),
+        else from its start (everything in it is new).
+        """
+        self.seek(self.reset_end if self.size() >= self.reset_end else 0)
+
+    def _decode(self, raw: bytes) -> str:
+        return raw.decode(self.encoding, errors="replace").rstrip("\r")
+
+    def read_new(self, max_bytes: int = MAX_BYTES_PER_TICK):
+        """
+        (lines, reset): complete lines appended since the last call (at most
+        about *max_bytes*), and whether the file was truncated / replaced.
+        On reset nothing is read; the caller re‑opens (e.g. with open_tail).
+        """
+        raw, reset = self.read_new_raw(max_bytes)
+        return [self._decode(r) for _, r in raw], reset
+
+    def read_new_raw(self, max_bytes: int = MAX_BYTES_PER_TICK):
+        """
+        Like read_new() but undecoded, with byte offsets (for indexing):
+        ([(offset, raw line)], reset).
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return [], False
+        if st.st_size < self.position or (self._file_id is not None and st.st_ino != self._file_id):
+            self._file_id = st.st_ino
+            self.reset_end = self.position - len(self._partial)
+            self.seek(0)
+            return [], True
+        self._file_id = st.st_ino
+        return self._read_raw(max_bytes), False
+
+    def _read_raw(self, max_bytes: int) -> list:
+        out = []
+        budget = max_bytes
+        with open(self.path, "rb") as f:
+            f.seek(self.position)
+            while budget > 0:
+                chunk = f.read(min(self.chunk_size, budget))
+                if not chunk:
+                    break
+                start = self.position - len(self._partial)   # offset of the first line in buf
+                self.position += len(chunk)
+                budget -= len(chunk)
+                parts = (self._partial + chunk).split(b"\n")
+                self._partial = parts.pop()
+                for p in parts:
+                    out.append((start, p))
+                    start += len(p) + 1
+        return out
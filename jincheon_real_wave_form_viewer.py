@@ -8,15 +8,28 @@ Changes since previous revision
    user resizes the main Tk window.  A `<Configure>` binding triggers
    `resize_and_show()`, which re‑renders the current PIL image to fit the new
    window dimensions while maintaining the aspect ratio.
-2. **Globals added**: `current_img_pil`, `current_img_tk`, and `_resize_job`
-   manage image state and debounce resize events.
-3. All other fixes (debounce for watchdog, `after()` timer, Agg backend) are
-   retained.
+2. **Globals added**: `current_img_pil` (a `ResizeCache` of the shown image),
+   `current_img_tk`, and `_resize_job` manage image state and debounce resize
+   events: a fast BILINEAR pass from the mip chain while dragging, LANCZOS once
+   the window settles.
+3. All other fixes (per‑folder coalescing of watchdog events, `after()` timer,
+   Agg backend) are retained.
+4. **Threading**: only the Tk thread touches widgets.  Settled folders go to
+   `render_queue`, a render worker thread draws them, and the Tk thread picks
+   the newest finished frame of each station up with a `root.after` poll
+   (`FrameMailbox`).
+5. **Zoom / pan**: double‑clicking the image opens `WaveExplorer` for that
+   DUT.  It redraws from per‑channel min/max pyramids (`wave_pyramid`) and
+   slices raw samples from the memory‑mapped sidecars only for the visible
+   window.
 """
 
 import os
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -24,30 +37,29 @@ from watchdog.events import FileSystemEventHandler
 # Matplotlib headless backend
 import matplotlib
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MultipleLocator
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import AutoMinorLocator, MaxNLocator, MultipleLocator
 
 # Tk GUI
 import tkinter as tk
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from PIL import Image, ImageTk
 
+import wave_loader
+import wave_manifest
+import wave_metrics
+from wave_encode import OutputFormat, encode, for_path
+from wave_coalesce import EventCoalescer
+from wave_render import decimate, axes_width_px
+from wave_pyramid import MinMaxPyramid
+
 ################################################################################
 # 1. TXT loader
 ################################################################################
 
 def load_txt_file(txt_path: str):
-    data = []
-    if not os.path.exists(txt_path):
-        print(f"[Warning] Could not find file: {txt_path}")
-        return data
-    with open(txt_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    data.append(float(line))
-                except ValueError:
-                    pass
+    data = wave_loader.load_txt_file(txt_path)
     print(f"{txt_path} LOADED. Len : {len(data)}")
     return data
 
@@ -62,7 +74,16 @@ def get_img_name(dir_path: str):
 # 3. Plot helper
 ################################################################################
 
-def plot_and_save_offset_merged(data_dict, output_path, title, is_sc=False):
+DPI = 120
+OUTPUT = OutputFormat(format="jpeg", quality=75, dpi=DPI, optimize=False)  # <folder><ext> on disk
+
+
+def merged_layout(data_dict, is_sc=False) -> list:
+    """
+    [(key, short name, scale factor, offset, unit per div)] of the channels in
+    *data_dict*, bottom group first: every channel is drawn as
+    samples * scale factor + offset.
+    """
     scale_map = {
         "VGE":  (10.0, "V"),
         "VCE":  (200.0, "V"),
@@ -73,8 +94,8 @@ def plot_and_save_offset_merged(data_dict, output_path, title, is_sc=False):
         scale_map.pop("VCE2", None)
 
     if "H_ICE" in data_dict and "L_ICE" in data_dict:
-        all_ice = (data_dict.get("H_ICE") or []) + (data_dict.get("L_ICE") or [])
-        if all_ice and max(all_ice) > 2000.0:
+        ice_peak = max((a.max() for a in (data_dict["H_ICE"], data_dict["L_ICE"]) if len(a)), default=0.0)
+        if ice_peak > 2000.0:
             scale_map["ICE"] = (500.0, "A")
 
     groupings = [
@@ -87,121 +108,391 @@ def plot_and_save_offset_merged(data_dict, output_path, title, is_sc=False):
         groupings.pop()
     groupings.reverse()
 
-    plt.figure(figsize=(16, 8))
-
-    max_len = max((len(arr) - 1) for arr in data_dict.values() if arr) if data_dict else 0
     offset_step = 8.0
+    layout = []
+    for g_i, (keys, g_type) in enumerate(groupings):
+        sf, unit = scale_map.get(g_type, (1.0, "?"))
+        for k in keys:
+            if k in data_dict:
+                layout.append((k, k[2:], 1.0 / sf, g_i * offset_step, f"{sf} {unit}"))
+    return layout
+
+
+def build_merged_figure(data_dict, title, is_sc=False) -> Figure:
+    """Merged H/L plot on a pyplot‑free Agg figure (safe outside the main thread)."""
+    fig = Figure(figsize=(16, 8), dpi=DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    n_px = axes_width_px(ax)  # min/max envelope per output pixel column
+
+    max_len = max((len(arr) for arr in data_dict.values() if len(arr)), default=0)
+    x_all = np.arange(max_len) / 1000.0  # shared time axis, sliced per channel
     y_lim_top = 0.0
     labelled = set()
 
-    for g_i, (keys, g_type) in enumerate(groupings):
-        group_offset = g_i * offset_step
-        sf, unit = scale_map.get(g_type, (1.0, "?"))
-        scale_factor = 1.0 / sf
-        unit_per_div = f"{sf} {unit}"
+    for k, short, scale_factor, group_offset, unit_per_div in merged_layout(data_dict, is_sc):
+        shifted = np.asarray(data_dict[k][:max_len]) * scale_factor
+        shifted += group_offset
+        x = x_all[:len(shifted)]
+        color = "red" if k.startswith("H_") else "blue"
+        label = f"{short} (1 div = {unit_per_div})" if short not in labelled else None
+        ax.plot(*decimate(x, shifted, n_px), color=color, linewidth=1.0, label=label)
+        if len(shifted) and short not in labelled:
+            ax.text(x[0], shifted[0], f"{short}   ", ha="right", va="center", fontsize=9)
+            labelled.add(short)
+        if len(shifted):
+            y_lim_top = max(y_lim_top, shifted.max())
+
+    ax.set_ylim(-2, y_lim_top + 1)
+    ax.set_yticks(np.arange(-2, y_lim_top + 2, 1))
+    ax.tick_params(axis="y", labelleft=False)
 
-        for k in keys:
-            if k not in data_dict:
-                continue
-            raw = data_dict[k][1:][:max_len]
-            shifted = [(v * scale_factor) + group_offset for v in raw]
-            x = [i / 1000.0 for i in range(len(shifted))]
-            color = "red" if k.startswith("H_") else "blue"
-            short = k[2:]
-            label = f"{short} (1 div = {unit_per_div})" if short not in labelled else None
-            plt.plot(x, shifted, color=color, linewidth=1.0, label=label)
-            if shifted and short not in labelled:
-                plt.text(x[0], shifted[0], f"{short}   ", ha="right", va="center", fontsize=9)
-                labelled.add(short)
-            if shifted:
-                y_lim_top = max(y_lim_top, max(shifted))
-
-    plt.ylim(-2, y_lim_top + 1)
-    plt.yticks(np.arange(-2, y_lim_top + 2, 1))
-    plt.tick_params(axis="y", labelleft=False)
-
-    ax = plt.gca()
     ax.xaxis.set_major_locator(MultipleLocator(5.0))
     ax.xaxis.set_minor_locator(MultipleLocator(1.0))
     ax.xaxis.set_major_formatter(lambda v, p: f"{int(v)} us")
     ax.grid(True, which="major", linestyle="--", linewidth=0.5)
     ax.grid(True, which="minor", linestyle="--", linewidth=0.3)
 
-    plt.legend(loc="lower right", fontsize=9, handlelength=0, handletextpad=0)
-    plt.savefig(output_path, dpi=120, bbox_inches="tight")
-    plt.close()
+    ax.legend(loc="lower right", fontsize=9, handlelength=0, handletextpad=0)
+    return fig
+
+
+def figure_to_image(fig: Figure) -> Image.Image:
+    """
+    Draw *fig* and wrap its Agg RGBA buffer in a PIL image without encoding,
+    cropped like savefig(bbox_inches="tight").
+    """
+    canvas = fig.canvas
+    canvas.draw()
+    w, h = canvas.get_width_height()
+    img = Image.frombuffer("RGBA", (w, h), canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+    bbox = fig.get_tightbbox(canvas.get_renderer()).padded(0.1)   # inches, origin bottom‑left
+    dpi = fig.dpi
+    x0, y0 = max(int(bbox.x0 * dpi), 0), max(int(h - bbox.y1 * dpi), 0)
+    return img.crop((x0, y0, min(x0 + int(bbox.width * dpi), w), min(y0 + int(bbox.height * dpi), h)))
+
+
+def plot_and_save_offset_merged(data_dict, output_path, title, is_sc=False):
+    fig = build_merged_figure(data_dict, title, is_sc)
+    fmt = for_path(OUTPUT, output_path)
+    fig.savefig(output_path, dpi=DPI, bbox_inches="tight", format=fmt.format, pil_kwargs=fmt.save_kwargs())
     print(f"[INFO] Saved Plot : {output_path}")
 
 ################################################################################
-# 4. Directory processing (debounced)
+# 4. Directory processing
 ################################################################################
 
-_last_call = {}
+CHANNEL_KEYS = [
+    "H_VGE", "H_VCE", "H_ICE", "H_VCE2",
+    "L_VGE", "L_VCE", "L_ICE", "L_VCE2",
+]
 
-def process_directory(dir_path: str, debounce_ms: int = 300):
-    now = time.time()
-    if now - _last_call.get(dir_path, 0) < debounce_ms / 1000:
-        return
-    _last_call[dir_path] = now
 
+def expected_files(dir_path: str):
+    """Channel files the folder must hold before it is plotted (no VCE2 for SC)."""
+    is_sc = "_SC" in dir_path
+    return [f"{k}.txt" for k in CHANNEL_KEYS if not (is_sc and k.endswith("VCE2"))]
+
+SAVE_IMAGE = True  # also keep <folder><OUTPUT.ext> on disk (written off the display path)
+_image_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-writer")
+
+
+def process_directory(dir_path: str, fingerprint: str = None, t_event: float = None,
+                      t_ready: float = None) -> Image.Image:
+    """
+    Render *dir_path* in memory and return the frame; no Tk access, runs on the
+    render worker.  The image file is written asynchronously.  With *t_event*
+    (first write event) a latency record goes to `metrics`.
+    """
     print(f"[Process] Directory: {dir_path}")
-    keys = [
-        "H_VGE", "H_VCE", "H_ICE", "H_VCE2",
-        "L_VGE", "L_VCE", "L_ICE", "L_VCE2",
-    ]
+    wave_metrics.start_timer()
+    t0 = time.perf_counter()
+    try:
+        fig = build_merged_figure(load_merged_data(dir_path), get_img_name(dir_path), is_sc="_SC" in dir_path)
+        img = figure_to_image(fig)
+    finally:
+        stages = wave_metrics.finish_timer().as_dict()
+    timing = None
+    if t_event is not None:
+        timing = (t_event, t_ready or t_event, time.perf_counter() - t0, stages)
+    if SAVE_IMAGE:
+        output_img = get_img_name(dir_path) + OUTPUT.ext
+        _image_writer.submit(save_image, img, output_img, dir_path, fingerprint, t0, timing)
+    else:
+        if manifest is not None and fingerprint is not None:
+            manifest.record(dir_path, fingerprint, [], render_s=time.perf_counter() - t0)
+        record_metrics(dir_path, timing, [])
+    return img
+
+
+def save_image(img: Image.Image, output_img: str, dir_path: str, fingerprint: str = None, t0: float = None,
+               timing: tuple = None):
+    t_enc = time.perf_counter()
+    try:
+        encode(img, output_img, OUTPUT)
+    except OSError as e:
+        print(f"[Error] Image write failed : {output_img} ({e})")
+        record_metrics(dir_path, timing, [], status="failed")
+        return
+    print(f"[INFO] Saved Plot : {output_img}")
+    if manifest is not None and fingerprint is not None:
+        manifest.record(dir_path, fingerprint, [output_img],
+                        render_s=time.perf_counter() - t0 if t0 is not None else None)
+    if timing is not None:
+        t_event, t_ready, job_s, stages = timing
+        encode_s = time.perf_counter() - t_enc
+        stages = {**stages, "encode_s": stages["encode_s"] + encode_s}
+        record_metrics(dir_path, (t_event, t_ready, job_s + encode_s, stages), [output_img])
+
+
+def record_metrics(dir_path: str, timing: tuple, images: list, status: str = "ok"):
+    """timing = (t_event, t_ready, seconds spent, StageTimer.as_dict()) or None."""
+    if metrics is None or timing is None:
+        return
+    t_event, t_ready, job_s, stages = timing
+    metrics.record(wave_metrics.dut_record(dir_path, t_event, t_ready, job_s, [stages], images, status))
+
+
+def load_merged_data(dir_path: str, loader=None) -> dict:
+    """{channel key: samples} of every channel txt in *dir_path* (read with *loader*)."""
+    loader = loader or load_txt_file
     data_dict = {}
     for item in os.listdir(dir_path):
         if item.endswith(".txt"):
-            for pk in keys:
+            for pk in CHANNEL_KEYS:
                 if pk in item:
-                    data_dict[pk] = load_txt_file(os.path.join(dir_path, item))
+                    data_dict[pk] = loader(os.path.join(dir_path, item))
                     break
+    return data_dict
+
 
-    output_img = get_img_name(dir_path) + ".jpg"
-    plot_and_save_offset_merged(data_dict, output_img, title=os.path.basename(output_img), is_sc="_SC" in dir_path)
-    if os.path.exists(output_img):
-        add_image_to_gallery(output_img)
+def render_merged(dir_path: str) -> str:
+    """Load all channels of *dir_path* and save the merged plot; no GUI access."""
+    output_img = get_img_name(dir_path) + OUTPUT.ext
+    plot_and_save_offset_merged(load_merged_data(dir_path), output_img, title=os.path.basename(output_img),
+                                is_sc="_SC" in dir_path)
+    return output_img
 
 ################################################################################
 # 5. Watchdog handler
 ################################################################################
 
+QUIET_S = 1.0       # render once no txt was written into the folder for this long
+MAX_DELAY_S = 10.0  # ... but never later than this after the first write
+manifest = None     # wave_manifest.Manifest, opened in main()
+metrics = None      # wave_metrics.Metrics, opened in main()
+METRICS_PORT = 9463  # http://127.0.0.1:9463/metrics (Prometheus text)
+
+
+def on_folder_settled(dir_path: str, state, t_event: float = None):
+    """EventCoalescer callback: one call per burst of writes into *dir_path*."""
+    if not state.present_ok:
+        # truncated / still growing files; retried on the next write into this folder
+        print(f"[Warning] Not ready : {dir_path} ({state.reason})")
+        return
+    if state.missing:
+        print(f"[Warning] Partial render, missing : {state.missing} in {dir_path}")
+    render_queue.put((dir_path, t_event or time.time(), time.time()))
+
+
 class TxtFileModifiedHandler(FileSystemEventHandler):
+    def __init__(self, coalescer: EventCoalescer):
+        super().__init__()
+        self.coalescer = coalescer
+
     def on_modified(self, event):
         if not event.is_directory and event.src_path.endswith(".txt"):
-            time.sleep(0.1)
-            process_directory(os.path.dirname(event.src_path))
+            self.coalescer.touch(os.path.dirname(event.src_path))
 
 ################################################################################
-# 6. GUI helpers (dynamic resize)
+# 6. Render worker -> Tk handoff
+#    watchdog thread : coalescer.touch()
+#    coalescer       : render_queue.put((dir, t_event, t_ready))
+#    render worker   : process_directory() -> frames.publish()
+#    Tk thread       : poll_frames() every POLL_MS via root.after
+################################################################################
+
+WATCH_PATHS = [
+    r"C:\jincheon\!AC_SC_Waves_01",
+    r"C:\jincheon\!AC_SC_Waves_02",
+    r"C:\jincheon\!AC_SC_Waves_03",
+    r"C:\jincheon\!AC_SW_IGBT_Waves_01",
+    r"C:\jincheon\!AC_SW_IGBT_Waves_02",
+    r"C:\jincheon\!AC_SW_IGBT_Waves_03",
+    r"C:\jincheon\!AC_SW_IGBT_Waves_04",
+    r"C:\jincheon\!AC_SW_IGBT_Waves_05",
+    r"C:\jincheon\!AC_SW_IGBT_Waves_06",
+]
+POLL_MS = 50  # Tk polls for finished frames this often
+
+render_queue = queue.Queue()  # (folder, t_event, t_ready) to render, fed by the coalescer
+
+
+def station_of(dir_path: str) -> str:
+    """Watch root (tester station) that *dir_path* belongs to."""
+    path = os.path.normcase(os.path.abspath(dir_path))
+    for p in WATCH_PATHS:
+        root = os.path.normcase(os.path.abspath(p))
+        try:
+            if os.path.commonpath([path, root]) == root:   # C:\FAIL is not a root of C:\FAIL_WFM
+                return p
+        except ValueError:  # different drives
+            pass
+    return os.path.dirname(dir_path)
+
+
+class FrameMailbox:
+    """Latest finished frame per station; older unseen frames of a station are dropped."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = {}   # station -> (seq, dir_path, img)
+        self._seq = 0
+        self.dropped = 0
+
+    def publish(self, station: str, dir_path: str, img: Image.Image):
+        with self._lock:
+            self._seq += 1
+            if station in self._slots:
+                self.dropped += 1
+            self._slots[station] = (self._seq, dir_path, img)
+
+    def take_next(self):
+        """
+        (dir_path, img) of the station that has waited longest, or None.  Other
+        stations keep their frame for the next poll, so each one is shown.
+        """
+        with self._lock:
+            if not self._slots:
+                return None
+            station = min(self._slots, key=lambda s: self._slots[s][0])
+            _, dir_path, img = self._slots.pop(station)
+        return dir_path, img
+
+
+frames = FrameMailbox()
+
+
+def render_worker():
+    """Render queued folders off the Tk thread; a None item stops the worker."""
+    while True:
+        item = render_queue.get()
+        if item is None:
+            return
+        dir_path, t_event, t_ready = item
+        try:
+            fp = wave_manifest.fingerprint(dir_path)
+            if manifest is not None and manifest.get_fingerprint(dir_path) == fp:
+                continue  # already plotted this exact data
+            img = process_directory(dir_path, fingerprint=fp, t_event=t_event, t_ready=t_ready)
+            frames.publish(station_of(dir_path), dir_path, img)
+        except Exception as e:  # keep the worker alive
+            print(f"[Error] {dir_path} : {e!r}")
+
+
+def poll_frames():
+    """Tk thread: show the next station's newest finished frame, then re‑arm."""
+    frame = frames.take_next()
+    if frame is not None:
+        global current_dir
+        dir_path, img = frame
+        current_dir = dir_path
+        root.title(f"{os.path.basename(station_of(dir_path))} : {os.path.basename(dir_path)}")
+        add_image_to_gallery(img)
+    root.after(POLL_MS, poll_frames)
+
+################################################################################
+# 7. GUI helpers (dynamic resize)
 ################################################################################
 
 root = None
 image_label = None
 current_img_pil = None  # original PIL image
+current_dir = None      # DUT folder of the shown image (for the explorer)
 current_img_tk = None   # current Tk image
 _resize_job = None      # debounce id
-
-
-def resize_and_show():
-    global current_img_tk
+_shown = None           # (size, final) currently on screen
+
+RESIZE_SETTLE_MS = 150  # LANCZOS pass once <Configure> events stop for this long
+
+
+class ResizeCache:
+    """
+    Pre‑scaled versions of one displayed image.
+
+    A mip chain (halvings, box filter) is built lazily; a resize starts from the
+    smallest level that is still at least the target size.  While the window is
+    being dragged a fast BILINEAR pass is used; once it settles the LANCZOS
+    result is stored, so toggling between common geometries is a dict lookup.
+    """
+
+    MIN_LEVEL = 256   # stop halving below this width / height
+    MAX_SIZES = 8     # final (LANCZOS) sizes kept per image
+
+    def __init__(self, img: Image.Image):
+        # the plot is opaque; RGB resamples about twice as fast as RGBA
+        self._levels = [img.convert("RGB") if img.mode != "RGB" else img]
+        self._sizes = {}   # (w, h) -> LANCZOS image, insertion order = age
+
+    @property
+    def source(self) -> Image.Image:
+        return self._levels[0]
+
+    def fit(self, w: int, h: int) -> tuple:
+        """Largest size that fits (w, h) with the source aspect ratio, never upscaled."""
+        sw, sh = self.source.size
+        scale = min(w / sw, h / sh, 1.0)
+        return max(1, round(sw * scale)), max(1, round(sh * scale))
+
+    def _level_for(self, size: tuple) -> Image.Image:
+        while True:
+            last = self._levels[-1]
+            if last.width // 2 < max(size[0], self.MIN_LEVEL) or last.height // 2 < max(size[1], self.MIN_LEVEL):
+                break
+            self._levels.append(last.reduce(2))
+        for level in reversed(self._levels):
+            if level.width >= size[0] and level.height >= size[1]:
+                return level
+        return self.source
+
+    def get(self, size: tuple, final: bool) -> Image.Image:
+        img = self._sizes.get(size)
+        if img is not None:
+            self._sizes[size] = self._sizes.pop(size)   # refresh age
+            return img
+        level = self._level_for(size)
+        if level.size == size:
+            return level
+        if not final:
+            return level.resize(size, Image.BILINEAR)
+        img = self._sizes[size] = level.resize(size, Image.LANCZOS)
+        if len(self._sizes) > self.MAX_SIZES:
+            del self._sizes[next(iter(self._sizes))]
+        return img
+
+
+def resize_and_show(final: bool = True):
+    global current_img_tk, _shown
     if current_img_pil is None:
         return
     w, h = root.winfo_width(), root.winfo_height()
     if w < 10 or h < 10:
         return
-    img = current_img_pil.copy()
-    img.thumbnail((w, h), Image.LANCZOS)
-    current_img_tk = ImageTk.PhotoImage(img)
+    size = current_img_pil.fit(w, h)
+    if _shown == (size, True) or _shown == (size, final):
+        return  # window moved, or same size already on screen
+    current_img_tk = ImageTk.PhotoImage(current_img_pil.get(size, final))
     image_label.config(image=current_img_tk)
     image_label.image = current_img_tk  # keep reference
+    _shown = (size, final)
 
 
 def on_configure(event):
     global _resize_job
+    resize_and_show(final=False)
     if _resize_job is not None:
         root.after_cancel(_resize_job)
-    _resize_job = root.after(100, resize_and_show)
+    _resize_job = root.after(RESIZE_SETTLE_MS, resize_and_show)
 
 
 def setup_gui():
@@ -212,14 +503,14 @@ def setup_gui():
     image_label = tk.Label(root)
     image_label.pack(expand=True, fill="both")
     root.bind("<Configure>", on_configure)
+    image_label.bind("<Double-Button-1>", open_explorer)
     return root
 
 
-def add_image_to_gallery(img_path: str):
-    global current_img_pil
-    if not os.path.exists(img_path):
-        return
-    current_img_pil = Image.open(img_path)
+def add_image_to_gallery(img: Image.Image):
+    global current_img_pil, _shown
+    current_img_pil = ResizeCache(img)
+    _shown = None
     resize_and_show()
     # hold for 3.5 s without blocking
     if hasattr(image_label, "_timer_id"):
@@ -227,26 +518,137 @@ def add_image_to_gallery(img_path: str):
     image_label._timer_id = root.after(3500, lambda: None)
 
 ################################################################################
-# 7. main
+# 8. Interactive zoom / pan (double‑click the image)
+################################################################################
+
+class WaveExplorer:
+    """
+    Zoomable view of one DUT.  Each channel is memory‑mapped from its npy
+    sidecar and gets a min/max pyramid once, when the window opens; every
+    zoom or pan redraws from the pyramid level that matches the visible span
+    (raw samples of the window only when zoomed in far enough).
+
+    wheel = zoom at the cursor, left drag = pan, r / Home = full capture.
+    """
+
+    ZOOM_STEP = 1.25
+    MIN_SPAN = 20   # samples
+
+    def __init__(self, master, dir_path: str):
+        self.dir_path = dir_path
+        self.top = tk.Toplevel(master)
+        self.top.title(f"Explorer : {os.path.basename(dir_path)}")
+        self.top.geometry("1400x750")
+
+        data = load_merged_data(dir_path, loader=wave_loader.load_mapped)
+        self.fig = Figure(figsize=(14, 7), dpi=100)
+        self.ax = ax = self.fig.add_subplot()
+        self.traces = []   # (pyramid, scale factor, offset, line)
+        labelled = set()
+        y_top = 0.0
+        for k, short, factor, offset, unit_per_div in merged_layout(data, "_SC" in dir_path):
+            pyramid = MinMaxPyramid(data[k])
+            label = f"{short} (1 div = {unit_per_div})" if short not in labelled else None
+            labelled.add(short)
+            line, = ax.plot([], [], color="red" if k.startswith("H_") else "blue", linewidth=1.0, label=label)
+            self.traces.append((pyramid, factor, offset, line))
+            if pyramid.levels:
+                y_top = max(y_top, pyramid.levels[-1][2].max() * factor + offset)
+        self.n = max((p.n for p, _, _, _ in self.traces), default=0)
+
+        ax.set_ylim(-2, y_top + 1)
+        ax.set_yticks(np.arange(-2, y_top + 2, 1))
+        ax.tick_params(axis="y", labelleft=False)
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=12))
+        ax.xaxis.set_minor_locator(AutoMinorLocator())
+        ax.xaxis.set_major_formatter(lambda v, p: f"{v:g} us")
+        ax.grid(True, which="major", linestyle="--", linewidth=0.5)
+        ax.grid(True, which="minor", linestyle="--", linewidth=0.3)
+        ax.legend(loc="lower right", fontsize=9, handlelength=0, handletextpad=0)
+        self.fig.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.top)
+        self.canvas.get_tk_widget().pack(expand=True, fill="both")
+        self.canvas.mpl_connect("scroll_event", self.on_scroll)
+        self.canvas.mpl_connect("button_press_event", self.on_press)
+        self.canvas.mpl_connect("motion_notify_event", self.on_motion)
+        self.canvas.mpl_connect("button_release_event", self.on_release)
+        self.canvas.mpl_connect("key_press_event", self.on_key)
+        self.canvas.mpl_connect("resize_event", lambda e: self.redraw())
+        self._drag = None   # (x pixel, i0, i1) at button press
+        self.set_view(0, self.n)
+
+    # ---------- view ----------------------------------------------------------
+    def set_view(self, i0: float, i1: float):
+        span = min(max(i1 - i0, self.MIN_SPAN), max(self.n, self.MIN_SPAN))
+        i0 = min(max(i0, 0), max(self.n - span, 0))
+        self.i0, self.i1 = i0, i0 + span
+        self.ax.set_xlim(self.i0 / 1000.0, self.i1 / 1000.0)
+        self.redraw()
+
+    def redraw(self):
+        n_px = max(axes_width_px(self.ax), 1)
+        for pyramid, factor, offset, line in self.traces:
+            x, y, _ = pyramid.window(self.i0, self.i1, n_px)
+            line.set_data(x / 1000.0, y * factor + offset)
+        self.canvas.draw_idle()
+
+    # ---------- mouse / keys --------------------------------------------------
+    def on_scroll(self, event):
+        if event.xdata is None:
+            return
+        at = event.xdata * 1000.0
+        scale = 1.0 / self.ZOOM_STEP if event.button == "up" else self.ZOOM_STEP
+        self.set_view(at - (at - self.i0) * scale, at + (self.i1 - at) * scale)
+
+    def on_press(self, event):
+        if event.button == 1 and event.inaxes is self.ax:
+            self._drag = (event.x, self.i0, self.i1)
+
+    def on_motion(self, event):
+        if self._drag is None or event.x is None:
+            return
+        x_press, i0, i1 = self._drag
+        shift = (x_press - event.x) * (i1 - i0) / max(self.ax.bbox.width, 1.0)
+        self.set_view(i0 + shift, i1 + shift)
+
+    def on_release(self, event):
+        self._drag = None
+
+    def on_key(self, event):
+        if event.key in ("r", "home"):
+            self.set_view(0, self.n)
+
+
+def open_explorer(event=None):
+    """Tk thread: open the zoom / pan window for the DUT on screen."""
+    if current_dir is None:
+        return
+    try:
+        WaveExplorer(root, current_dir)
+    except Exception as e:   # missing / unreadable channel files
+        print(f"[Error] Explorer {current_dir} : {e!r}")
+
+################################################################################
+# 9. main
 ################################################################################
 
 def main():
-    watch_paths = [
-        r"C:\jincheon\!AC_SC_Waves_01",
-        r"C:\jincheon\!AC_SC_Waves_02",
-        r"C:\jincheon\!AC_SC_Waves_03",
-        r"C:\jincheon\!AC_SW_IGBT_Waves_01",
-        r"C:\jincheon\!AC_SW_IGBT_Waves_02",
-        r"C:\jincheon\!AC_SW_IGBT_Waves_03",
-        r"C:\jincheon\!AC_SW_IGBT_Waves_04",
-        r"C:\jincheon\!AC_SW_IGBT_Waves_05",
-        r"C:\jincheon\!AC_SW_IGBT_Waves_06",
-    ]
+    global manifest, metrics
+    manifest = wave_manifest.Manifest("viewer")
+    metrics = wave_metrics.Metrics("viewer")
 
     root_window = setup_gui()
+    worker = threading.Thread(target=render_worker, name="render-worker", daemon=True)
+    worker.start()
+    root_window.after(POLL_MS, poll_frames)
+    coalescer = EventCoalescer(on_folder_settled, expected_files, quiet_s=QUIET_S, max_delay_s=MAX_DELAY_S)
+    coalescer.start()
+    metrics.serve(METRICS_PORT, gauges=lambda: {
+        "queued": render_queue.qsize(), "coalescing": coalescer.pending(), "frames_dropped": frames.dropped})
     observer = Observer()
-    handler = TxtFileModifiedHandler()
-    for p in watch_paths:
+    handler = TxtFileModifiedHandler(coalescer)
+    for p in WATCH_PATHS:
         observer.schedule(handler, p, recursive=True)
         print(f"[INFO] Monitoring: {p}")
     observer.start()
@@ -256,6 +658,12 @@ def main():
     finally:
         observer.stop()
         observer.join()
+        coalescer.stop()
+        render_queue.put(None)
+        worker.join()
+        _image_writer.shutdown(wait=True)
+        manifest.close()
+        metrics.close()
 
 
 if __name__ == "__main__":
@@ -1,112 +1,121 @@
 import sys
 import os
 import time
-import numpy as np
+import threading
+import multiprocessing
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from matplotlib.ticker import MultipleLocator
-import matplotlib.pyplot as plt
-
-def load_txt_file(txt_path):
-    '''
-    Read text file which is given and return float vector data(=list)
-    '''
-    data = []
-    if not os.path.exists(txt_path):
-        print('no txt file in load_txt_file func')
-        return data
-    with open(txt_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    value = float(line)
-                    data.append(value)
-                except ValueError:
-                    pass
-    return data
-
-def get_img_name(dir_path:str,is_high_side:bool):
-    #FOR JINCHEON MOBIS.
-    test_item = {
-        ('HK3', '400A', '000.50', '000.50'): 'SW1',
-        ('HK3', '780A', '000.50', '006.00'): 'RBSOA1',
-
-        ('HK3A', '400A', '000.50', '000.50'): 'SW1',
-        ('HK3A', '780A', '000.50', '006.00'): 'RBSOA1',
-        
-        ('HK5', '200A', '000.50', '000.50'): 'SW1',
-        ('HK5', '390A', '000.50', '006.00'): 'RBSOA1',
-        
-        ('HK7', '800A', '000.50', '020.00'): 'SW1',
-        ('HK7', '1040A', '000.50', '027.00'): 'RBSOA1',
-        ('HK7', '800A', '000.50', '027.00'): 'Enhanced SW',
-        ('HK7', '1040A', '000.50', '027.00'): 'SW2',
-        
-        ('HK4', '400A', '000.50', '000.50'): 'SW1',
-        ('HK4', '700A', '000.50', '027.00'): 'RBSOA1',
-        ('HK4', '400A', '000.50', '035.00'): 'Enhanced SW',
-        ('HK4', '400A', '000.50', '000.50'): 'SW2',
-        ('HK4', '200A', '000.50', '000.50'): 'SW1',
-        ('HK4', '200A', '000.50', '010.00'): 'RBSOA1',
-
-        ('HK6', '550A', '000.50', '010.00'): 'SW1',
-        ('HK6', '1000A', '000.50', '031.00'): 'RBSOA1',
-        ('HK6', '550A', '000.50', '031.00'): 'Enhanced SW',
-        ('HK6', '550A', '000.50', '010.00'): 'SW2',
-        ('HK6', '200A', '000.50', '005.00'): 'SW1',
-        ('HK6', '400A', '000.50', '010.00'): 'RBSOA1',
-
-        ('HK51B','585A','004.00','024.00'): 'RBSOA',
-        ('HK51B','350A','004.00','011.00'): 'SW',
-        ('HK51B','700A','002.00','002.00'): 'RBSOA',
-        ('HK51B','350A','002.00','002.00'): 'SW',
-        ('HK51B','350A','002.00','010.00'): 'RBSOA',
-        ('HK51B','350A','002.00','010.00'): 'RBSOA',
-        ('HK51B','175A','002.00','002.00'): 'SW',
-
-    }
-
+import matplotlib
+matplotlib.use("Agg")  # rendering happens in worker processes, never on screen
+from wave_loader import load_txt_file, find_dut_dirs
+import wave_plot
+from render_pool import RenderPool, default_workers
+from wave_manifest import Manifest
+from wave_metrics import Metrics
+from wave_archive import Archive
+from site_profiles import load_profiles
+from wave_encode import OutputFormat
+from wave_reference import get_references
+
+RENDER_WORKERS = default_workers()  # worker processes rendering images
+MAX_QUEUE = 64                      # pending folders before on_created blocks
+MAX_WAIT_S = 30.0                   # readiness time-out per folder (retried once)
+METRICS_PORT = 9461                 # http://127.0.0.1:9461/metrics (Prometheus text)
+ARCHIVE = False                     # append rendered DUTs to wave_archive (see wave_archive.py); needs site_profiles.json
+OUTPUT = OutputFormat(format='jpeg', quality=75, dpi=100, optimize=False)  # image format / encoder settings
+ROI = None                          # EventWindow() plots only the detected events (see wave_roi.py)
+REFERENCE_DIR = None                # known-good captures drawn faded behind the DUT (see wave_reference.py)
+
+#FOR JINCHEON MOBIS.
+TEST_ITEM = {
+    ('HK3', '400A', '000.50', '000.50'): 'SW1',
+    ('HK3', '780A', '000.50', '006.00'): 'RBSOA1',
+
+    ('HK3A', '400A', '000.50', '000.50'): 'SW1',
+    ('HK3A', '780A', '000.50', '006.00'): 'RBSOA1',
+    
+    ('HK5', '200A', '000.50', '000.50'): 'SW1',
+    ('HK5', '390A', '000.50', '006.00'): 'RBSOA1',
+    
+    ('HK7', '800A', '000.50', '020.00'): 'SW1',
+    ('HK7', '1040A', '000.50', '027.00'): 'RBSOA1',
+    ('HK7', '800A', '000.50', '027.00'): 'Enhanced SW',
+    ('HK7', '1040A', '000.50', '027.00'): 'SW2',
+    
+    ('HK4', '400A', '000.50', '000.50'): 'SW1',
+    ('HK4', '700A', '000.50', '027.00'): 'RBSOA1',
+    ('HK4', '400A', '000.50', '035.00'): 'Enhanced SW',
+    ('HK4', '400A', '000.50', '000.50'): 'SW2',
+    ('HK4', '200A', '000.50', '000.50'): 'SW1',
+    ('HK4', '200A', '000.50', '010.00'): 'RBSOA1',
+
+    ('HK6', '550A', '000.50', '010.00'): 'SW1',
+    ('HK6', '1000A', '000.50', '031.00'): 'RBSOA1',
+    ('HK6', '550A', '000.50', '031.00'): 'Enhanced SW',
+    ('HK6', '550A', '000.50', '010.00'): 'SW2',
+    ('HK6', '200A', '000.50', '005.00'): 'SW1',
+    ('HK6', '400A', '000.50', '010.00'): 'RBSOA1',
+
+    ('HK51B','585A','004.00','024.00'): 'RBSOA',
+    ('HK51B','350A','004.00','011.00'): 'SW',
+    ('HK51B','700A','002.00','002.00'): 'RBSOA',
+    ('HK51B','350A','002.00','002.00'): 'SW',
+    ('HK51B','350A','002.00','010.00'): 'RBSOA',
+    ('HK51B','350A','002.00','010.00'): 'RBSOA',
+    ('HK51B','175A','002.00','002.00'): 'SW',
+
+}
+
+def get_test_key(dir_path:str):
     '''
     C:
     \!FAIL_WFM
     \AC_HK51B_hot_V12_ngd
     \바코드_low바코드_날짜_시간.
     \AC_L9_850V_585A_+15.0V_-05.0V_004.00ohm_024.00ohm_001.00ohm
+    -> ('HK51B', '585A', '004.00', '024.00')
     '''
-    
     dirs=dir_path.split('\\')
-    bacord = dirs[3].split('_')[0]
     tmp = dirs[4].split('_')
-    k = (
+    return (
         dirs[2].split('_')[1].strip(),
         tmp[3].strip(),
         tmp[6].removesuffix('ohm').strip(),
         tmp[7].removesuffix('ohm').strip()
     )
-    
+
+def get_test_type(dir_path:str):
     if '_SC' in dir_path: 
-        test_type = 'SC' 
-    # elif k in test_item :
-    #     print(f'Found key : {k}')
-    #     test_type = test_item[k]
-    else:
-        test_type = test_item.get(k, "UNKNOWN_TEST")
-        if test_type == "UNKNOWN_TEST":
-            print(f'[Error] : No test item in dictionary \n Test_item key = {k} \n')
+        return 'SC' 
+    return TEST_ITEM.get(get_test_key(dir_path), "UNKNOWN_TEST")
+
+def get_img_name(dir_path:str,is_high_side:bool):
+    dirs=dir_path.split('\\')
+    bacord = dirs[3].split('_')[0]
+    
+    test_type = get_test_type(dir_path)
+    if test_type == "UNKNOWN_TEST":
+        print(f'[Error] : No test item in dictionary \n Test_item key = {get_test_key(dir_path)} \n')
     if is_high_side:
-        return f'{bacord}_AC_{test_type}_High_Side.jpg'
-    return f'{bacord}_AC_{test_type}_Low_Side.jpg'
+        return f'{bacord}_AC_{test_type}_High_Side{OUTPUT.ext}'
+    return f'{bacord}_AC_{test_type}_Low_Side{OUTPUT.ext}'
     
-def plot_and_save_offset(data_dict, output_path, title, line_color='red', is_sc=False):
+def plot_and_save_offset(data_dict, output_path, title, line_color='red', is_sc=False, layout=None,
+                         decimate=None, output=None, roi=None, reference=None):
     """
     Plot wave data and save to output_path with dynamic offset if 'is_sc' is True.
-    data_dict: { "IGBT1_HS_VGE": [...], "IGBT1_HS_VCE": [...], ... }
+    data_dict: { "IGBT1_HS_VGE": ndarray, "IGBT1_HS_VCE": ndarray, ... } (samples only)
     output_path: jpg file path, usually same as input data path.
     title: Title of the graph, usually same as input data's folder.
     line_color: HS -> 'red', LS -> 'blue'
     is_sc: True if folder name contains '_SC'. Then waveforms are dynamically offset 
            to avoid overlap.
+    layout: key of the reused figure template (see wave_render.get_renderer).
+    decimate: 'minmax' | 'lttb' | 'off' (None -> wave_render.DECIMATE).
+    output: wave_encode.OutputFormat (None -> OUTPUT); encoded on a background thread.
+    roi: wave_roi.EventWindow (None -> ROI); the fixed range stays if no event is found.
+    reference: { channel key: ndarray } of a golden reference (wave_reference), drawn faded.
+    The plot itself is wave_plot.plot_and_save_offset, shared with paju and the daemon.
     """
 
     scale_map = {
@@ -118,207 +127,127 @@ def plot_and_save_offset(data_dict, output_path, title, line_color='red', is_sc=
     if is_sc : 
         scale_map.pop('VCE2')
 
-    
-    plt.figure(figsize=(16, 8))
-    plt.title(title)
-
-    labels = list(data_dict.keys())
-    
-    # [1] Determine the plotting range based on whether it's SC or not
-    N_list = []
-    for lbl in labels:
-        N_list.append(len(data_dict[lbl]) - 1)  # Each array's first element is length info
-    max_len = max(N_list) if N_list else 0
-
-    if is_sc and max_len > 4:
-        start_i = int(max_len * 0.40)
-        end_i = int(max_len * 0.70)
-    else:
-        start_i = 0
-        end_i = max_len
-
-    # Prepare offset logic
-    # If '_SC' in directory => dynamic offset, else => fixed offset (8.0 increments)
-    fixed_offset_distance = 8.0
-    current_top = 0.0  # Tracks top of previously plotted waveform when using dynamic offsets
-
-    y_lim_top = 0.0
-    line_objs = []
-
-    for idx, label in enumerate(labels):
-        raw_data = data_dict[label][1:]  # Drop first value which is Length of data.
-        if not raw_data:
-            print(f"[Warning] No '{label}' data in {output_path} folder.")
-            continue
-
-        partial_data = raw_data[start_i:end_i]
-
-        # (2) Determine scale factor based on label
-        scale_factor = 1.0
-        unit_per_div = '?'
-        for key in scale_map:
-            if key in label.upper():
-                scale_factor = 1.0 / scale_map[key][0]
-                unit_per_div = f"{scale_map[key][0]} {scale_map[key][1]}"
-                break
-
-        scaled_data = [val * scale_factor for val in partial_data]
-
-        # (3) Calculate dynamic or fixed offset
-        if is_sc:
-            # For SC directories, dynamically compute offset to avoid overlap
-            local_min = min(scaled_data) if scaled_data else 0
-            local_max = max(scaled_data) if scaled_data else 0
-            # Shift so that local_min is slightly above current_top
-            offset_val = current_top - local_min + 1.0  # +1.0 margin
-            offset_data = [val + offset_val for val in scaled_data]
-            # Update current_top for the next waveform
-            current_top = offset_val + local_max
-        else:
-            # Original fixed offset approach
-            offset_val = idx * fixed_offset_distance
-            offset_data = [val + offset_val for val in scaled_data]
-
-        # (4) X-axis from start_i to end_i in 1 kHz steps
-        x_vals = [i / 1000.0 for i in range(start_i, end_i)]
-
-        short_name = label[-4:].removeprefix('_').upper()
-        legend_str = f"{short_name} (1 div = {unit_per_div})"
-
-        line_obj, = plt.plot(x_vals, offset_data, color=line_color,
-                             linewidth=1.0, label=legend_str)
-        line_objs.append(line_obj)
-
-        # Label text near the start of each waveform
-        plt.text(
-            x_vals[0],
-            offset_data[0],
-            short_name + '   ',
-            va='center',
-            ha='right',
-            fontsize=9,
-            color='k'
-        )
-
-        local_data_max = max(offset_data) if offset_data else 0
-        if local_data_max > y_lim_top:
-            y_lim_top = local_data_max
-
-    # (5) X-axis limits
-    plt.xlim(start_i / 1000.0, end_i / 1000.0)
-
-    # (6) Y-axis range
-    # Include some margin on the top for labels
-    plt.ylim(-2, y_lim_top + 1.0)
-    y_ticks = np.arange(-2, y_lim_top + 2.0, 1.0)
-    plt.yticks(y_ticks)
-    plt.tick_params(axis='y', labelleft=False)
+    wave_plot.plot_and_save_offset(data_dict, output_path, title, line_color, is_sc, scale_map, 'jincheon',
+                                   layout=layout, decimate=decimate, output=output or OUTPUT,
+                                   roi=roi or ROI, reference=reference)
+    #os.startfile(output_path) PC BLOW ISSUE.
 
-    # (7) X-axis tick settings
-    ax = plt.gca()
-    ax.xaxis.set_major_locator(MultipleLocator(5.0))   # major = 5
-    ax.xaxis.set_minor_locator(MultipleLocator(1.0))   # minor = 1
+def get_files(dir_path, is_high):
+    # 기준이 되는 문자열 목록
+    target_keywords = ['H_VCE2.txt', 'H_ICE.txt', 'H_VCE.txt', 'H_VGE.txt'] if is_high else \
+                    ['L_VCE2.txt', 'L_ICE.txt', 'L_VCE.txt', 'L_VGE.txt']
 
-    ax.xaxis.set_major_formatter(lambda val, pos: f"{int(val)} us")
+    if not os.path.isdir(dir_path):
+        print(f'[Warning] Invalid directory: {dir_path}')
+        return ['']
 
-    ax.grid(True, which='major', axis='both', linestyle='--', linewidth=0.5)
-    ax.grid(True, which='minor', axis='both', linestyle='--', linewidth=0.3)
+    all_files = os.listdir(dir_path)
+    
+    # 특정 키워드를 포함한 파일명 필터링
+    matching_files = [f for f in all_files if any(keyword in f for keyword in target_keywords)]
+    
+    matching_files.sort(reverse=True)  # 기존처럼 reverse 정렬
 
-    if line_objs:
-        plt.legend(handles=line_objs, loc='lower right', fontsize=9,
-                   handlelength=0, handletextpad=0)
+    if not matching_files:
+        print(f'[Warning] No matching files in: {dir_path}')
+        return ['']
 
-    plt.savefig(output_path)
-    plt.close()
-    print(f"[INFO] Saved Plot : {output_path}")
-    #os.startfile(output_path) PC BLOW ISSUE.
+    return matching_files
 
-def process_directory(dir_path):
+def expected_files(dir_path):
     '''
-    DFS search. if dir_path contains txt file then start plotting.
+    Channel files a DUT folder must hold before it is rendered (see wave_ready).
+    SC folders are not required to have VCE2.
     '''
-    print(f"[*] process_directory: {dir_path}")
-    sub_items = os.listdir(dir_path)
-    txt_files = [f for f in sub_items if f.endswith('.txt')]
-    if not txt_files:
-        for item in sub_items:
-            sub_path = os.path.join(dir_path, item)
-            if os.path.isdir(sub_path):
-                process_directory(sub_path)
-        return
-    def get_files(dir_path, is_high):
-        # 기준이 되는 문자열 목록
-        target_keywords = ['H_VCE2.txt', 'H_ICE.txt', 'H_VCE.txt', 'H_VGE.txt'] if is_high else \
-                        ['L_VCE2.txt', 'L_ICE.txt', 'L_VCE.txt', 'L_VGE.txt']
-
-        if not os.path.isdir(dir_path):
-            print(f'[Warning] Invalid directory: {dir_path}')
-            return ['']
-
-        all_files = os.listdir(dir_path)
-        
-        # 특정 키워드를 포함한 파일명 필터링
-        matching_files = [f for f in all_files if any(keyword in f for keyword in target_keywords)]
-        
-        matching_files.sort(reverse=True)  # 기존처럼 reverse 정렬
-
-        if not matching_files:
-            print(f'[Warning] No matching files in: {dir_path}')
-            return ['']
+    keywords = ['H_VGE.txt', 'H_VCE.txt', 'H_ICE.txt', 'H_VCE2.txt',
+                'L_VGE.txt', 'L_VCE.txt', 'L_ICE.txt', 'L_VCE2.txt']
+    if '_SC' in dir_path:
+        keywords = [k for k in keywords if 'VCE2' not in k]
+    return keywords
 
-        return matching_files
-    # FOUND TXT
-    dir_name = os.path.basename(dir_path)
-    plt_name = dir_name[:dir_name.find("A_")+1] if "A_" in dir_name else dir_name
-    
+def render_side(dir_path, is_high_side):
+    '''
+    Load High Side (or Low Side) channels of one DUT folder and save its image.
+    Top-level function so that it can run in a RenderPool worker process.
+    '''
     # _SC 포함 여부 판별
     is_sc = ('_SC' in dir_path)
 
-    # High Side
-    h_files = get_files(dir_path,True)
-    data_dict_h = {}
-    for hf in h_files:
-        full_path = os.path.join(dir_path, hf)
-        label = hf.replace(".txt", "")
-        data_dict_h[label] = load_txt_file(full_path)
-    plt_name_h = get_img_name(dir_path=dir_path, is_high_side=True)
-    output_h = os.path.join(dir_path, plt_name_h)
+    files = get_files(dir_path, is_high_side)
+    data_dict = {}
+    for f in files:
+        full_path = os.path.join(dir_path, f)
+        label = f.replace(".txt", "")
+        data_dict[label] = load_txt_file(full_path)
+    plt_name = get_img_name(dir_path=dir_path, is_high_side=is_high_side)
+    output = os.path.join(dir_path, plt_name)
+    reference = None
+    if REFERENCE_DIR:
+        reference = get_references(REFERENCE_DIR).get(get_test_key(dir_path), is_sc)
     plot_and_save_offset(
-        data_dict_h, 
-        output_h, 
-        title=plt_name_h, 
-        line_color='red',
-        is_sc=is_sc
+        data_dict, 
+        output, 
+        title=plt_name, 
+        line_color='red' if is_high_side else 'blue',
+        is_sc=is_sc,
+        reference=reference
     )
+    return output
 
-    # Low Side
-    l_files = get_files(dir_path,False)
-    data_dict_l = {}
-    for lf in l_files:
-        full_path = os.path.join(dir_path, lf)
-        label = lf.replace(".txt", "")
-        data_dict_l[label] = load_txt_file(full_path)
-    plt_name_l = get_img_name(dir_path=dir_path, is_high_side=False)
-    output_l = os.path.join(dir_path, plt_name_l)
-    plot_and_save_offset(
-        data_dict_l, 
-        output_l, 
-        title=plt_name_l, 
-        line_color='blue',
-        is_sc=is_sc
-    )
+def process_directory(dir_path):
+    '''
+    DFS search. if dir_path contains txt file then start plotting.
+    '''
+    print(f"[*] process_directory: {dir_path}")
+    for dut_dir in find_dut_dirs(dir_path):
+        render_side(dut_dir, True)
+        render_side(dut_dir, False)
 
 class NewDirectoryHandler(FileSystemEventHandler):
+    def __init__(self, pool):
+        super().__init__()
+        self.pool = pool
+
     def on_created(self, event):
         if event.is_directory:
             new_dir_path = event.src_path
             print(f"[INFO] New Folder Detected : {new_dir_path} .")
-            time.sleep(3)
-            process_directory(new_dir_path)
+            self.pool.submit(new_dir_path)
+
+def image_paths(dir_path):
+    return [os.path.join(dir_path, get_img_name(dir_path, is_high)) for is_high in (True, False)]
+
+def catch_up(pool, manifest, watch_path):
+    '''
+    Enqueue DUT folders that are new or changed since the last run
+    (fails produced while the watcher was down).
+    Folders whose images are already up to date are only recorded.
+    '''
+    n = 0
+    for dut_dir in manifest.changed_dirs(find_dut_dirs(watch_path), outputs=image_paths):
+        pool.submit(dut_dir)
+        n += 1
+    print(f"[INFO] Catch-up : {n} folders enqueued")
 
 def main():
     watch_path = r"C:\!FAIL_WFM" # r"C:\!jincheon_FAIL"
-    event_handler = NewDirectoryHandler()
+    manifest = Manifest('jincheon')
+    metrics = Metrics('jincheon')
+    archive = None
+    if ARCHIVE:
+        try:
+            profile = load_profiles(enabled_only=False)['jincheon']
+            archive = Archive(profile_for=lambda dut_dir: profile)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[Warning] Archive disabled, no 'jincheon' site profile : {e!r}")
+    pool = RenderPool(render_side, find_dut_dirs, expected_files,
+                      workers=RENDER_WORKERS, max_queue=MAX_QUEUE, max_wait_s=MAX_WAIT_S,
+                      manifest=manifest, metrics=metrics,
+                      after_render=archive.submit if archive is not None else None)
+    pool.start()
+    metrics.serve(METRICS_PORT, gauges=pool.stats)
+    threading.Thread(target=catch_up, args=(pool, manifest, watch_path), daemon=True).start()
+    event_handler = NewDirectoryHandler(pool)
     observer = Observer()
     observer.schedule(event_handler, watch_path, recursive=True)
     observer.start()
@@ -329,7 +258,12 @@ def main():
     except KeyboardInterrupt:
         observer.stop()
     observer.join()
+    pool.stop()
+    manifest.close()
+    metrics.close()
+    if archive is not None:
+        archive.close()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # PyInstaller build spawns render workers
     main()
-
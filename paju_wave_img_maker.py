@@ -4,12 +4,22 @@ Reads scale factors from `scale_map.json` that sits NEXT TO the EXE (or next to
 the .py file during normal interpretation).
 """
 
-import sys, os, json, time, numpy as np
+import sys, os, json, time, threading, multiprocessing
 from copy import deepcopy
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from matplotlib.ticker import MultipleLocator
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")  # rendering happens in worker processes, never on screen
+from wave_loader import load_txt_file, find_dut_dirs
+import wave_plot
+from render_pool import RenderPool, default_workers
+from wave_manifest import Manifest
+from wave_metrics import Metrics
+from wave_archive import Archive
+from site_profiles import load_profiles
+from wave_encode import OutputFormat
+from wave_roi import EventWindow
+from wave_reference import get_references
 
 # ────────────────────────────────────────────────────────────────────────────────
 # 1.  Where am I running from?
@@ -32,55 +42,46 @@ def load_scale_map(path: str) -> dict:
     return {k.upper(): (float(v[0]), str(v[1])) for k, v in raw.items()}
 
 SCALE_MAP = load_scale_map(JSON_PATH)
-
-
-def load_txt_file(txt_path: str):
-    """Read plain‑text numeric vector; ignore non‑numeric lines."""
-    data = []
-    if not os.path.exists(txt_path):
-        print(f"[WARN] {txt_path} not found")
-        return data
-    with open(txt_path, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                data.append(float(line.strip()))
-            except ValueError:
-                continue
-    return data
+OUTPUT = OutputFormat(format="jpeg", quality=75, dpi=100, optimize=False)  # image format / encoder settings
+ROI = None  # EventWindow() plots only the detected events (see wave_roi.py)
+REFERENCE_DIR = None  # known‑good captures drawn faded behind the DUT (see wave_reference.py)
 
 
 # ---------- naming helpers ---------------------------------------------------
-def get_img_name(dir_path: str, is_high_side: bool):
-    """Return descriptive JPEG name for a measurement folder."""
-    test_item = {
-        ("HK3", "400A", "000.50", "000.50"): "SW",
-        ("HK3", "408A", "000.50", "000.50"): "SW",
-        ("HK3", "780A", "000.50", "006.00"): "RBSOA1",
-        ("HK3", "1000A", "000.50", "006.00"): "RBSOA2",
-        ("HK3A", "400A", "000.50", "000.50"): "SW",
-        ("HK3A", "408A", "000.50", "000.50"): "SW",
-        ("HK3A", "780A", "000.50", "006.00"): "RBSOA1",
-        ("HK3A", "1000A", "000.50", "006.00"): "RBSOA2",
-        ("HK5", "200A", "000.50", "000.50"): "SW",
-        ("HK5", "390A", "000.50", "006.00"): "RBSOA1",
-        ("HK5", "500A", "000.50", "006.00"): "RBSOA2",
-    }
-
+TEST_ITEM = {
+    ("HK3", "400A", "000.50", "000.50"): "SW",
+    ("HK3", "408A", "000.50", "000.50"): "SW",
+    ("HK3", "780A", "000.50", "006.00"): "RBSOA1",
+    ("HK3", "1000A", "000.50", "006.00"): "RBSOA2",
+    ("HK3A", "400A", "000.50", "000.50"): "SW",
+    ("HK3A", "408A", "000.50", "000.50"): "SW",
+    ("HK3A", "780A", "000.50", "006.00"): "RBSOA1",
+    ("HK3A", "1000A", "000.50", "006.00"): "RBSOA2",
+    ("HK5", "200A", "000.50", "000.50"): "SW",
+    ("HK5", "390A", "000.50", "006.00"): "RBSOA1",
+    ("HK5", "500A", "000.50", "006.00"): "RBSOA2",
+}
+
+
+def get_test_key(dir_path: str) -> tuple:
+    """(device, current, Rg_on, Rg_off) of a measurement folder."""
     parts = dir_path.split("\\")
-    bacord = parts[3].split("_")[3]
     tmp = parts[4].split("_")
-
     device_key = parts[2].split("_")[1] if "AC" in parts[2] else parts[2].split("_")[0]
     current_key = tmp[3]
     r1_key, r2_key = tmp[6].removesuffix("ohm"), tmp[7].removesuffix("ohm")
+    return device_key, current_key, r1_key, r2_key
+
 
-    test_type = (
-        "SC"
-        if "_SC" in dir_path
-        else test_item.get((device_key, current_key, r1_key, r2_key), "UNKNOWN_TEST")
-    )
+def get_test_type(dir_path: str) -> str:
+    return "SC" if "_SC" in dir_path else TEST_ITEM.get(get_test_key(dir_path), "UNKNOWN_TEST")
+
+
+def get_img_name(dir_path: str, is_high_side: bool):
+    """Return descriptive JPEG name for a measurement folder."""
+    bacord = dir_path.split("\\")[3].split("_")[3]
     prefix = "High" if is_high_side else "Low"
-    return f"{bacord}_AC_{test_type}_{prefix}_Side.jpg"
+    return f"{bacord}_AC_{get_test_type(dir_path)}_{prefix}_Side{OUTPUT.ext}"
 
 
 # ---------- plotting ---------------------------------------------------------
@@ -91,126 +92,111 @@ def plot_and_save_offset(
     line_color: str,
     is_sc: bool,
     scale_map: dict,
+    layout: tuple = None,
+    decimate: str = None,
+    output: OutputFormat = None,
+    roi: EventWindow = None,
+    reference: dict = None,
 ):
-    """Plot waveforms using scale_map; add dynamic offset when is_sc."""
+    """Plot waveforms using scale_map; add dynamic offset when is_sc.
+    The figure template is reused per *layout* (see wave_render.get_renderer);
+    *decimate* overrides wave_render.DECIMATE ('minmax' | 'lttb' | 'off');
+    *output* overrides OUTPUT, the format the background encoder writes;
+    *roi* overrides ROI, the event window (None: fixed range);
+    *reference* ({channel key: samples}, wave_reference) is drawn faded behind."""
     local_scale = deepcopy(scale_map)  # prevent mutation
     if is_sc and "POW1" in local_scale:
         local_scale["POW1"] = (500000.0, "kW")
 
-    plt.figure(figsize=(16, 8))
-    plt.title(title)
-
-    labels = list(data_dict.keys())
-
-    # ---- determine time range ----
-    sample_lengths = [len(data_dict[lbl]) - 1 for lbl in labels if data_dict[lbl]]
-    max_len = max(sample_lengths) if sample_lengths else 0
-    start_i, end_i = (int(max_len * 0.40), int(max_len * 0.70)) if is_sc else (0, max_len)
-
-    fixed_offset = 8.0
-    current_top = 0.0
-    y_lim_top = 0.0
-    line_objs = []
-
-    for idx, label in enumerate(labels):
-        raw = data_dict[label][1:]  # first element is length header
-        if not raw:
-            continue
-        segment = raw[start_i:end_i]
-
-        # ---- scaling ----
-        scale_factor, unit_per_div = 1.0, "?"
-        for key, (val_per_div, unit) in local_scale.items():
-            if key in label.upper():
-                scale_factor = 1.0 / val_per_div
-                unit_per_div = f"{val_per_div} {unit}"
-                break
-        scaled = [v * scale_factor for v in segment]
-
-        # ---- offset (dynamic for SC) ----
-        if is_sc:
-            offset = current_top - min(scaled) + 1.0
-            current_top = offset + max(scaled)
-        else:
-            offset = idx * fixed_offset
-        shifted = [v + offset for v in scaled]
-
-        # ---- plot ----
-        x_vals = [i / 1000.0 for i in range(start_i, end_i)]
-        short = label[-4:].lstrip("_").upper()
-        legend = (
-            f"{short} (1 div = {local_scale['POW1'][0]/1000.0} {local_scale['POW1'][1]})"
-            if short == "POW1"
-            else f"{short} (1 div = {unit_per_div})"
-        )
-
-        (line_obj,) = plt.plot(x_vals, shifted, color=line_color, linewidth=1.0, label=legend)
-        line_objs.append(line_obj)
-        plt.text(x_vals[0], shifted[0], short + "   ", va="center", ha="right", fontsize=9)
-
-        y_lim_top = max(y_lim_top, max(shifted))
-
-    # ---- axes cosmetics ----
-    plt.xlim(start_i / 1000.0, end_i / 1000.0)
-    plt.ylim(-2, y_lim_top + 1.0)
-    plt.yticks(np.arange(-2, y_lim_top + 2.0, 1.0))
-    plt.tick_params(axis="y", labelleft=False)
-
-    ax = plt.gca()
-    ax.xaxis.set_major_locator(MultipleLocator(5.0))
-    ax.xaxis.set_minor_locator(MultipleLocator(1.0))
-    ax.xaxis.set_major_formatter(lambda val, _: f"{int(val)} us")
-    ax.grid(True, which="major", linestyle="--", linewidth=0.5)
-    ax.grid(True, which="minor", linestyle="--", linewidth=0.3)
-
-    if line_objs:
-        plt.legend(handles=line_objs, loc="lower right", fontsize=9, handlelength=0, handletextpad=0)
-
-    plt.savefig(output_path)
-    plt.close()
-    print(f"[INFO] Saved Plot : {output_path}")
+    # shared with jincheon and the daemon; the POW1 legend is shown in kW
+    wave_plot.plot_and_save_offset(data_dict, output_path, title, line_color, is_sc, local_scale, "paju",
+                                   layout=layout, decimate=decimate, output=output or OUTPUT,
+                                   roi=roi or ROI, reference=reference, legend_divisor={"POW1": 1000.0})
 
 
 # ---------- directory traversal ---------------------------------------------
-def process_directory(dir_path: str):
-    """Depth‑first search; when .txt present, generate plots."""
-    sub_items = os.listdir(dir_path)
-    txt_files = [f for f in sub_items if f.endswith(".txt")]
-    if not txt_files:
-        for item in sub_items:
-            sub_path = os.path.join(dir_path, item)
-            if os.path.isdir(sub_path):
-                process_directory(sub_path)
-        return
+H_FILES = list(reversed(["IGBT1_HS_VGE.txt", "IGBT1_HS_VCE.txt", "IGBT1_HS_ICE.txt", "IGBT1_HS_POW1.txt"]))
+L_FILES = list(reversed(["IGBT2_LS_VGE.txt", "IGBT2_LS_VCE.txt", "IGBT2_LS_ICE.txt", "IGBT2_LS_POW1.txt"]))
 
+
+def expected_files(dir_path: str) -> list:
+    """Channel files a DUT folder must hold before it is rendered (see wave_ready)."""
+    return H_FILES + L_FILES
+
+
+def render_side(dir_path: str, is_high_side: bool):
+    """Plot one side of a DUT folder; top‑level so RenderPool workers can run it."""
     is_sc = "_SC" in dir_path
-    # ---- High side ----
-    h_files = list(reversed(["IGBT1_HS_VGE.txt", "IGBT1_HS_VCE.txt", "IGBT1_HS_ICE.txt", "IGBT1_HS_POW1.txt"]))
-    data_h = {f[:-4]: load_txt_file(os.path.join(dir_path, f)) for f in h_files}
-    out_h = os.path.join(dir_path, get_img_name(dir_path, True))
-    plot_and_save_offset(data_h, out_h, os.path.basename(out_h), "red", is_sc, SCALE_MAP)
+    files = H_FILES if is_high_side else L_FILES
+    data = {f[:-4]: load_txt_file(os.path.join(dir_path, f)) for f in files}
+    out = os.path.join(dir_path, get_img_name(dir_path, is_high_side))
+    color = "red" if is_high_side else "blue"
+    reference = get_references(REFERENCE_DIR).get(get_test_key(dir_path), is_sc) if REFERENCE_DIR else None
+    plot_and_save_offset(data, out, os.path.basename(out), color, is_sc, SCALE_MAP, reference=reference)
+    return out
 
-    # ---- Low side ----
-    l_files = list(reversed(["IGBT2_LS_VGE.txt", "IGBT2_LS_VCE.txt", "IGBT2_LS_ICE.txt", "IGBT2_LS_POW1.txt"]))
-    data_l = {f[:-4]: load_txt_file(os.path.join(dir_path, f)) for f in l_files}
-    out_l = os.path.join(dir_path, get_img_name(dir_path, False))
-    plot_and_save_offset(data_l, out_l, os.path.basename(out_l), "blue", is_sc, SCALE_MAP)
+
+def process_directory(dir_path: str):
+    """Depth‑first search; when .txt present, generate plots."""
+    for dut_dir in find_dut_dirs(dir_path):
+        render_side(dut_dir, True)
+        render_side(dut_dir, False)
 
 
 # ---------- watchdog handler -------------------------------------------------
 class NewDirectoryHandler(FileSystemEventHandler):
+    def __init__(self, pool: RenderPool):
+        super().__init__()
+        self.pool = pool
+
     def on_created(self, event):
         if event.is_directory:
             print(f"[INFO] New Folder Detected : {event.src_path}")
-            time.sleep(3)
-            process_directory(event.src_path)
+            self.pool.submit(event.src_path)
 
 
 # ---------- main -------------------------------------------------------------
+RENDER_WORKERS = default_workers()  # worker processes rendering images
+MAX_QUEUE = 64                      # pending folders before on_created blocks
+MAX_WAIT_S = 30.0                   # readiness time‑out per folder (retried once)
+METRICS_PORT = 9462                 # http://127.0.0.1:9462/metrics (Prometheus text)
+ARCHIVE = False                     # append rendered DUTs to wave_archive (see wave_archive.py); needs site_profiles.json
+
+
+def image_paths(dir_path: str) -> list:
+    return [os.path.join(dir_path, get_img_name(dir_path, is_high)) for is_high in (True, False)]
+
+
+def catch_up(pool: RenderPool, manifest: Manifest, watch_path: str):
+    """Enqueue folders that are new or changed since the last run (watcher was down);
+    folders whose images are already up to date are only recorded."""
+    n = 0
+    for dut_dir in manifest.changed_dirs(find_dut_dirs(watch_path), outputs=image_paths):
+        pool.submit(dut_dir)
+        n += 1
+    print(f"[INFO] Catch‑up : {n} folders enqueued")
+
+
 def main():
     watch_path = r"C:\!FAIL_WFM"
+    manifest = Manifest("paju")
+    metrics = Metrics("paju")
+    archive = None
+    if ARCHIVE:
+        try:
+            profile = load_profiles(enabled_only=False)["paju"]
+            archive = Archive(profile_for=lambda dut_dir: profile)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[Warning] Archive disabled, no 'paju' site profile : {e!r}")
+    pool = RenderPool(render_side, find_dut_dirs, expected_files,
+                      workers=RENDER_WORKERS, max_queue=MAX_QUEUE, max_wait_s=MAX_WAIT_S,
+                      manifest=manifest, metrics=metrics,
+                      after_render=archive.submit if archive is not None else None)
+    pool.start()
+    metrics.serve(METRICS_PORT, gauges=pool.stats)
+    threading.Thread(target=catch_up, args=(pool, manifest, watch_path), daemon=True).start()
     observer = Observer()
-    observer.schedule(NewDirectoryHandler(), watch_path, recursive=True)
+    observer.schedule(NewDirectoryHandler(pool), watch_path, recursive=True)
     observer.start()
     print(f"[INFO] Observing Folder : {watch_path}")
     try:
@@ -219,7 +205,13 @@ def main():
     except KeyboardInterrupt:
         observer.stop()
     observer.join()
+    pool.stop()
+    manifest.close()
+    metrics.close()
+    if archive is not None:
+        archive.close()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # PyInstaller build spawns render workers
     main()
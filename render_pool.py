@@ -0,0 +1,398 @@
+"""
+Render pipeline for the watchers.
+
+The watchdog handler only calls `RenderPool.submit(dir_path)`; a dispatcher
+thread drains the bounded job queue, expands every job into its DUT folders,
+polls each folder until its files are complete (see `wave_ready`) and renders
+the High‑Side and Low‑Side images in parallel on a pool of worker processes
+(matplotlib is not thread‑safe and is CPU bound).
+
+With a `Manifest`, a DUT whose input fingerprint equals the one recorded at
+its last render is dropped, and every finished DUT is recorded with its image
+paths and timings.  With a `wave_metrics.Metrics`, every finished DUT also
+gets a latency record (event, ready, parse per channel, render, encode, total).
+`after_render(dut_dir)` is called once both images of a DUT are written, e.g.
+`wave_archive.Archive.submit`.
+
+Workers do not wait for their images: the encode runs on the worker's
+encoder thread (wave_encode) while it draws the next job, and reports its
+time or error back on a queue.  A DUT is done, and recorded, once both renders
+and their encodes have reported; a failed encode is a failed render.
+
+At most `max_jobs` folders are held at a time, waiting for readiness or
+rendering; beyond that the dispatcher stops draining the queue, so `submit()`
+blocks once it is full.  If the worker pool breaks, the job is failed and the
+pool is rebuilt.
+
+A folder that is not ready within `max_wait_s` gets `retries` more windows.
+After the last one it is rendered only if every file that exists is complete
+(some channels simply missing); a folder with a half‑written file is skipped.
+
+    pool = RenderPool(render_side, find_dut_dirs, expected_files, workers=4)
+    pool.start()
+    pool.submit(r"C:\\!FAIL_WFM\\AC_HK51B_hot_V12_ngd\\...")
+    pool.stats()   # {'queued': 0, 'in_flight': 2, 'done': 10, 'failed_duts': 0, ...}
+"""
+
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import wave_metrics
+from wave_manifest import fingerprint
+from wave_ready import ReadinessProbe
+
+
+def default_workers() -> int:
+    """Leave one core for the observer / OS."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+_REPORTS = None   # worker side: queue of (token, encode seconds, error) back to the pool
+
+
+def _init_worker(reports):
+    global _REPORTS
+    _REPORTS = reports
+
+
+def _report(token: str, fut):
+    err = fut.exception()
+    _REPORTS.put((token, 0.0 if err is not None else fut.result(), None if err is None else repr(err)))
+
+
+def _timed(render_side, dut_dir: str, is_high_side: bool, token: str):
+    """
+    Worker entry: (image path returned by render_side, seconds spent, stage
+    times, number of background encodes).  Returns once drawn; every encode
+    reports under *token* when its image is written.
+    """
+    wave_metrics.start_timer()
+    t0 = time.perf_counter()
+    try:
+        out = render_side(dut_dir, is_high_side)
+    finally:
+        timer = wave_metrics.finish_timer(wait=False)
+    for fut in timer.encodes:
+        fut.add_done_callback(partial(_report, token))
+    return out, time.perf_counter() - t0, timer.as_dict(), len(timer.encodes)
+
+
+class _Side:
+    """One render job (DUT side) until its result and all its encodes are in."""
+
+    def __init__(self):
+        self.result = None    # (out, seconds, stages, n_encodes)
+        self.error = None
+        self.reported = 0
+        self.encode_s = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.error is not None or (self.result is not None and self.reported >= self.result[3])
+
+
+class _Pending:
+    """One submitted folder waiting for its DUT folders to become ready."""
+
+    def __init__(self, root: str, t_event: float, deadline: float):
+        self.root = root
+        self.t_event = t_event
+        self.deadline = deadline
+        self.attempt = 0
+        self.probes = {}   # dut_dir -> ReadinessProbe
+        self.done = set()  # dut_dirs dispatched, given up or owned by another job
+
+
+class RenderPool:
+    def __init__(self, render_side, find_dut_dirs, expected_files=None, workers: int = None,
+                 max_queue: int = 64, max_wait_s: float = 30.0, retries: int = 1,
+                 poll_s: float = 0.1, stable_s: float = 0.2, manifest=None, metrics=None,
+                 after_render=None, max_jobs: int = None):
+        """
+        render_side(dut_dir, is_high_side) : picklable, runs in a worker process
+        find_dut_dirs(dir_path)            : yields DUT folders under dir_path
+        expected_files(dut_dir)            : channel file suffixes the DUT must hold
+                                             (None -> any '.txt')
+        max_wait_s / retries               : readiness time‑out and extra windows
+        manifest                           : wave_manifest.Manifest or None
+        metrics                            : wave_metrics.Metrics or None
+        after_render(dut_dir)              : non‑blocking hook after a successful render
+        max_jobs                           : folders waiting + DUTs rendering before the
+                                             queue is no longer drained (None -> max_queue)
+        """
+        self.render_side = render_side
+        self.find_dut_dirs = find_dut_dirs
+        self.expected_files = expected_files or (lambda dut_dir: [".txt"])
+        self.workers = workers or default_workers()
+        self.max_wait_s = max_wait_s
+        self.retries = retries
+        self.poll_s = poll_s
+        self.stable_s = stable_s
+        self.manifest = manifest
+        self.metrics = metrics
+        self.after_render = after_render
+        self.jobs = queue.Queue(maxsize=max_queue)
+        self.max_jobs = max_jobs or max_queue
+
+        self._executor = None
+        self._dispatcher = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._claimed = set()   # DUT folders waiting or rendering
+        self._waiting = 0
+        self._in_flight = 0
+        self._done = 0
+        self._failed_duts = 0
+        self._latencies = deque(maxlen=200)
+        self._reports = None
+        self._collector = None
+        self._sides = {}   # token -> (_Side, callback when finished)
+        self._tokens = itertools.count()
+
+    # ---------- lifecycle -------------------------------------------------------
+    def start(self):
+        self._reports = multiprocessing.Queue()
+        self._executor = self._new_executor()
+        self._collector = threading.Thread(target=self._collect, name="render-encodes", daemon=True)
+        self._collector.start()
+        self._dispatcher = threading.Thread(target=self._run, name="render-dispatch", daemon=True)
+        self._dispatcher.start()
+        print(f"[INFO] Render pool started : {self.workers} workers, queue {self.jobs.maxsize}")
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self._reports,))
+
+    def stop(self):
+        self._stopping.set()
+        try:
+            self.jobs.put_nowait(None)   # wake a dispatcher blocked on an empty queue
+        except queue.Full:
+            pass
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)   # workers flush their encoders on exit
+        if self._collector is not None:
+            self._reports.put(None)
+            self._collector.join()
+
+    # ---------- producer side (watchdog thread) --------------------------------
+    def submit(self, dir_path: str):
+        """Enqueue a folder; blocks while the queue is full (back‑pressure, see max_jobs)."""
+        self.jobs.put((dir_path, time.time()))
+
+    # ---------- consumer side ----------------------------------------------------
+    def _run(self):
+        pending = []
+        while not self._stopping.is_set():
+            with self._lock:
+                room = len(pending) + self._in_flight < self.max_jobs
+            job = ()
+            if room:
+                try:
+                    job = self.jobs.get(timeout=self.poll_s if pending else None)
+                except queue.Empty:
+                    pass
+            else:   # full: leave jobs queued so submit() blocks
+                time.sleep(self.poll_s)
+            if job is None:
+                break
+            if job:
+                dir_path, t_event = job
+                pending.append(_Pending(dir_path, t_event, time.time() + self.max_wait_s))
+            pending = [p for p in pending if not self._advance(p)]
+            with self._lock:
+                self._waiting = len(pending)
+
+    def _advance(self, p: _Pending) -> bool:
+        """Poll one pending job; dispatch ready DUTs.  True when the job is finished."""
+        try:
+            dut_dirs = list(self.find_dut_dirs(p.root))
+        except OSError as e:
+            print(f"[Error] {p.root} : {e}")
+            self._release(p)
+            return True
+
+        for dut_dir in dut_dirs:
+            if dut_dir in p.done:
+                continue
+            if dut_dir not in p.probes:
+                with self._lock:
+                    if dut_dir in self._claimed:   # already handled by another event
+                        p.done.add(dut_dir)
+                        continue
+                    self._claimed.add(dut_dir)
+                p.probes[dut_dir] = ReadinessProbe(dut_dir, self.expected_files(dut_dir), self.stable_s)
+            if p.probes[dut_dir].poll().ready:
+                p.done.add(dut_dir)
+                self._dispatch_if_changed(dut_dir, p.t_event)
+
+        if dut_dirs and all(d in p.done for d in dut_dirs):
+            return True
+        if time.time() < p.deadline:
+            return False
+
+        # ---- time‑out: retry window, then render what is safe to render ----
+        if p.attempt < self.retries:
+            p.attempt += 1
+            p.deadline = time.time() + self.max_wait_s
+            print(f"[Warning] {p.root} not ready after {self.max_wait_s:.0f} s, retry {p.attempt}/{self.retries}")
+            return False
+        for dut_dir, probe in p.probes.items():
+            if dut_dir in p.done:
+                continue
+            state = probe.last
+            if state.present_ok:
+                print(f"[Warning] Rendering {dut_dir} without {state.missing}")
+                p.done.add(dut_dir)
+                self._dispatch_if_changed(dut_dir, p.t_event)
+            else:
+                print(f"[Error] Giving up on {dut_dir} : {state.reason or state.missing}")
+        if not p.probes:
+            print(f"[Error] Giving up on {p.root} : no DUT folder found")
+        self._release(p)
+        return True
+
+    def _release(self, p: _Pending):
+        """Un‑claim DUT folders of *p* that were never dispatched."""
+        with self._lock:
+            for dut_dir in p.probes:
+                if dut_dir not in p.done:
+                    self._claimed.discard(dut_dir)
+
+    def _dispatch_if_changed(self, dut_dir: str, t_event: float):
+        t_ready = time.time()
+        try:
+            fp = fingerprint(dut_dir)
+        except OSError as e:
+            print(f"[Error] {dut_dir} : {e}")
+            fp = None
+        if fp is not None and self.manifest is not None and self.manifest.get_fingerprint(dut_dir) == fp:
+            print(f"[INFO] Unchanged since last render, skipped : {dut_dir}")
+            with self._lock:
+                self._claimed.discard(dut_dir)
+            return
+        self._dispatch(dut_dir, t_event, fp, t_ready)
+
+    def _dispatch(self, dut_dir: str, t_event: float, fp: str = None, t_ready: float = None):
+        sides = [_Side(), _Side()]
+        pending = [len(sides)]
+        with self._lock:
+            self._in_flight += 1
+
+        def on_side(side: _Side):
+            if side.error is not None:
+                print(f"[Error] Render failed {dut_dir} : {side.error}")
+            with self._lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+                if any(s.error is not None for s in sides):
+                    self._failed_duts += 1   # one per DUT, like wave_failed_total
+                latency = time.time() - t_event
+                self._claimed.discard(dut_dir)
+                self._in_flight -= 1
+                self._done += 1
+                self._latencies.append(latency)
+            print(f"[INFO] Job done in {latency:.2f} s (queued {self.jobs.qsize()}) : {dut_dir}")
+            ok = all(s.error is None for s in sides)
+            results = [s.result for s in sides if s.error is None]
+            images = [out for out, _, _, _ in results]
+            # job time includes the background encode, like the viewer's records
+            job_s = sum(t for _, t, _, _ in results) + sum(s.encode_s for s in sides if s.error is None)
+            if ok and self.manifest is not None and fp is not None:
+                self.manifest.record(dut_dir, fp, images, render_s=job_s, latency_s=latency)
+            if self.metrics is not None:
+                stages = [{**st, "encode_s": st["encode_s"] + s.encode_s}
+                          for s, (_, _, st, _) in zip([s for s in sides if s.error is None], results)]
+                self.metrics.record(wave_metrics.dut_record(
+                    dut_dir, t_event, t_ready or t_event, job_s, stages, images,
+                    status="ok" if ok else "failed"))
+            if ok and self.after_render is not None:
+                self.after_render(dut_dir)
+
+        for is_high, side in zip((True, False), sides):
+            token = f"{os.getpid()}:{next(self._tokens)}"
+            with self._lock:
+                self._sides[token] = (side, on_side)
+            try:
+                fut = self._executor.submit(_timed, self.render_side, dut_dir, is_high, token)
+            except (BrokenProcessPool, RuntimeError) as e:
+                with self._lock:
+                    del self._sides[token]
+                side.error = f"pool: {e!r}"
+                on_side(side)
+                self._restart_executor(e)
+                continue
+            fut.add_done_callback(partial(self._on_render, token))
+
+    def _restart_executor(self, err: Exception):
+        print(f"[Error] Render workers broken ({err!r}), restarting the pool")
+        old, self._executor = self._executor, self._new_executor()
+        old.shutdown(wait=False)
+
+    def _on_render(self, token: str, fut):
+        """Render job of one side returned (its encodes may still be running)."""
+        with self._lock:
+            entry = self._sides.get(token)
+            if entry is None:   # an encode of this side already failed
+                return
+            side, on_side = entry
+            err = fut.exception()
+            if err is not None:
+                side.error = repr(err)
+            else:
+                side.result = fut.result()
+            finished = side.finished
+            if finished:
+                del self._sides[token]
+        if finished:
+            on_side(side)
+
+    def _collect(self):
+        """Encode reports of the workers: (token, seconds, error)."""
+        while True:
+            report = self._reports.get()
+            if report is None:
+                break
+            token, seconds, error = report
+            with self._lock:
+                entry = self._sides.get(token)
+                if entry is None:   # side already failed in render
+                    continue
+                side, on_side = entry
+                side.reported += 1
+                side.encode_s += seconds
+                if error is not None:
+                    side.error = f"encode: {error}"
+                finished = side.finished
+                if finished:
+                    del self._sides[token]
+            if finished:
+                on_side(side)
+
+    # ---------- metrics ----------------------------------------------------------
+    def stats(self) -> dict:
+        """Queue depth, jobs in flight and per‑job latency (event → both images saved)."""
+        with self._lock:
+            lat = list(self._latencies)
+            stats = {
+                "queued": self.jobs.qsize(),
+                "waiting_ready": self._waiting,
+                "in_flight": self._in_flight,
+                "done": self._done,
+                "failed_duts": self._failed_duts,
+            }
+        stats["last_latency_s"] = lat[-1] if lat else None
+        stats["avg_latency_s"] = sum(lat) / len(lat) if lat else None
+        stats["max_latency_s"] = max(lat) if lat else None
+        return stats
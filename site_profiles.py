@@ -0,0 +1,148 @@
+"""
+Per‑site profiles for the multi‑site daemon.
+
+`site_profiles.json` (next to the EXE / .py, like `scale_map.json`) holds one
+entry per site: watch roots, folder naming rules, channel file lists, scale
+map, output format, optional event window (`roi`, see wave_roi.py) and
+reference directory (`reference_dir`, see wave_reference.py) and the
+`test_item` table.  Everything is loaded and compiled once:
+the test_item rows become a dict lookup, naming rules become index pairs.
+
+Naming rules are `[path part, '_' field]` pairs on the Windows path
+    C:\\!FAIL_WFM\\AC_HK51B_hot_V12_ngd\\<barcode>_..._<date>_<time>\\AC_L9_850V_585A_..._004.00ohm_024.00ohm_001.00ohm
+      0    1            2                          3                                  4
+"""
+
+import json
+import os
+import sys
+
+from wave_encode import output_format
+from wave_roi import event_window
+
+
+def get_base_dir() -> str:
+    if getattr(sys, "frozen", False):               # PyInstaller
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+BASE_DIR = get_base_dir()
+PROFILES_PATH = os.path.join(BASE_DIR, "site_profiles.json")
+
+
+def _load_scale_map(raw: dict) -> dict:
+    return {k.upper(): (float(v[0]), str(v[1])) for k, v in raw.items()}
+
+
+class SiteProfile:
+    def __init__(self, name: str, raw: dict, base_dir: str = BASE_DIR):
+        self.name = name
+        self.enabled = bool(raw.get("enabled", True))
+        self.watch_roots = list(raw.get("watch_roots", []))
+        self.naming = {k: tuple(v) for k, v in raw["naming"].items()}
+        self.high_files = list(raw["channels"]["high"])
+        self.low_files = list(raw["channels"]["low"])
+        self.sc_optional = list(raw.get("sc_optional", []))
+
+        if "scale_map_file" in raw:
+            with open(os.path.join(base_dir, raw["scale_map_file"]), "r", encoding="utf-8") as f:
+                self.scale_map = _load_scale_map(json.load(f))
+        else:
+            self.scale_map = _load_scale_map(raw["scale_map"])
+        self.sc_scale_map = _load_scale_map(raw.get("sc_scale_map", {}))
+        self.sc_drop = [k.upper() for k in raw.get("sc_drop", [])]
+        self.legend_divisor = {k.upper(): float(v) for k, v in raw.get("legend_divisor", {}).items()}
+
+        self.output = output_format(raw.get("output"))
+        self.roi = event_window(raw.get("roi"))   # None: fixed plot range
+        ref_dir = raw.get("reference_dir")          # golden references (wave_reference), relative to base_dir
+        self.reference_dir = os.path.join(base_dir, ref_dir) if ref_dir else None
+
+        # test_item rows -> lookup index
+        self.test_item = {tuple(row[:4]): row[4] for row in raw.get("test_item", [])}
+
+    # ---------- naming ---------------------------------------------------------
+    def _field(self, parts: list, rule: str) -> str:
+        part, field = self.naming[rule]
+        return parts[part].split("_")[field].strip()
+
+    def get_test_key(self, dir_path: str) -> tuple:
+        parts = dir_path.split("\\")
+        if "device_no_ac" in self.naming and "AC" not in parts[self.naming["device"][0]]:
+            device = self._field(parts, "device_no_ac")
+        else:
+            device = self._field(parts, "device")
+        return (
+            device,
+            self._field(parts, "current"),
+            self._field(parts, "rg_on").removesuffix("ohm"),
+            self._field(parts, "rg_off").removesuffix("ohm"),
+        )
+
+    def get_test_type(self, dir_path: str) -> str:
+        if "_SC" in dir_path:
+            return "SC"
+        return self.test_item.get(self.get_test_key(dir_path), "UNKNOWN_TEST")
+
+    def get_barcode(self, dir_path: str) -> str:
+        return self._field(dir_path.split("\\"), "barcode")
+
+    def get_img_name(self, dir_path: str, is_high_side: bool) -> str:
+        barcode = self.get_barcode(dir_path)
+        test_type = self.get_test_type(dir_path)
+        if test_type == "UNKNOWN_TEST":
+            print(f"[Error] {self.name} : No test item in dictionary, key = {self.get_test_key(dir_path)}")
+        prefix = "High" if is_high_side else "Low"
+        return f"{barcode}_AC_{test_type}_{prefix}_Side{self.output.ext}"
+
+    # ---------- channels -------------------------------------------------------
+    def channel_files(self, is_high_side: bool) -> list:
+        return self.high_files if is_high_side else self.low_files
+
+    def channel_paths(self, dut_dir: str, is_high_side: bool) -> list:
+        """Files of *dut_dir* matching this side's channel suffixes, in profile order."""
+        names = sorted((f for f in os.listdir(dut_dir) if f.endswith(".txt")), reverse=True)
+        found = []
+        for suffix in self.channel_files(is_high_side):
+            match = next((f for f in names if f.endswith(suffix)), None)
+            if match is not None:
+                found.append(match)
+        return found
+
+    def expected_files(self, dir_path: str) -> list:
+        files = self.high_files + self.low_files
+        if "_SC" in dir_path:
+            files = [f for f in files if not any(opt in f for opt in self.sc_optional)]
+        return files
+
+    def scale_for(self, is_sc: bool) -> dict:
+        scale = dict(self.scale_map)
+        if is_sc:
+            scale.update(self.sc_scale_map)
+            for key in self.sc_drop:
+                scale.pop(key, None)
+        return scale
+
+    def owns(self, dir_path: str) -> bool:
+        """True if *dir_path* is a watch root or below one, not merely sharing its prefix."""
+        path = os.path.normcase(os.path.abspath(dir_path))
+        for root in self.watch_roots:
+            root = os.path.normcase(os.path.abspath(root))
+            try:
+                if os.path.commonpath([path, root]) == root:
+                    return True
+            except ValueError:  # different drives
+                pass
+        return False
+
+
+def load_profiles(path: str = PROFILES_PATH, enabled_only: bool = True) -> dict:
+    """{site name: SiteProfile}; loaded once at startup (and once per worker)."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    profiles = {name: SiteProfile(name, p, base_dir) for name, p in raw.items()}
+    if enabled_only:
+        profiles = {k: v for k, v in profiles.items() if v.enabled}
+    return profiles
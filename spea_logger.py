@@ -5,75 +5,239 @@ import sys
 import os
 import glob
 import traceback
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTextEdit
-from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QPlainTextEdit, QAction, QTabWidget,
+                             QDockWidget, QLineEdit, QListWidget, QVBoxLayout, QWidget)
+from PyQt5.QtCore import Qt, QTimer, QFileSystemWatcher
+from PyQt5.QtGui import QTextCursor
+
+from dlk_tail import TailReader
+from dlk_index import LogIndex
+
+WATCH_DIRS = [r"C:\ATOSC2\WKSINFO\Temp"]
+
+POLL_MS = 3000            # 폴링 fallback (QFileSystemWatcher가 이벤트를 놓치는 경우 대비)
+TICK_MS = 100             # 파일 변경 이벤트를 모아서 한 번에 읽는 주기
+MAX_BLOCKS = 20000        # 화면에 유지할 최대 줄(block) 수
+TAIL_LINES = 2000         # 파일을 처음 열 때 보여줄 마지막 줄 수
+PAGE_LINES = 2000         # "Load older" 한 번에 읽어올 줄 수
+MAX_OLDER_BLOCKS = 5 * MAX_BLOCKS  # "Load older"로 늘릴 수 있는 최대 줄 수 (맨 아래로 돌아오면 MAX_BLOCKS로 복귀)
+INDEX_BYTES_PER_TICK = 1 << 19  # tick마다 색인할 최대 byte 수 (GUI가 멈추지 않도록, trigram 포함 ~60 ms)
+
+
+def new_log_view(parent, max_blocks):
+    view = QPlainTextEdit(parent)
+    view.setReadOnly(True)
+    view.setMaximumBlockCount(max_blocks)
+    return view
+
 
 class LogMonitorWindow(QMainWindow):
-    def __init__(self, directory="."):
-        super().__init__()
-        self.setWindowTitle("DLK File Monitoring v1.3.1")
-        self.setGeometry(200, 200, 600, 400)
+    """
+    directories 안의 모든 .dlk 파일을 동시에 따라간다.
+    merged=False : 파일마다 탭 하나, merged=True : "[파일명] 줄" 형태의 하나의 stream.
+    모든 파일은 LogIndex로 줄 offset / keyword 색인되어 검색창에서 바로 찾을 수 있다.
+    """
 
-        # 텍스트 영역
-        self.text_edit = QTextEdit(self)
-        self.text_edit.setReadOnly(True)
-        self.setCentralWidget(self.text_edit)
+    def __init__(self, directories=(".",), merged=False, max_blocks=MAX_BLOCKS, tail_lines=TAIL_LINES):
+        super().__init__()
+        self.setWindowTitle("DLK File Monitoring v1.5.0")
+        self.setGeometry(200, 200, 900, 600)
 
-        # 모니터링 대상 디렉토리 설정
-        self.directory = directory
+        self.directories = [directories] if isinstance(directories, str) else list(directories)
+        self.merged = merged
+        self.max_blocks = max_blocks
+        self.tail_lines = tail_lines
+        self._paging = False      # Load older 중에는 block 제한을 복구하지 않음
 
         # 상태 관리 변수
-        self.dlk_exists = False   # 현재 .dlk 파일이 존재하는지 여부
-        self.last_position = 0    # 파일 포인터 위치
-
-        # QTimer를 통해 1초마다 디렉토리 확인
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_dlk_file)
-        self.timer.start(3000)
-
-    def check_dlk_file(self):
-        # 디렉토리 내의 .dlk 파일 목록 확인
-        dlk_files = glob.glob(os.path.join(self.directory, "*.dlk"))
-
-        if not dlk_files:
-            # .dlk 파일이 없는 경우
-            if self.dlk_exists:
-                # 기존에 파일이 있었는데 지금은 없으므로, 화면 초기화
-                self.text_edit.clear()
-                self.dlk_exists = False
-                self.last_position = 0
-            # 파일이 없고 이전에도 없었다면(대기 상태), 별도 행동 없음
+        self.readers = {}         # .dlk 경로 -> TailReader
+        self.views = {}           # .dlk 경로 -> QPlainTextEdit (merged 모드에서는 공용 view)
+        self.index = LogIndex()
+
+        # 텍스트 영역: 파일별 탭, 또는 하나의 merged view
+        if merged:
+            self.merged_view = new_log_view(self, max_blocks)
+            self.setCentralWidget(self.merged_view)
         else:
-            # .dlk 파일이 있는 경우 (디렉토리에 하나만 있다고 가정)
-            dlk_file_path = dlk_files[0]
-
-            if not self.dlk_exists:
-                # 신규 생성된 .dlk 파일로 인식
-                self.dlk_exists = True
-                self.last_position = 0
-                # 처음부터 읽어오기
-                self.read_new_data(dlk_file_path, from_start=True)
-            else:
-                # 이미 감시 중인 상황이므로 추가된 내용만 읽어오기
-                self.read_new_data(dlk_file_path, from_start=False)
-
-    def read_new_data(self, file_path, from_start=False):
-        """파일의 특정 위치부터 새 데이터(또는 전체)를 읽어와 화면에 표시한다."""
-        mode = "r"
-        with open(file_path, mode, encoding="utf-8") as f:
-            # 파일 처음부터 다시 읽거나, 마지막 포인터 위치부터 읽음
-            if from_start:
-                f.seek(0)
+            self.tabs = QTabWidget(self)
+            self.tabs.currentChanged.connect(self.update_older_action)
+            self.setCentralWidget(self.tabs)
+
+        # 이전 로그는 필요할 때만 파일에서 읽어옴 (탭 모드)
+        self.older_action = QAction("Load older", self)
+        self.older_action.setEnabled(False)
+        self.older_action.triggered.connect(self.load_older)
+        self.addToolBar("Log").addAction(self.older_action)
+
+        # 검색: barcode / error code 등, 색인에서 찾음
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search barcode / error code ... (Enter)")
+        self.search_edit.returnPressed.connect(self.run_search)
+        self.search_results = QListWidget()
+        box = QWidget()
+        layout = QVBoxLayout(box)
+        layout.addWidget(self.search_edit)
+        layout.addWidget(self.search_results)
+        dock = QDockWidget("Search", self)
+        dock.setWidget(box)
+        self.addDockWidget(Qt.BottomDockWidgetArea, dock)
+
+        # 디렉토리 / 파일 변경 감시. 이벤트는 tick 타이머로 묶어서 처리
+        self.watcher = QFileSystemWatcher(self)
+        for d in self.directories:
+            if os.path.isdir(d):
+                self.watcher.addPath(d)
+        self.watcher.directoryChanged.connect(self.schedule_tick)
+        self.watcher.fileChanged.connect(self.schedule_tick)
+
+        self.tick_timer = QTimer(self)
+        self.tick_timer.setSingleShot(True)
+        self.tick_timer.timeout.connect(self.check_dlk_files)
+
+        # QTimer 폴링 fallback
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check_dlk_files)
+        self.timer.start(POLL_MS)
+        self.check_dlk_files()
+
+    def schedule_tick(self, *_):
+        if not self.tick_timer.isActive():
+            self.tick_timer.start(TICK_MS)
+
+    # ---------- 파일 목록 -----------------------------------------------------
+    def check_dlk_files(self):
+        # 모든 디렉토리의 .dlk 파일 목록 확인
+        found = set()
+        for d in self.directories:
+            found.update(glob.glob(os.path.join(d, "*.dlk")))
+
+        for path in [p for p in self.readers if p not in found]:
+            self.stop_following(path)      # 사라진 파일
+        for path in sorted(found - set(self.readers)):
+            self.start_following(path)     # 신규 파일
+
+        backlog = False
+        for path in list(self.readers):
+            backlog |= self.read_new_data(path)
+        self.index.update(INDEX_BYTES_PER_TICK)
+        if backlog or self.index.pending:
+            # 남은 backlog는 다음 tick에서 (GUI가 멈추지 않도록)
+            self.schedule_tick()
+
+    def start_following(self, path):
+        reader = self.readers[path] = TailReader(path)
+        self.watcher.addPath(path)
+        self.index.add_file(path)
+        if self.merged:
+            self.views[path] = self.merged_view
+        else:
+            self.views[path] = view = new_log_view(self, self.max_blocks)
+            view.verticalScrollBar().valueChanged.connect(lambda _, v=view: self.restore_limit(v))
+            self.tabs.addTab(self.views[path], os.path.basename(path))
+            self.tabs.setTabToolTip(self.tabs.indexOf(self.views[path]), path)
+        self.show_tail(path, reader)
+
+    def stop_following(self, path):
+        if path in self.watcher.files():
+            self.watcher.removePath(path)
+        self.readers.pop(path, None)
+        self.index.remove_file(path)
+        view = self.views.pop(path, None)
+        if view is not None and not self.merged:
+            self.tabs.removeTab(self.tabs.indexOf(view))
+            view.deleteLater()
+        self.update_older_action()
+
+    # ---------- 표시 ----------------------------------------------------------
+    def append_lines(self, path, lines):
+        if not lines:
+            return
+        if self.merged:
+            name = os.path.basename(path)
+            lines = [f"[{name}] {line}" for line in lines]
+        self.views[path].appendPlainText("\n".join(lines))
+
+    def show_tail(self, path, reader):
+        view = self.views[path]
+        if not self.merged:
+            view.clear()
+            view.setMaximumBlockCount(self.max_blocks)
+        self.append_lines(path, reader.open_tail(self.tail_lines))
+        self.update_older_action()
+
+    def read_new_data(self, path):
+        """추가된 내용을 bounded chunk로 읽어 한 번의 document 업데이트로 표시; backlog 여부 반환."""
+        reader = self.readers[path]
+        lines, reset = reader.read_new()
+        if reset:
+            if self.merged:
+                # 공용 view에는 이 파일의 이전 줄이 남아 있음 -> tail을 다시 붙이지 않고 새 내용만
+                reader.resume_after_reset()
             else:
-                f.seek(self.last_position)
-
-            new_data = f.read()
-            if new_data:
-                lines = new_data.split('\n')
-                for line in lines:
-                    self.text_edit.append(line)
-                # 파일 포인터 위치 갱신
-                self.last_position = f.tell()
+                # 파일이 잘리거나 교체됨 -> 다시 마지막 줄부터
+                self.show_tail(path, reader)
+            lines, _ = reader.read_new()
+        self.append_lines(path, lines)
+        return reader.pending
+
+    def current_path(self):
+        if self.merged:
+            return None
+        view = self.tabs.currentWidget()
+        return next((p for p, v in self.views.items() if v is view), None)
+
+    def update_older_action(self, *_):
+        path = self.current_path()
+        self.older_action.setEnabled(path is not None and self.readers[path].has_older)
+
+    def load_older(self):
+        """현재 탭 파일의 이전 PAGE_LINES 줄을 파일에서 읽어 맨 위에 붙인다."""
+        path = self.current_path()
+        if path is None:
+            return
+        view = self.views[path]
+        doc = view.document()
+        room = MAX_OLDER_BLOCKS - doc.blockCount()
+        if room <= 0:
+            self.statusBar().showMessage("View is full; scroll to the end to drop older lines")
+            return
+        lines = self.readers[path].read_older(min(PAGE_LINES, room))
+        self.update_older_action()
+        if not lines:
+            return
+        # 사용자가 요청한 이전 로그가 block 제한으로 바로 잘리지 않도록 제한을 늘림 (MAX_OLDER_BLOCKS까지)
+        view.setMaximumBlockCount(max(self.max_blocks, doc.blockCount() + len(lines)))
+        bar = view.verticalScrollBar()
+        value = bar.value()
+        self._paging = True
+        try:
+            cursor = QTextCursor(doc)
+            cursor.movePosition(QTextCursor.Start)
+            cursor.insertText("\n".join(lines) + "\n")
+            bar.setValue(value + len(lines))  # 보던 위치 유지
+        finally:
+            self._paging = False
+
+    def restore_limit(self, view):
+        """맨 아래(tail)로 돌아오면 Load older로 늘린 block 제한을 원래대로 (오래된 줄은 잘림)."""
+        bar = view.verticalScrollBar()
+        if self._paging or view.maximumBlockCount() <= self.max_blocks:
+            return
+        if bar.value() == bar.maximum():
+            view.setMaximumBlockCount(self.max_blocks)   # 먼저 복구 (clear의 valueChanged로 다시 들어오지 않도록)
+            path = next((p for p, v in self.views.items() if v is view), None)
+            if path is not None:
+                self.show_tail(path, self.readers[path])   # 처음 열 때처럼 마지막 tail_lines, read_older도 거기서부터
+
+    # ---------- 검색 ----------------------------------------------------------
+    def run_search(self):
+        query = self.search_edit.text()
+        self.search_results.clear()
+        hits = self.index.search(query)
+        for path, line_no, text in hits:
+            self.search_results.addItem(f"{os.path.basename(path)}:{line_no + 1}  {text}")
+        self.statusBar().showMessage(f"{len(hits)} lines match '{query}'")
+
 def handle_exception(exc_type, exc_value, exc_traceback):
     """예외 발생 시 로그 파일에 기록"""
     if issubclass(exc_type, KeyboardInterrupt):
@@ -90,7 +254,7 @@ def handle_exception(exc_type, exc_value, exc_traceback):
 sys.excepthook = handle_exception
 def main():
     app = QApplication(sys.argv)
-    window = LogMonitorWindow(directory="C:\ATOSC2\WKSINFO\Temp")
+    window = LogMonitorWindow(directories=WATCH_DIRS, merged="--merged" in sys.argv)
     window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,71 @@
+import os
+
+import dlk_index
+from dlk_index import FileIndex, LogIndex
+
+LOG = """10:01 JR590181 ERR-E203 station 3
+10:02 JR590182 E203 FAIL
+10:03 JR590183 PASS
+10:04 JR590181 PASS
+"""
+
+
+def index_of(tmp_path, text=LOG, name="a.dlk"):
+    path = tmp_path / name
+    path.write_text(text)
+    fi = FileIndex(str(path))
+    while fi.pending:
+        fi.update()
+    return fi
+
+
+def lines(hits):
+    return [n for n, _ in hits]
+
+
+def test_substring_and_exact_tokens(tmp_path):
+    fi = index_of(tmp_path)
+    assert lines(fi.search("E203")) == [0, 1]          # ERR-E203 and E203
+    assert lines(fi.search("fail")) == [1]
+    assert lines(fi.search("JR590181")) == [0, 3]
+    assert lines(fi.search("590181")) == [0, 3]
+
+
+def test_every_word_must_match(tmp_path):
+    fi = index_of(tmp_path)
+    assert lines(fi.search("JR590181 E203")) == [0]
+    assert fi.search("JR590181 FAIL") == []
+    assert fi.search("nothing-like-this") == []
+
+
+def test_common_tokens_fall_back_to_reading_lines(tmp_path, monkeypatch):
+    monkeypatch.setattr(dlk_index, "COMMON_LIMIT", 1)
+    fi = index_of(tmp_path)
+    assert b"PASS" in fi.common and b"PASS" not in fi.postings
+    assert lines(fi.search("PASS")) == [2, 3]
+    assert lines(fi.search("JR590183 PASS")) == [2]
+    assert lines(fi.search("10:0")) == [0, 1, 2, 3]     # no token at all
+
+
+def test_index_follows_appends_and_truncation(tmp_path):
+    fi = index_of(tmp_path)
+    with open(fi.path, "a") as f:
+        f.write("10:05 JR590190 ERR-E777\n")
+    fi.update()
+    assert lines(fi.search("E777")) == [4]
+    with open(fi.path, "w") as f:
+        f.write("11:00 JR599999 ERR-E203\n")
+    fi.update()
+    assert [t for _, t in fi.search("E203")] == ["11:00 JR599999 ERR-E203"]
+
+
+def test_log_index_searches_all_files(tmp_path):
+    a = index_of(tmp_path, name="a.dlk")
+    b_path = tmp_path / "b.dlk"
+    b_path.write_text("12:00 JR590181 ERR-E999\n")
+    idx = LogIndex()
+    idx.add_file(a.path)
+    idx.add_file(str(b_path))
+    while idx.pending:
+        idx.update()
+    assert [(os.path.basename(p), n) for p, n, _ in idx.search("JR590181")] == [("a.dlk", 0), ("a.dlk", 3), ("b.dlk", 0)]
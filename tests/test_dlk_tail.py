@@ -0,0 +1,52 @@
+import os
+
+from dlk_tail import TailReader
+
+
+def write(path, text, mode="w"):
+    with open(path, mode, newline="") as f:
+        f.write(text)
+
+
+def test_partial_line_is_held_until_complete(tmp_path):
+    path = tmp_path / "a.dlk"
+    write(path, "one\ntw")
+    reader = TailReader(str(path))
+    assert reader.read_new() == (["one"], False)
+    write(path, "o\n", "a")
+    assert reader.read_new() == (["two"], False)
+
+
+def test_open_tail_and_read_older(tmp_path):
+    path = tmp_path / "a.dlk"
+    write(path, "".join(f"line{i}\n" for i in range(10)) + "partial")
+    reader = TailReader(str(path))
+    assert reader.open_tail(3) == ["line7", "line8", "line9"]
+    assert reader.read_older(4) == ["line3", "line4", "line5", "line6"]
+    assert reader.read_older(10) == ["line0", "line1", "line2"]
+    assert not reader.has_older
+    write(path, "\n", "a")
+    assert reader.read_new() == (["partial"], False)
+
+
+def test_truncation_is_reported_and_new_content_read_once(tmp_path):
+    path = tmp_path / "a.dlk"
+    write(path, "a\nb\nc\n")
+    reader = TailReader(str(path))
+    assert reader.open_tail(10) == ["a", "b", "c"]
+    write(path, "x\n")
+    assert reader.read_new() == ([], True)
+    reader.resume_after_reset()
+    assert reader.read_new() == (["x"], False)
+
+
+def test_replacement_is_reported_and_old_lines_not_repeated(tmp_path):
+    path = tmp_path / "a.dlk"
+    write(path, "a\nb\n")
+    reader = TailReader(str(path))
+    assert reader.read_new() == (["a", "b"], False)
+    write(tmp_path / "new.dlk", "a\nb\nc\n")
+    os.replace(tmp_path / "new.dlk", path)
+    assert reader.read_new() == ([], True)
+    reader.resume_after_reset()
+    assert reader.read_new() == (["c"], False)
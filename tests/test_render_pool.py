@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+
+from render_pool import RenderPool
+from wave_manifest import Manifest
+from wave_metrics import Metrics
+
+
+# ---------- worker functions (top level, run in the pool's processes) --------
+def slow_render(dut_dir, is_high_side):
+    time.sleep(0.3)
+    return os.path.join(dut_dir, "H.jpg" if is_high_side else "L.jpg")
+
+
+def render_or_fail(dut_dir, is_high_side):
+    if os.path.basename(dut_dir).startswith("bad"):
+        raise ValueError("broken capture")
+    return os.path.join(dut_dir, "H.jpg" if is_high_side else "L.jpg")
+
+
+def itself(dir_path):
+    yield dir_path
+
+
+def make_duts(root, names):
+    dirs = []
+    for name in names:
+        d = os.path.join(root, name)
+        os.makedirs(d)
+        with open(os.path.join(d, "IGBT1_HS_VGE.txt"), "w") as f:
+            f.write("2\n0.0\n1.0\n")
+        dirs.append(d)
+    return dirs
+
+
+def wait_done(pool, n, timeout=30.0):
+    t0 = time.time()
+    while pool.stats()["done"] < n:
+        assert time.time() - t0 < timeout, pool.stats()
+        time.sleep(0.02)
+
+
+# ---------- tests --------------------------------------------------------------
+def test_submit_blocks_when_queue_and_held_jobs_are_full(tmp_path):
+    dirs = make_duts(tmp_path, [f"d{i}" for i in range(4)])
+    pool = RenderPool(slow_render, itself, workers=1, max_queue=1, max_jobs=1, stable_s=0.0, poll_s=0.02)
+    pool.start()
+    try:
+        peak = [0]
+
+        def watch():
+            while pool.stats()["done"] < len(dirs):
+                st = pool.stats()
+                peak[0] = max(peak[0], st["waiting_ready"] + st["in_flight"])
+                time.sleep(0.005)
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
+        producer = threading.Thread(target=lambda: [pool.submit(d) for d in dirs], daemon=True)
+        producer.start()
+        time.sleep(0.3)
+        assert producer.is_alive()      # one held, one queued: the third submit blocks
+        producer.join(30)
+        wait_done(pool, len(dirs))
+        watcher.join(5)
+        assert peak[0] <= 1
+    finally:
+        pool.stop()
+
+
+def test_failed_dut_is_counted_once_and_not_recorded(tmp_path):
+    good, bad = make_duts(tmp_path / "tree", ["good", "bad"])
+    manifest = Manifest("test", path=str(tmp_path / "m.sqlite"))
+    metrics = Metrics("test", path=str(tmp_path / "metrics.jsonl"))
+    archived = []
+    pool = RenderPool(render_or_fail, itself, workers=2, stable_s=0.0, poll_s=0.02,
+                      manifest=manifest, metrics=metrics, after_render=archived.append)
+    pool.start()
+    try:
+        pool.submit(good)
+        pool.submit(bad)
+        wait_done(pool, 2)
+    finally:
+        pool.stop()
+
+    assert pool.stats()["failed_duts"] == 1
+    assert 'wave_failed_total{app="test",site="test"} 1' in metrics.prometheus()
+    assert manifest.get_fingerprint(good) is not None
+    assert manifest.get_fingerprint(bad) is None
+    assert archived == [good]
+    with open(tmp_path / "metrics.jsonl", encoding="utf-8") as f:
+        status = {r["dut_dir"]: r["status"] for r in map(json.loads, f)}
+    assert status == {good: "ok", bad: "failed"}
+    manifest.close()
+    metrics.close()
@@ -0,0 +1,51 @@
+import os
+import time
+
+from wave_manifest import Manifest
+
+
+def make_dut(root, name, images=(), image_age_s=None):
+    d = os.path.join(root, name)
+    os.makedirs(d)
+    txt = os.path.join(d, "IGBT1_HS_VGE.txt")
+    with open(txt, "w") as f:
+        f.write("1\n0.0\n")
+    past = time.time() - 100
+    os.utime(txt, (past, past))
+    for img in images:
+        path = os.path.join(d, img)
+        open(path, "w").close()
+        if image_age_s is not None:
+            t = past - image_age_s
+            os.utime(path, (t, t))
+    return d
+
+
+def outputs(dut_dir):
+    return [os.path.join(dut_dir, "H.jpg"), os.path.join(dut_dir, "L.jpg")]
+
+
+def test_first_run_seeds_folders_with_up_to_date_images(tmp_path):
+    fresh = make_dut(tmp_path, "fresh", ["H.jpg", "L.jpg"])
+    stale = make_dut(tmp_path, "stale", ["H.jpg", "L.jpg"], image_age_s=50)
+    half = make_dut(tmp_path, "half", ["H.jpg"])
+    new = make_dut(tmp_path, "new")
+    manifest = Manifest("test", path=str(tmp_path / "m.sqlite"))
+    dirs = [fresh, stale, half, new]
+
+    assert list(manifest.changed_dirs(dirs, outputs=outputs)) == [stale, half, new]
+    assert manifest.get_fingerprint(fresh) is not None
+    assert list(manifest.changed_dirs(dirs, outputs=outputs)) == [stale, half, new]
+
+    with open(os.path.join(fresh, "IGBT1_HS_ICE.txt"), "w") as f:
+        f.write("1\n0.0\n")
+    assert fresh in list(manifest.changed_dirs(dirs, outputs=outputs))
+    manifest.close()
+
+
+def test_without_outputs_every_unknown_folder_is_changed(tmp_path):
+    fresh = make_dut(tmp_path, "fresh", ["H.jpg", "L.jpg"])
+    manifest = Manifest("test", path=str(tmp_path / "m.sqlite"))
+    assert list(manifest.changed_dirs([fresh])) == [fresh]
+    assert manifest.get_fingerprint(fresh) is None
+    manifest.close()
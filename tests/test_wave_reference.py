@@ -0,0 +1,57 @@
+import os
+
+import wave_metrics
+import wave_reference
+from wave_reference import ReferenceCache
+
+
+def write_reference(ref_dir, name, n=5):
+    folder = os.path.join(ref_dir, name)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "IGBT1_HS_VGE.txt"), "w") as f:
+        f.write(f"{n}\n" + "".join(f"{i}\n" for i in range(n)))
+    return folder
+
+
+def test_lru_evicts_least_recently_used(tmp_path):
+    for name in ("A_1_2_3", "B_1_2_3", "C_1_2_3"):
+        write_reference(tmp_path, name)
+    cache = ReferenceCache(str(tmp_path), max_entries=2)
+
+    assert cache.get(("A", "1", "2", "3"), False) is not None
+    assert cache.get(("B", "1", "2", "3"), False) is not None
+    cache.get(("A", "1", "2", "3"), False)                   # A is now the most recent
+    assert cache.get(("C", "1", "2", "3"), False) is not None  # evicts B
+    assert cache.loads == 3
+
+    cache.get(("A", "1", "2", "3"), False)
+    assert cache.loads == 3
+    cache.get(("B", "1", "2", "3"), False)
+    assert cache.loads == 4
+
+
+def test_miss_is_retried_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(wave_reference.time, "monotonic", lambda: now[0])
+    cache = ReferenceCache(str(tmp_path))
+    key = ("HK5", "200A", "000.50", "000.50")
+
+    assert cache.get(key, True) is None
+    write_reference(tmp_path, "HK5_200A_000.50_000.50_SC")
+    now[0] += wave_reference.MISS_TTL_S / 2
+    assert cache.get(key, True) is None                       # miss still remembered
+    now[0] += wave_reference.MISS_TTL_S
+    ref = cache.get(key, True)
+    assert list(ref) == ["HS_VGE"]
+    assert list(ref["HS_VGE"]) == [0, 1, 2, 3, 4]
+
+
+def test_load_is_not_timed_and_writes_no_sidecar(tmp_path):
+    folder = write_reference(tmp_path, "A_1_2_3")
+    timer = wave_metrics.start_timer()
+    try:
+        ReferenceCache(str(tmp_path)).get(("A", "1", "2", "3"), False)
+    finally:
+        wave_metrics.finish_timer(wait=False)
+    assert timer.parse == {}
+    assert os.listdir(folder) == ["IGBT1_HS_VGE.txt"]
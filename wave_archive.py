@@ -0,0 +1,321 @@
+"""
+Append‑only columnar archive of every fail waveform, with a DUT index.
+
+    <ARCHIVE_DIR>/index.sqlite          dut + channel tables (all days)
+    <ARCHIVE_DIR>/20250301.f32          that day's channels back to back (float32)
+
+After a DUT is rendered, each of its channels is appended to the day file of
+its capture time as one fixed‑dtype block.  The index row of the DUT holds:
+  • the barcode and the test_item key (device, current, Rg_on, Rg_off)
+  • the test type looked up in `test_item`, is_sc and the capture time
+and one channel row per (side, channel) holds the block's offset and length.
+A fleet‑wide question is then an index query, and every waveform a zero‑copy
+slice of the memory‑mapped day file:
+
+    archive = Archive()
+    for hit in archive.query(device="HK51B", test_type="RBSOA1", side="L", since="2025-03-01"):
+        ice = archive.samples(hit, "ICE")          # np.memmap view, nothing copied
+
+Re‑archiving a DUT (its txt changed) appends new blocks and re‑points the
+index; the old blocks stay as dead space.  Nothing is ever rewritten.
+
+    python wave_archive.py ingest C:\\!FAIL_WFM --site jincheon
+    python wave_archive.py query --device HK51B --test-type RBSOA1 --side L --since 2025-03-01
+"""
+
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from site_profiles import SiteProfile, load_profiles
+from wave_loader import find_dut_dirs, load_txt_file
+from wave_manifest import get_base_dir
+
+DTYPE = np.dtype(np.float32)
+ARCHIVE_DIR = os.path.join(get_base_dir(), "wave_archive")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dut (
+    id           INTEGER PRIMARY KEY,
+    site         TEXT NOT NULL,
+    dir_path     TEXT NOT NULL,
+    barcode      TEXT,
+    device       TEXT,
+    current      TEXT,
+    rg_on        TEXT,
+    rg_off       TEXT,
+    test_type    TEXT,
+    is_sc        INTEGER NOT NULL,
+    captured_at  REAL NOT NULL,      -- newest channel txt mtime
+    day          TEXT NOT NULL,      -- day file the blocks are in (YYYYMMDD)
+    archived_at  REAL NOT NULL,
+    UNIQUE (site, dir_path)
+);
+CREATE TABLE IF NOT EXISTS channel (
+    dut_id       INTEGER NOT NULL,
+    side         TEXT NOT NULL,      -- H | L
+    channel      TEXT NOT NULL,      -- VGE, VCE, ICE, VCE2, POW1 ...
+    offset       INTEGER NOT NULL,   -- in samples, into <day>.f32
+    length       INTEGER NOT NULL,
+    PRIMARY KEY (dut_id, side, channel)
+);
+CREATE INDEX IF NOT EXISTS dut_test ON dut (device, test_type, captured_at);
+CREATE INDEX IF NOT EXISTS dut_barcode ON dut (barcode);
+CREATE INDEX IF NOT EXISTS dut_time ON dut (captured_at);
+"""
+
+_DUT_COLUMNS = ("id", "site", "dir_path", "barcode", "device", "current", "rg_on", "rg_off",
+                "test_type", "is_sc", "captured_at", "day")
+
+
+class Hit(NamedTuple):
+    """One side of one archived DUT."""
+    id: int
+    site: str
+    dir_path: str
+    barcode: str
+    device: str
+    current: str
+    rg_on: str
+    rg_off: str
+    test_type: str
+    is_sc: bool
+    captured_at: float
+    day: str
+    side: str
+    channels: dict   # channel -> (offset, length)
+
+
+def channel_name(file_name: str) -> str:
+    """'IGBT1_HS_VGE.txt' -> 'VGE', 'H_VCE2.txt' -> 'VCE2'."""
+    return os.path.splitext(file_name)[0].rsplit("_", 1)[-1].upper()
+
+
+def _timestamp(value) -> float:
+    """Epoch seconds from a number, 'YYYY-MM-DD' or an ISO date‑time."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(value).timestamp()
+
+
+class Archive:
+    def __init__(self, root: str = ARCHIVE_DIR, profile_for=None):
+        """
+        root        : archive directory (created on first use)
+        profile_for : callable(dut_dir) -> SiteProfile, for ingest / submit
+        """
+        self.root = root
+        self.profile_for = profile_for
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._maps = {}      # day -> np.memmap of its day file
+        self._queue = None   # background ingest (submit)
+        self._thread = None
+
+    def day_path(self, day: str) -> str:
+        return os.path.join(self.root, f"{day}.f32")
+
+    # ---------- ingest ---------------------------------------------------------
+    def ingest(self, dut_dir: str, profile: SiteProfile = None, force: bool = True) -> int:
+        """
+        Append every channel of *dut_dir* and (re)index it; returns the channels
+        archived (0 when skipped).  Without *force*, a DUT already archived at
+        its current capture time is skipped.
+        """
+        profile = profile or (self.profile_for(dut_dir) if self.profile_for is not None else None)
+        if profile is None:
+            raise ValueError(f"no site profile for {dut_dir}")
+        sides = []
+        for side, is_high in (("H", True), ("L", False)):
+            for name in profile.channel_paths(dut_dir, is_high):
+                sides.append((side, channel_name(name), os.path.join(dut_dir, name)))
+        if not sides:
+            print(f"[Warning] Archive : no channel files in {dut_dir}")
+            return 0
+        captured_at = max(os.path.getmtime(p) for _, _, p in sides)
+        if not force and self._archived_at(profile.name, dut_dir) == captured_at:
+            return 0
+        try:
+            device, current, rg_on, rg_off = profile.get_test_key(dut_dir)
+            barcode, test_type = profile.get_barcode(dut_dir), profile.get_test_type(dut_dir)
+        except IndexError:
+            print(f"[Warning] Archive : unexpected folder layout, skipped : {dut_dir}")
+            return 0
+        day = datetime.fromtimestamp(captured_at).strftime("%Y%m%d")
+        blocks = [(side, ch, np.ascontiguousarray(load_txt_file(p), dtype=DTYPE)) for side, ch, p in sides]
+
+        with self._lock:
+            rows = []
+            with open(self.day_path(day), "ab") as f:
+                pos = f.tell()
+                if pos % DTYPE.itemsize:   # torn write of an earlier crash: realign
+                    f.write(b"\0" * (DTYPE.itemsize - pos % DTYPE.itemsize))
+                    pos = f.tell()
+                offset = pos // DTYPE.itemsize
+                for side, ch, samples in blocks:
+                    f.write(samples.tobytes())
+                    rows.append((side, ch, offset, len(samples)))
+                    offset += len(samples)
+            old = self._db.execute("SELECT id FROM dut WHERE site = ? AND dir_path = ?",
+                                   (profile.name, dut_dir)).fetchone()
+            if old is not None:
+                self._db.execute("DELETE FROM channel WHERE dut_id = ?", old)
+                self._db.execute("DELETE FROM dut WHERE id = ?", old)
+            cur = self._db.execute(
+                "INSERT INTO dut (site, dir_path, barcode, device, current, rg_on, rg_off, test_type, "
+                "is_sc, captured_at, day, archived_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (profile.name, dut_dir, barcode, device, current, rg_on, rg_off, test_type,
+                 int("_SC" in dut_dir), captured_at, day, time.time()),
+            )
+            self._db.executemany("INSERT OR REPLACE INTO channel VALUES (?, ?, ?, ?, ?)",
+                                 [(cur.lastrowid, *row) for row in rows])
+            self._db.commit()
+        return len(rows)
+
+    def _archived_at(self, site: str, dut_dir: str):
+        with self._lock:
+            row = self._db.execute("SELECT captured_at FROM dut WHERE site = ? AND dir_path = ?",
+                                   (site, dut_dir)).fetchone()
+        return row[0] if row else None
+
+    def submit(self, dut_dir: str):
+        """Archive *dut_dir* on the archive's own thread (call after the DUT is rendered)."""
+        if self._thread is None:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, name="wave-archive", daemon=True)
+            self._thread.start()
+        self._queue.put(dut_dir)
+
+    def _run(self):
+        while True:
+            dut_dir = self._queue.get()
+            if dut_dir is None:
+                return
+            try:
+                n = self.ingest(dut_dir)
+                if n:
+                    print(f"[INFO] Archived {n} channels : {dut_dir}")
+            except Exception as e:   # keep the archive thread alive
+                print(f"[Error] Archive {dut_dir} : {e!r}")
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._maps.clear()
+            self._db.close()
+
+    # ---------- queries --------------------------------------------------------
+    def query(self, site: str = None, barcode: str = None, device: str = None, current: str = None,
+              rg_on: str = None, rg_off: str = None, test_type: str = None, side: str = None,
+              is_sc: bool = None, since=None, until=None, limit: int = None) -> list:
+        """
+        Hits (one per DUT side) matching every given filter, newest first.
+        *since* / *until* are epoch seconds or ISO dates on the capture time.
+        """
+        where, params = [], []
+        for column, value in (("d.site", site), ("d.barcode", barcode), ("d.device", device),
+                              ("d.current", current), ("d.rg_on", rg_on), ("d.rg_off", rg_off),
+                              ("d.test_type", test_type), ("c.side", side)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if is_sc is not None:
+            where.append("d.is_sc = ?")
+            params.append(int(is_sc))
+        if since is not None:
+            where.append("d.captured_at >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            where.append("d.captured_at < ?")
+            params.append(_timestamp(until))
+        sql = (f"SELECT {', '.join('d.' + c for c in _DUT_COLUMNS)}, c.side, c.channel, c.offset, c.length "
+               "FROM dut d JOIN channel c ON c.dut_id = d.id")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY d.captured_at DESC, d.id, c.side"
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        hits = {}   # (dut id, side) -> Hit, in query order
+        for row in rows:
+            key = (row[0], row[-4])
+            if key not in hits:
+                if limit is not None and len(hits) >= limit:
+                    break
+                hits[key] = Hit(*row[:9], bool(row[9]), row[10], row[11], row[-4], {})
+            hits[key].channels[row[-3]] = (row[-2], row[-1])
+        return list(hits.values())
+
+    def _day_map(self, day: str, needed: int) -> np.ndarray:
+        """Memory map of *day*'s file covering at least *needed* samples."""
+        with self._lock:
+            mm = self._maps.get(day)
+            if mm is None or len(mm) < needed:   # the file grew since it was mapped
+                mm = self._maps[day] = np.memmap(self.day_path(day), dtype=DTYPE, mode="r")
+            return mm
+
+    def samples(self, hit: Hit, channel: str) -> np.ndarray:
+        """Zero‑copy view of one archived channel of *hit*."""
+        offset, length = hit.channels[channel.upper()]
+        return self._day_map(hit.day, offset + length)[offset:offset + length]
+
+    def load(self, hit: Hit) -> dict:
+        """{channel: zero‑copy view} of every channel of *hit*."""
+        return {ch: self.samples(hit, ch) for ch in hit.channels}
+
+
+# ---------- CLI --------------------------------------------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fail waveform archive: bulk ingest and index queries.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ing = sub.add_parser("ingest", help="archive every DUT folder under the roots")
+    ing.add_argument("roots", nargs="+")
+    ing.add_argument("--site", required=True, help="site profile (naming, channels, test_item)")
+    ing.add_argument("--force", action="store_true", help="re‑archive DUTs already in the index")
+    q = sub.add_parser("query", help="list archived DUT sides")
+    for name in ("site", "barcode", "device", "current", "rg-on", "rg-off", "test-type", "since", "until"):
+        q.add_argument(f"--{name}")
+    q.add_argument("--side", choices=("H", "L"))
+    q.add_argument("--sc", dest="is_sc", action="store_true", default=None)
+    q.add_argument("--no-sc", dest="is_sc", action="store_false")
+    q.add_argument("--limit", type=int, default=100)
+    ap.add_argument("--archive", default=ARCHIVE_DIR)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "ingest":
+        profile = load_profiles(enabled_only=False)[args.site]
+        archive = Archive(args.archive, profile_for=lambda d: profile)
+        n = 0
+        for root in args.roots:
+            for dut_dir in find_dut_dirs(root):
+                if archive.ingest(dut_dir, profile, force=args.force):
+                    n += 1
+        print(f"[INFO] {n} DUT folders archived into {args.archive}")
+    else:
+        archive = Archive(args.archive)
+        hits = archive.query(args.site, args.barcode, args.device, args.current, args.rg_on, args.rg_off,
+                             args.test_type, args.side, args.is_sc, args.since, args.until, args.limit)
+        for h in hits:
+            when = datetime.fromtimestamp(h.captured_at).strftime("%Y-%m-%d %H:%M:%S")
+            chans = " ".join(f"{ch}[{n}]" for ch, (_, n) in h.channels.items())
+            print(f"{when}  {h.barcode}  {h.device} {h.current} {h.rg_on}/{h.rg_off}  "
+                  f"{h.test_type}  {h.side}  {chans}")
+        print(f"[INFO] {len(hits)} hits")
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+End‑to‑end benchmark on synthetic FAIL_WFM trees (wave_synth.py).
+
+Stages, each timed per DUT folder over a tree of *scale* DUTs:
+  load         load_txt_file of every channel (npy sidecar cache off)
+  load_cached  the same with warm sidecars
+  name         get_img_name of both sides
+  plot         plot_and_save_offset (both sides, encoder flushed) /
+               plot_and_save_offset_merged for the viewer, data preloaded
+  process      process_directory (viewer: until the image file is written)
+
+Sites: jincheon, paju (img makers) and viewer (real‑time viewer, jincheon data).
+Every (stage, site, scale) appends one JSON line to --out, tagged with the git
+version, so results of different versions can be compared:
+
+    python wave_bench.py --scales 1,100 --samples 20000
+    python wave_bench.py --scales 10000 --stages load,process --sites jincheon
+    python wave_bench.py --scales 100 --baseline 4df79c3     # ratio vs an older run
+
+Trees are generated once per (site data, scale, samples) under --data and
+reused.  10 000 DUTs x 20 000 samples is about 15 GB of txt.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+import wave_loader
+import wave_synth
+from wave_encode import get_encoder
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGES = ("load", "load_cached", "name", "plot", "process")
+SITES = ("jincheon", "paju", "viewer")
+
+
+# ---------- environment ------------------------------------------------------
+def git_version() -> str:
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=BASE_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def environment() -> dict:
+    return {
+        "version": git_version(),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+# ---------- sites ------------------------------------------------------------
+def data_site(site: str) -> str:
+    return "jincheon" if site == "viewer" else site
+
+
+def import_site(site: str):
+    if site == "jincheon":
+        import jincheon_wave_img_maker as mod
+    elif site == "paju":
+        import paju_wave_img_maker as mod
+    else:
+        import jincheon_real_wave_form_viewer as mod
+    return mod
+
+
+_TREE_ROOT = None   # root of the tree being benchmarked (for station paths)
+
+
+def use_station_paths(mod, root: str):
+    """
+    The makers' naming rules split Windows paths at fixed depths; off the
+    station, hand them the tree path as it would look under C:\\!FAIL_WFM.
+    """
+    global _TREE_ROOT
+    _TREE_ROOT = root
+    if os.sep == "\\" or not hasattr(mod, "get_test_key"):
+        return
+    for name in ("get_test_key", "get_test_type", "get_img_name"):
+        real = getattr(mod, name)
+        if getattr(real, "station_path", False):
+            continue
+
+        def wrapped(dir_path, *args, _real=real, **kwargs):
+            if not dir_path.startswith(wave_synth.STATION_ROOT):
+                dir_path = wave_synth.station_path(dir_path, _TREE_ROOT)
+            return _real(dir_path, *args, **kwargs)
+        wrapped.station_path = True
+        setattr(mod, name, wrapped)
+
+
+def ensure_tree(data_dir: str, site: str, scale: int, samples: int, sc_ratio: float) -> tuple:
+    """(root, DUT dirs) of the synthetic tree, generated on first use."""
+    root = os.path.join(data_dir, f"{site}_{scale}x{samples}")
+    listing = os.path.join(root, "duts.json")
+    if os.path.isfile(listing):
+        with open(listing, "r", encoding="utf-8") as f:
+            return root, [os.path.join(root, d) for d in json.load(f)]
+    print(f"[INFO] Generating {scale} DUTs ({site}, {samples} samples) under {root}")
+    dirs = wave_synth.make_tree(root, scale, site, samples, sc_ratio)
+    with open(listing, "w", encoding="utf-8") as f:
+        json.dump([os.path.relpath(d, root) for d in dirs], f)
+    return root, dirs
+
+
+def txt_files(dut_dir: str) -> list:
+    return sorted(os.path.join(dut_dir, f) for f in os.listdir(dut_dir) if f.endswith(".txt"))
+
+
+# ---------- stages -----------------------------------------------------------
+def stage_items(stage: str, site: str, mod, dirs: list):
+    """Yield one callable per DUT folder for *stage* (set‑up is not timed)."""
+    if stage in ("load", "load_cached"):
+        wave_loader.CACHE_ENABLED = stage == "load_cached"
+        if stage == "load_cached":
+            for d in dirs:                                  # warm the sidecars
+                for p in txt_files(d):
+                    wave_loader.load_txt_file(p)
+        for d in dirs:
+            yield lambda d=d: [mod.load_txt_file(p) for p in txt_files(d)]
+        return
+    wave_loader.CACHE_ENABLED = True
+    if stage == "name":
+        for d in dirs:
+            if site == "viewer":
+                yield lambda d=d: mod.get_img_name(d)
+            else:
+                yield lambda d=d: (mod.get_img_name(d, True), mod.get_img_name(d, False))
+    elif stage == "plot":
+        for d in dirs:
+            yield plot_item(site, mod, d)
+    elif stage == "process":
+        for d in dirs:
+            if site == "viewer":
+                yield lambda d=d: (mod.process_directory(d), mod._image_writer.submit(int).result())
+            else:
+                yield lambda d=d: (mod.process_directory(d), get_encoder().flush())
+
+
+def plot_item(site: str, mod, dut_dir: str):
+    is_sc = "_SC" in dut_dir
+    if site == "viewer":
+        data = mod.load_merged_data(dut_dir)
+        out = mod.get_img_name(dut_dir) + mod.OUTPUT.ext
+        return lambda: mod.plot_and_save_offset_merged(data, out, os.path.basename(out), is_sc=is_sc)
+    layout = (site, is_sc)   # as render_side uses it
+    sides = []
+    for high in (True, False):
+        if site == "paju":
+            files = mod.H_FILES if high else mod.L_FILES
+        else:
+            files = mod.get_files(dut_dir, high)
+        data = {f[:-4]: wave_loader.load_txt_file(os.path.join(dut_dir, f)) for f in files}
+        out = os.path.join(dut_dir, mod.get_img_name(dut_dir, high))
+        sides.append((data, out, "red" if high else "blue"))
+
+    def run():
+        for data, out, color in sides:
+            if site == "paju":
+                mod.plot_and_save_offset(data, out, os.path.basename(out), color, is_sc, mod.SCALE_MAP, layout)
+            else:
+                mod.plot_and_save_offset(data, out, os.path.basename(out), color, is_sc=is_sc, layout=layout)
+        get_encoder().flush()
+    return run
+
+
+def run_stage(stage: str, site: str, mod, dirs: list, quiet: bool = True) -> dict:
+    times = []
+    items = stage_items(stage, site, mod, dirs)
+    with open(os.devnull, "w") as devnull:
+        redirect = contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()
+        with redirect:
+            for item in items:
+                t0 = time.perf_counter()
+                item()
+                times.append(time.perf_counter() - t0)
+    times_ms = sorted(t * 1000.0 for t in times)
+    return {
+        "n": len(times_ms),
+        "total_s": round(sum(times_ms) / 1000.0, 4),
+        "per_item_ms": round(statistics.fmean(times_ms), 3),
+        "p50_ms": round(percentile(times_ms, 50), 3),
+        "p95_ms": round(percentile(times_ms, 95), 3),
+        "max_ms": round(times_ms[-1], 3),
+    }
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    i = min(int(round(q / 100.0 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[i]
+
+
+# ---------- results ----------------------------------------------------------
+def load_results(path: str) -> list:
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline_of(results: list, version: str, rec: dict):
+    """Latest record of *version* with the same stage / site / scale / samples."""
+    keys = ("stage", "site", "scale", "samples")
+    match = [r for r in results
+             if r.get("version", "").startswith(version) and all(r.get(k) == rec[k] for k in keys)]
+    return match[-1] if match else None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the waveform pipeline on synthetic data.")
+    ap.add_argument("--scales", default="1,100", help="DUT counts, e.g. 1,100,10000")
+    ap.add_argument("--samples", type=int, default=20000, help="samples per channel")
+    ap.add_argument("--sc-ratio", type=float, default=0.2)
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--sites", default=",".join(SITES))
+    ap.add_argument("--data", default=os.path.join(BASE_DIR, "bench_data"), help="synthetic tree cache")
+    ap.add_argument("--out", default=os.path.join(BASE_DIR, "bench_results.jsonl"))
+    ap.add_argument("--baseline", help="git version to compare against (prefix)")
+    ap.add_argument("--verbose", action="store_true", help="keep the pipeline's own prints")
+    args = ap.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(",")]
+    stages = [s for s in args.stages.split(",") if s]
+    sites = [s for s in args.sites.split(",") if s]
+    for s in stages:
+        if s not in STAGES:
+            ap.error(f"unknown stage '{s}' (use {', '.join(STAGES)})")
+    for s in sites:
+        if s not in SITES:
+            ap.error(f"unknown site '{s}' (use {', '.join(SITES)})")
+
+    env = environment()
+    previous = load_results(args.out)
+    print(f"[INFO] version {env['version']}, python {env['python']}, results -> {args.out}")
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "a", encoding="utf-8") as out:
+        for scale in scales:
+            for site in sites:
+                root, dirs = ensure_tree(args.data, data_site(site), scale, args.samples, args.sc_ratio)
+                mod = import_site(site)
+                use_station_paths(mod, root)
+                for stage in stages:
+                    rec = {"timestamp": datetime.now().isoformat(timespec="seconds"), **env,
+                           "stage": stage, "site": site, "scale": scale, "samples": args.samples}
+                    rec.update(run_stage(stage, site, mod, dirs, quiet=not args.verbose))
+                    out.write(json.dumps(rec) + "\n")
+                    out.flush()
+                    line = (f"{site:9s} {stage:12s} x{scale:<6d} {rec['per_item_ms']:10.2f} ms/DUT"
+                            f"  p95 {rec['p95_ms']:10.2f}  total {rec['total_s']:8.2f} s")
+                    base = baseline_of(previous, args.baseline, rec) if args.baseline else None
+                    if base:
+                        line += f"  ({rec['per_item_ms'] / base['per_item_ms']:.2f}x {base['version']})"
+                    print(line)
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
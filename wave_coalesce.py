@@ -0,0 +1,118 @@
+"""
+Trailing‑edge coalescing of file events per folder.
+
+A tester writes the 8 channel txt files of a DUT one after another and every
+write raises `on_modified`.  Rendering on the first event plots incomplete
+data; dropping the following ones may never plot the final data.
+`EventCoalescer` collects the events per folder and fires exactly once when
+  • all expected channel files are present, stable and complete, or
+  • no event arrived for `quiet_s` seconds, or
+  • `max_delay_s` passed since the first event (a writer that never stops).
+Events arriving after the fire start a new batch.
+
+`touch()` only updates a dict under a lock, so it is safe (and cheap) to call
+from the watchdog thread; readiness polling and the callback run on the
+coalescer's own thread.
+"""
+
+import threading
+import time
+
+from wave_ready import ReadinessProbe
+
+
+class _Batch:
+    __slots__ = ("first", "last", "probe", "t_event")
+
+    def __init__(self, now: float, probe: ReadinessProbe):
+        self.first = now
+        self.last = now
+        self.probe = probe
+        self.t_event = time.time()   # wall clock of the first event (for latency metrics)
+
+
+class EventCoalescer:
+    def __init__(self, fire, expected_files, quiet_s: float = 1.0, max_delay_s: float = 10.0,
+                 poll_s: float = 0.1, stable_s: float = 0.2):
+        """
+        fire           : callback(dir_path, Readiness, t_event), called once per batch;
+                         t_event is the wall‑clock time of the batch's first event
+        expected_files : callable(dir_path) -> channel file suffixes (see wave_ready)
+        """
+        self.fire = fire
+        self.expected_files = expected_files
+        self.quiet_s = quiet_s
+        self.max_delay_s = max_delay_s
+        self.poll_s = poll_s
+        self.stable_s = stable_s
+        self._batches = {}               # dir_path -> _Batch
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    # ---------- lifecycle -----------------------------------------------------
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="event-coalescer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    # ---------- producer side (watchdog thread) --------------------------------
+    def touch(self, dir_path: str):
+        """Record one event for *dir_path*; never blocks on I/O."""
+        now = time.monotonic()
+        with self._cond:
+            batch = self._batches.get(dir_path)
+            if batch is None:
+                probe = ReadinessProbe(dir_path, self.expected_files(dir_path), self.stable_s)
+                self._batches[dir_path] = _Batch(now, probe)
+                self._cond.notify()
+            else:
+                batch.last = now
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._batches)
+
+    # ---------- consumer side --------------------------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._batches and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                batches = list(self._batches.items())
+
+            for dir_path, batch in batches:
+                state, seen = self._due(batch)
+                if state is None:
+                    continue
+                with self._cond:
+                    if batch.last != seen and time.monotonic() - batch.first < self.max_delay_s:
+                        continue  # an event slipped in while polling; keep collecting
+                    del self._batches[dir_path]
+                try:
+                    self.fire(dir_path, state, batch.t_event)
+                except Exception as e:  # keep the coalescer alive
+                    print(f"[Error] {dir_path} : {e!r}")
+
+            with self._cond:
+                if self._batches and not self._stop:
+                    self._cond.wait(self.poll_s)
+
+    def _due(self, batch: _Batch):
+        """(Readiness to fire *batch* with or None, time of the last event seen)."""
+        with self._cond:
+            last = batch.last
+        now = time.monotonic()
+        state = batch.probe.poll()
+        if state.ready or now - last >= self.quiet_s or now - batch.first >= self.max_delay_s:
+            return state, last
+        return None, last
+
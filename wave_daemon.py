@@ -0,0 +1,191 @@
+"""
+Multi‑site wave‑plot daemon.
+
+One process instead of one watcher EXE per site: a single watchdog Observer
+schedules the roots of every enabled profile in `site_profiles.json`, and all
+sites share one RenderPool (one worker pool, one queue) and one manifest.
+Each folder is routed to its site by watch root; naming, channel files and
+scale maps come from that site's profile, so adding a site is a JSON edit.
+
+    python wave_daemon.py                       # all enabled profiles
+    python wave_daemon.py --sites jincheon paju
+
+The Tk viewer (jincheon_real_wave_form_viewer) stays a separate process: it
+owns the operator display and its own main loop.
+"""
+
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+import matplotlib
+matplotlib.use("Agg")  # rendering happens in worker processes, never on screen
+
+from render_pool import RenderPool, default_workers
+from site_profiles import SiteProfile, load_profiles
+from wave_loader import find_dut_dirs, load_txt_file
+from wave_manifest import Manifest
+from wave_metrics import Metrics
+from wave_archive import Archive
+from wave_reference import get_references
+import wave_plot
+
+RENDER_WORKERS = default_workers()  # worker processes shared by all sites
+MAX_QUEUE = 64                      # pending folders before on_created blocks
+MAX_WAIT_S = 30.0                   # readiness time‑out per folder (retried once)
+METRICS_PORT = 9460                 # http://127.0.0.1:9460/metrics (Prometheus text)
+
+# Loaded once per process: at startup in the daemon, on import in every worker.
+PROFILES = load_profiles()
+
+
+def profile_for(dir_path: str) -> SiteProfile:
+    """Site profile whose watch root contains *dir_path* (None if no site owns it)."""
+    for profile in PROFILES.values():
+        if profile.owns(dir_path):
+            return profile
+    return None
+
+
+def site_of(dir_path: str) -> str:
+    profile = profile_for(dir_path)
+    return profile.name if profile is not None else "unknown"
+
+
+# ---------- plotting ---------------------------------------------------------
+def plot_and_save_offset(profile: SiteProfile, data_dict: dict, output_path: str, title: str,
+                         line_color: str, is_sc: bool, layout: tuple = None, decimate: str = None,
+                         reference: dict = None):
+    """
+    wave_plot.plot_and_save_offset (the jincheon / paju plot) with scale
+    factors, legend units, output format and event window (roi) taken from
+    *profile*; *reference* (wave_reference) is drawn faded behind.
+    """
+    wave_plot.plot_and_save_offset(data_dict, output_path, title, line_color, is_sc,
+                                   profile.scale_for(is_sc), profile.name, layout=layout, decimate=decimate,
+                                   output=profile.output, roi=profile.roi, reference=reference,
+                                   legend_divisor=profile.legend_divisor)
+
+
+# ---------- jobs (top‑level so RenderPool workers can run them) ---------------
+def expected_files(dut_dir: str) -> list:
+    profile = profile_for(dut_dir)
+    return profile.expected_files(dut_dir) if profile is not None else []
+
+
+def render_side(dut_dir: str, is_high_side: bool) -> str:
+    profile = profile_for(dut_dir)
+    if profile is None:
+        raise ValueError(f"no site profile owns {dut_dir}")
+    is_sc = "_SC" in dut_dir
+    files = profile.channel_paths(dut_dir, is_high_side)
+    if not files:
+        print(f"[Warning] No matching files in: {dut_dir}")
+    data = {f[:-4]: load_txt_file(os.path.join(dut_dir, f)) for f in files}
+    out = os.path.join(dut_dir, profile.get_img_name(dut_dir, is_high_side))
+    color = "red" if is_high_side else "blue"
+    reference = None
+    if profile.reference_dir:
+        reference = get_references(profile.reference_dir).get(profile.get_test_key(dut_dir), is_sc)
+    plot_and_save_offset(profile, data, out, os.path.basename(out), color, is_sc, reference=reference)
+    return out
+
+
+# ---------- watchdog handler -------------------------------------------------
+class NewDirectoryHandler(FileSystemEventHandler):
+    def __init__(self, pool: RenderPool):
+        super().__init__()
+        self.pool = pool
+
+    def on_created(self, event):
+        if event.is_directory and profile_for(event.src_path) is not None:
+            print(f"[INFO] New Folder Detected : {event.src_path} ({site_of(event.src_path)})")
+            self.pool.submit(event.src_path)
+
+
+# ---------- main -------------------------------------------------------------
+def watch_roots(profiles: dict) -> list:
+    """Distinct roots of *profiles*; two sites may not claim the same root."""
+    owner, roots = {}, {}
+    for profile in profiles.values():
+        for root in profile.watch_roots:
+            key = os.path.normcase(os.path.abspath(root))
+            if key in owner and owner[key] != profile.name:
+                raise ValueError(f"{root} is claimed by both '{owner[key]}' and '{profile.name}'")
+            owner[key] = profile.name
+            roots.setdefault(key, root)
+    return list(roots.values())
+
+
+def image_paths(dut_dir: str) -> list:
+    profile = profile_for(dut_dir)
+    if profile is None:
+        return []
+    return [os.path.join(dut_dir, profile.get_img_name(dut_dir, is_high)) for is_high in (True, False)]
+
+
+def catch_up(pool: RenderPool, manifest: Manifest, roots: list):
+    """Enqueue folders of every site that are new or changed since the last run;
+    folders whose images are already up to date are only recorded."""
+    n = 0
+    for root in roots:
+        for dut_dir in manifest.changed_dirs(find_dut_dirs(root), outputs=image_paths):
+            pool.submit(dut_dir)
+            n += 1
+    print(f"[INFO] Catch‑up : {n} folders enqueued")
+
+
+def main(argv=None):
+    global PROFILES
+    ap = argparse.ArgumentParser(description="Watch every site's FAIL_WFM roots in one process.")
+    ap.add_argument("--sites", nargs="+", help="subset of enabled profiles to run")
+    ap.add_argument("--workers", type=int, default=RENDER_WORKERS, help="render processes shared by all sites")
+    ap.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="localhost Prometheus endpoint (0 = off)")
+    ap.add_argument("--archive", action="store_true", help="append rendered DUTs to wave_archive (grows without limit)")
+    args = ap.parse_args(argv)
+
+    if args.sites:
+        unknown = set(args.sites) - set(PROFILES)
+        if unknown:
+            ap.error(f"unknown or disabled site(s): {', '.join(sorted(unknown))}")
+        PROFILES = {k: v for k, v in PROFILES.items() if k in args.sites}
+    roots = watch_roots(PROFILES)
+
+    manifest = Manifest("daemon", site_for=site_of)
+    metrics = Metrics("daemon", site_for=site_of)
+    archive = Archive(profile_for=profile_for) if args.archive else None
+    pool = RenderPool(render_side, find_dut_dirs, expected_files,
+                      workers=args.workers, max_queue=MAX_QUEUE, max_wait_s=MAX_WAIT_S,
+                      manifest=manifest, metrics=metrics,
+                      after_render=archive.submit if archive is not None else None)
+    pool.start()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port, gauges=pool.stats)
+    threading.Thread(target=catch_up, args=(pool, manifest, roots), daemon=True).start()
+
+    observer = Observer()
+    handler = NewDirectoryHandler(pool)
+    for root in roots:
+        observer.schedule(handler, root, recursive=True)
+        print(f"[INFO] Observing Folder : {root} ({site_of(root)})")
+    observer.start()
+    try:
+        while True:
+            time.sleep(2)
+    except KeyboardInterrupt:
+        observer.stop()
+    observer.join()
+    pool.stop()
+    manifest.close()
+    metrics.close()
+    if archive is not None:
+        archive.close()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # PyInstaller build spawns render workers
+    main()
@@ -0,0 +1,130 @@
+"""
+Image output stage: format settings and a background encoder.
+
+`WaveRenderer` no longer calls savefig.  It draws the reused figure, copies
+the Agg RGBA buffer and hands it to this process's `Encoder`, which
+compresses and writes it on its own thread while the renderer already draws
+the next DUT.  With the default `OutputFormat()` (JPEG, PIL quality 75,
+100 dpi) the files are the same as savefig's.
+
+Settings are per site: `OUTPUT` in the makers, `"output"` in
+site_profiles.json for the daemon, e.g.
+    {"format": "webp", "quality": 80, "dpi": 100, "optimize": true}
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import util
+from typing import NamedTuple
+
+from PIL import Image
+
+_EXT = {"jpeg": ".jpg", "png": ".png", "webp": ".webp"}
+
+
+class OutputFormat(NamedTuple):
+    format: str = "jpeg"     # jpeg | png | webp
+    quality: int = 75        # jpeg / webp quality (PIL default 75)
+    dpi: int = 100           # figure dpi -> 16x8 in = 1600x800 px at 100
+    optimize: bool = False   # extra entropy‑coding pass (jpeg, png)
+
+    @property
+    def ext(self) -> str:
+        return _EXT[self.format]
+
+    def save_kwargs(self) -> dict:
+        """PIL save() options besides the format (also usable as savefig pil_kwargs)."""
+        kw = {"dpi": (self.dpi, self.dpi)}
+        if self.format in ("jpeg", "webp"):
+            kw["quality"] = self.quality
+        if self.format in ("jpeg", "png"):
+            kw["optimize"] = self.optimize
+        return kw
+
+
+def output_format(raw: dict = None) -> OutputFormat:
+    """OutputFormat from a JSON dict (missing keys keep their defaults)."""
+    fmt = OutputFormat(**(raw or {}))
+    if fmt.format not in _EXT:
+        raise ValueError(f"unknown output format '{fmt.format}' (use {', '.join(_EXT)})")
+    return fmt
+
+
+def for_path(fmt: OutputFormat, path: str) -> OutputFormat:
+    """*fmt* with the format implied by *path*'s extension, if it names one (like savefig)."""
+    by_ext = {v: k for k, v in _EXT.items()}
+    by_ext[".jpeg"] = "jpeg"
+    ext_format = by_ext.get(os.path.splitext(path)[1].lower())
+    if ext_format is not None and ext_format != fmt.format:
+        return fmt._replace(format=ext_format)
+    return fmt
+
+
+def encode(img: Image.Image, path: str, fmt: OutputFormat = OutputFormat()):
+    """
+    Write *img* to *path* (tmp file + rename, so readers never see half an
+    image).  Like savefig, a known file extension selects the format.
+    """
+    fmt = for_path(fmt, path)
+    if fmt.format == "jpeg" and img.mode != "RGB":
+        img = img.convert("RGB")
+    tmp = path + ".tmp"
+    img.save(tmp, format=fmt.format.upper(), **fmt.save_kwargs())
+    os.replace(tmp, path)
+
+
+class Encoder:
+    """One background thread per process; at most `max_pending` images wait."""
+
+    def __init__(self, max_pending: int = 4):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="image-encoder", daemon=True)
+        self._thread.start()
+
+    def submit(self, img: Image.Image, path: str, fmt: OutputFormat) -> Future:
+        """
+        Queue *img*; blocks only while `max_pending` images are still waiting.
+        The returned future resolves to the encode time in seconds once written.
+        """
+        fut = Future()
+        self._queue.put((img, path, fmt, fut))
+        return fut
+
+    def flush(self):
+        """Block until every queued image is written."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            img, path, fmt, fut = self._queue.get()
+            try:
+                t0 = time.perf_counter()
+                encode(img, path, fmt)
+                fut.set_result(time.perf_counter() - t0)
+                print(f"[INFO] Saved Plot : {path}")
+            except Exception as e:   # keep the encoder alive
+                fut.set_exception(e)
+                print(f"[Error] Encode failed : {path} ({e!r})")
+            finally:
+                self._queue.task_done()
+
+
+_ENCODER = None
+_ENCODER_PID = None
+_LOCK = threading.Lock()
+
+
+def get_encoder() -> Encoder:
+    """Per‑process encoder, flushed at interpreter exit and at pool‑worker exit."""
+    global _ENCODER, _ENCODER_PID
+    with _LOCK:
+        if _ENCODER is None or _ENCODER_PID != os.getpid():   # forked: thread not inherited
+            _ENCODER, _ENCODER_PID = Encoder(), os.getpid()
+            atexit.register(_ENCODER.flush)
+            # worker processes leave through os._exit, which skips atexit
+            util.Finalize(None, _ENCODER.flush, exitpriority=100)
+    return _ENCODER
@@ -0,0 +1,243 @@
+"""
+Batch feature extraction over FAIL_WFM trees.
+
+Per DUT side (High / Low), from the same folders and channel files the
+watchers plot:
+    peak_ice_a             max ICE
+    vce_overshoot_v        max VCE above the DC‑link level (median of the first 10 %)
+    vge_plateau_v          median VGE during the first turn‑on (20 % -> 90 % of the swing), i.e. the Miller plateau
+    di_dt_a_per_us         max |dICE/dt| (moving average of SMOOTH samples)
+    dv_dt_v_per_ns         max |dVCE/dt|
+    eoff_mj                POW1 (VCE·ICE where there is no POW1) integrated from VGE
+                           falling below 90 % of its swing until ICE < 2 % of its peak
+    sc_withstand_us        SC folders: time ICE stays above 10 % of its peak
+One sample is 1 ns, like the plots' time axis (sample / 1000 = us).
+
+The channels of many DUTs are stacked into NaN‑padded 2‑D arrays, and every
+feature is one NumPy expression over the whole batch.  Folders are spread over
+worker processes in chunks.  One CSV per run, keyed by barcode and test type:
+
+    python wave_features.py C:\\!FAIL_WFM --site jincheon --since 2025-03-01
+    python wave_features.py C:\\!FAIL_WFM --site paju --workers 8 --out D:\\features
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from backfill import newest_input, parse_since
+from site_profiles import load_profiles
+from wave_archive import channel_name
+from wave_loader import find_dut_dirs, load_txt_file
+
+SAMPLE_PERIOD_S = 1e-9       # 1 sample = 1 ns
+SMOOTH = 25                  # samples averaged before di/dt, dv/dt
+CHUNK = 64                   # DUT folders per worker task
+BATCH_SAMPLES = 2 << 20      # rows x length of one stacked array; ~10 float64 temporaries -> ~160 MB per worker
+
+META = ("barcode", "test_type", "site", "side", "device", "current", "rg_on", "rg_off", "is_sc",
+        "n_samples", "dir_path")
+FEATURES = ("peak_ice_a", "vce_overshoot_v", "vge_plateau_v", "di_dt_a_per_us", "dv_dt_v_per_ns",
+            "eoff_mj", "sc_withstand_us")
+
+REQUIRED = ("ICE", "VCE", "VGE")
+OPTIONAL = ("POW1",)         # rows without it fall back to VCE·ICE
+
+_PROFILES = {}
+
+
+def get_profile(site: str):
+    """Site profile, loaded once per process."""
+    if site not in _PROFILES:
+        _PROFILES[site] = load_profiles(enabled_only=False)[site]
+    return _PROFILES[site]
+
+
+# ---------- vectorised features ----------------------------------------------
+def stack(arrays: list, n: int) -> np.ndarray:
+    """(rows, n) float64, each array left‑aligned and padded with NaN."""
+    out = np.full((len(arrays), n), np.nan)
+    for i, a in enumerate(arrays):
+        out[i, :len(a)] = a[:n]
+    return out
+
+
+def first_index(mask: np.ndarray, start: np.ndarray = None) -> np.ndarray:
+    """Per row, first column where *mask* is True at or after *start*; -1 if none."""
+    if start is not None:
+        mask = mask & (np.arange(mask.shape[1]) >= start[:, None])
+    idx = mask.argmax(axis=1)
+    return np.where(mask[np.arange(len(idx)), idx], idx, -1)
+
+
+def smooth_slope(a: np.ndarray, k: int = SMOOTH) -> np.ndarray:
+    """Derivative per second of the k‑sample moving average, row‑wise."""
+    k = max(min(k, a.shape[1] - 1), 1)
+    c = np.cumsum(a, axis=1)
+    c = np.concatenate([np.zeros((len(a), 1)), c], axis=1)
+    avg = (c[:, k:] - c[:, :-k]) / k
+    return np.diff(avg, axis=1) / SAMPLE_PERIOD_S
+
+
+def _nan_where(cond: np.ndarray, values: np.ndarray) -> np.ndarray:
+    return np.where(cond, values, np.nan)
+
+
+def extract(batch: dict, is_sc: np.ndarray) -> dict:
+    """
+    {feature: (rows,) array} for a batch {channel: (rows, n) NaN‑padded};
+    ICE, VCE and VGE are required, POW1 optional (all‑NaN rows where missing).
+    """
+    ice, vce, vge = batch["ICE"], batch["VCE"], batch["VGE"]
+    rows, n = ice.shape
+    col = np.arange(n)
+    with np.errstate(all="ignore"):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)   # all‑NaN rows give NaN
+
+            peak_ice = np.nanmax(ice, axis=1)
+            v_bus = np.nanmedian(vce[:, :max(n // 10, 1)], axis=1)
+
+            # gate levels and the first turn‑on / turn‑off edges
+            lo, hi = np.nanpercentile(vge, 1, axis=1), np.nanpercentile(vge, 99, axis=1)
+            swing = hi - lo
+            t_20 = first_index(vge > (lo + 0.2 * swing)[:, None])
+            t_90 = first_index(vge > (lo + 0.9 * swing)[:, None], np.maximum(t_20, 0))
+            rising = (col >= t_20[:, None]) & (col <= t_90[:, None]) & (t_20 >= 0)[:, None] & (t_90 >= 0)[:, None]
+            plateau = np.nanmedian(_nan_where(rising, vge), axis=1)
+
+            # turn‑off: VGE back below 90 % after turn‑on, until the ICE tail < 2 %
+            t_off = first_index(vge < (lo + 0.9 * swing)[:, None], np.maximum(t_90, 0))
+            t_off = np.where(t_90 >= 0, t_off, -1)
+            t_tail = first_index(ice < (0.02 * peak_ice)[:, None], np.maximum(t_off, 0))
+            t_tail = np.where(t_tail >= 0, t_tail, n)
+            off_window = (col >= t_off[:, None]) & (col < t_tail[:, None]) & (t_off >= 0)[:, None]
+            power = vce * ice
+            if "POW1" in batch:
+                has_pow = ~np.isnan(batch["POW1"]).all(axis=1)
+                power = np.where(has_pow[:, None], batch["POW1"], power)
+            eoff = _nan_where(t_off >= 0, np.nansum(_nan_where(off_window, power), axis=1)) * SAMPLE_PERIOD_S * 1e3
+
+            sc_thr = (0.1 * peak_ice)[:, None]
+            t_sc0 = first_index(ice > sc_thr)
+            t_sc1 = first_index(ice < sc_thr, np.maximum(t_sc0, 0))
+            t_sc1 = np.where(t_sc1 >= 0, t_sc1, np.sum(~np.isnan(ice), axis=1))
+            sc_time = _nan_where(is_sc & (t_sc0 >= 0), (t_sc1 - t_sc0) * SAMPLE_PERIOD_S * 1e6)
+
+            return {
+                "peak_ice_a": peak_ice,
+                "vce_overshoot_v": np.nanmax(vce, axis=1) - v_bus,
+                "vge_plateau_v": plateau,
+                "di_dt_a_per_us": np.nanmax(np.abs(smooth_slope(ice)), axis=1) * 1e-6,
+                "dv_dt_v_per_ns": np.nanmax(np.abs(smooth_slope(vce)), axis=1) * 1e-9,
+                "eoff_mj": eoff,
+                "sc_withstand_us": sc_time,
+            }
+
+
+# ---------- workers ----------------------------------------------------------
+def load_side(profile, dut_dir: str, is_high_side: bool) -> dict:
+    """{channel: samples} of one side (VGE, VCE, ICE, VCE2, POW1 ...)."""
+    return {channel_name(f): load_txt_file(os.path.join(dut_dir, f))
+            for f in profile.channel_paths(dut_dir, is_high_side)}
+
+
+def dut_meta(profile, dut_dir: str) -> dict:
+    device, current, rg_on, rg_off = profile.get_test_key(dut_dir)
+    return {
+        "barcode": profile.get_barcode(dut_dir), "test_type": profile.get_test_type(dut_dir),
+        "site": profile.name, "device": device, "current": current, "rg_on": rg_on, "rg_off": rg_off,
+        "is_sc": int("_SC" in dut_dir), "dir_path": dut_dir,
+    }
+
+
+def features_of(site: str, dut_dirs: list) -> list:
+    """Feature rows (dicts) of both sides of every folder in *dut_dirs*."""
+    profile = get_profile(site)
+    sides = []   # (meta, channels)
+    for dut_dir in dut_dirs:
+        try:
+            meta = dut_meta(profile, dut_dir)
+            for side, is_high in (("H", True), ("L", False)):
+                channels = load_side(profile, dut_dir, is_high)
+                if not all(k in channels for k in REQUIRED):
+                    print(f"[Warning] Missing ICE/VCE/VGE, skipped : {dut_dir} ({side})")
+                    continue
+                n = max(len(a) for a in channels.values())
+                sides.append(({**meta, "side": side, "n_samples": n}, channels))
+        except (OSError, IndexError, ValueError) as e:
+            print(f"[Warning] Skipped {dut_dir} : {e!r}")
+
+    rows = []
+    sides.sort(key=lambda s: s[0]["n_samples"])   # similar lengths share a batch
+    i = 0
+    while i < len(sides):
+        j = i + 1
+        while j < len(sides) and (j - i + 1) * sides[j][0]["n_samples"] <= BATCH_SAMPLES:
+            j += 1
+        part = sides[i:j]
+        n = part[-1][0]["n_samples"]
+        names = REQUIRED + tuple(k for k in OPTIONAL if any(k in ch for _, ch in part))
+        batch = {name: stack([ch.get(name, ()) for _, ch in part], n) for name in names}
+        feats = extract(batch, np.array([m["is_sc"] == 1 for m, _ in part]))
+        for r, (meta, _) in enumerate(part):
+            rows.append({**meta, **{f: feats[f][r] for f in FEATURES}})
+        i = j
+    return rows
+
+
+# ---------- main -------------------------------------------------------------
+def write_csv(path: str, rows: list):
+    rows = sorted(rows, key=lambda r: (r["barcode"], r["test_type"], r["side"]))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=META + FEATURES)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: (f"{v:.6g}" if isinstance(v, (float, np.floating)) else v) for k, v in r.items()})
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Extract per‑fail waveform features into one CSV.")
+    ap.add_argument("roots", nargs="+", help=r"tree(s) to scan, e.g. C:\!FAIL_WFM")
+    ap.add_argument("--site", default="jincheon", help="site profile (naming, channel files, test_item)")
+    ap.add_argument("--since", type=parse_since, help="only inputs modified on/after this date (YYYY-MM-DD[THH:MM])")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--out", default=".", help="directory for features_<site>_<time>.csv")
+    args = ap.parse_args(argv)
+
+    t0 = time.time()
+    dut_dirs = []
+    for root in args.roots:
+        for dut_dir in find_dut_dirs(root):
+            if args.since is None or newest_input(dut_dir) >= args.since:
+                dut_dirs.append(dut_dir)
+    chunks = [dut_dirs[i:i + CHUNK] for i in range(0, len(dut_dirs), CHUNK)]
+    print(f"[INFO] {len(dut_dirs)} DUT folders, {len(chunks)} chunks, {args.workers} workers")
+
+    rows = []
+    if args.workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for part in pool.map(features_of, [args.site] * len(chunks), chunks):
+                rows.extend(part)
+    else:
+        for chunk in chunks:
+            rows.extend(features_of(args.site, chunk))
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"features_{args.site}_{datetime.now():%Y%m%d_%H%M%S}.csv")
+    write_csv(path, rows)
+    print(f"[INFO] {len(rows)} rows -> {path} ({time.time() - t0:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
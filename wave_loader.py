@@ -0,0 +1,215 @@
+"""
+Shared waveform loader.
+
+Every SPEA waveform txt is one value per line: the first numeric line is the
+sample count (length header), followed by the samples themselves.  Lines that
+do not parse as a number (blank lines, channel captions …) are skipped, exactly
+like the old per-line `float()` loop did.
+
+The whole file is parsed in one pass into a contiguous `numpy.ndarray`; the
+length header is compared with the samples found to flag files that were cut
+short (e.g. still being written by the tester).  The header is never used to
+size a buffer, so a corrupt one cannot trigger a huge allocation.
+
+Complete waveforms are cached in a binary sidecar next to the txt
+(`IGBT1_HS_VGE.<size>_<mtime_ns>.npy`).  The sidecar name is the cache key, so a
+txt that is rewritten gets a new sidecar and the stale one is removed.  Later
+loads memory‑map the sidecar instead of parsing text again.
+"""
+
+import glob
+import os
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+import wave_metrics
+
+class Waveform(NamedTuple):
+    samples: np.ndarray   # samples only, length header removed
+    expected_len: int     # value of the length header (-1 when missing)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.expected_len >= 0 and len(self.samples) >= self.expected_len
+
+
+# ---------- parsing ----------------------------------------------------------
+def _split_lines(raw: bytes) -> list:
+    lines = raw.split(b"\n")
+    if lines and not lines[-1].strip():
+        lines.pop()  # trailing newline
+    return lines
+
+
+def _as_length(value: float) -> int:
+    """Length header -> int, or -1 when the first value is not a sane count."""
+    if not np.isfinite(value) or value < 0 or value != int(value):
+        return -1
+    return int(value)
+
+
+def _fill(lines: list, dtype) -> Waveform:
+    expected = _as_length(float(lines[0]))
+    # convert all sample lines in one go; the header only flags truncation
+    samples = np.empty(len(lines) - 1, dtype=dtype)
+    samples[:] = lines[1:]
+    return Waveform(samples, expected)
+
+
+def _numbers(lines: list):
+    """float() of every line that parses; captions and blank lines are skipped."""
+    for line in lines:
+        try:
+            yield float(line)
+        except ValueError:
+            pass
+
+
+def parse_waveform(raw: bytes, dtype=np.float64) -> Waveform:
+    """Parse the raw bytes of a waveform txt into a `Waveform`."""
+    lines = _split_lines(raw)
+    try:
+        # fast path: numbers only
+        if lines:
+            return _fill(lines, dtype)
+    except ValueError:
+        # slow path: per‑line float(), like the original loop
+        values = np.fromiter(_numbers(lines), dtype=np.float64)
+        if len(values):
+            return Waveform(values[1:].astype(dtype, copy=False), _as_length(values[0]))
+    return Waveform(np.empty(0, dtype=dtype), -1)
+
+
+def sample_count(txt_path: str) -> tuple:
+    """
+    (length header, lines after it) of a waveform txt, without parsing the
+    samples: the lines are counted as newlines.  Cheap enough for readiness
+    polling (wave_ready); the header is -1 when there is none.
+    """
+    with open(txt_path, "rb") as f:
+        raw = f.read()
+    pos = 0
+    while pos < len(raw):
+        end = raw.find(b"\n", pos)
+        if end < 0:
+            end = len(raw)
+        try:
+            expected = _as_length(float(raw[pos:end]))
+        except ValueError:   # caption before the header
+            pos = end + 1
+            continue
+        tail = 1 if end + 1 < len(raw) and not raw.endswith(b"\n") else 0   # last line without newline
+        return expected, raw.count(b"\n", end + 1) + tail
+    return -1, 0
+
+
+def read_waveform(txt_path: str, dtype=np.float64) -> Waveform:
+    """Read *txt_path* and return samples plus the length header."""
+    with open(txt_path, "rb") as f:
+        raw = f.read()
+    return parse_waveform(raw, dtype)
+
+
+# ---------- folder discovery -------------------------------------------------
+def find_dut_dirs(dir_path: str):
+    """Depth‑first search: yield every folder under dir_path that holds .txt files."""
+    sub_items = os.listdir(dir_path)
+    if any(f.endswith(".txt") for f in sub_items):
+        yield dir_path
+        return
+    for item in sub_items:
+        sub_path = os.path.join(dir_path, item)
+        if os.path.isdir(sub_path):
+            yield from find_dut_dirs(sub_path)
+
+
+# ---------- sidecar cache ----------------------------------------------------
+CACHE_ENABLED = True
+
+
+def _sidecar_path(txt_path: str, st: os.stat_result) -> str:
+    stem = os.path.splitext(txt_path)[0]
+    return f"{stem}.{st.st_size}_{st.st_mtime_ns}.npy"
+
+
+def _stale_sidecars(txt_path: str, keep: str) -> list:
+    stem = os.path.splitext(txt_path)[0]
+    return [p for p in glob.glob(glob.escape(stem) + ".*_*.npy") if p != keep]
+
+
+def _write_sidecar(sidecar: str, samples: np.ndarray):
+    tmp = sidecar + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            np.save(f, samples)
+        os.replace(tmp, sidecar)
+    except OSError as e:
+        print(f"[Warning] Could not write cache {sidecar} : {e}")
+
+
+def _drop_stale(txt_path: str, keep: str):
+    for old in _stale_sidecars(txt_path, keep):
+        try:
+            os.remove(old)
+        except OSError:
+            pass  # still mapped by another reader (Windows); retried next rebuild
+
+
+def read_waveform_cached(txt_path: str, dtype=np.float64) -> Waveform:
+    """
+    Like `read_waveform`, but served from the sidecar when it matches the
+    txt's current size and mtime.  Only complete waveforms are cached, so a
+    file that is still being written is always parsed from text.
+    """
+    st = os.stat(txt_path)
+    sidecar = _sidecar_path(txt_path, st)
+    if os.path.exists(sidecar):
+        try:
+            samples = np.load(sidecar, mmap_mode="r")
+            return Waveform(samples.astype(dtype, copy=False), len(samples))
+        except (OSError, ValueError):
+            print(f"[Warning] Broken cache {sidecar}, re-parsing")
+
+    wave = read_waveform(txt_path, np.float64)
+    if wave.is_complete and len(wave.samples) and _sidecar_path(txt_path, os.stat(txt_path)) == sidecar:
+        _write_sidecar(sidecar, wave.samples)
+    _drop_stale(txt_path, sidecar)
+    return Waveform(wave.samples.astype(dtype, copy=False), wave.expected_len)
+
+
+def load_txt_file(txt_path: str, dtype=np.float64) -> np.ndarray:
+    """
+    Read waveform txt and return its samples as a 1‑D ndarray.
+    The length header is NOT part of the returned array.
+    """
+    if not os.path.isfile(txt_path):
+        print(f"[Warning] Could not find file: {txt_path}")
+        return np.empty(0, dtype=dtype)
+    t0 = time.perf_counter()
+    wave = read_waveform_cached(txt_path, dtype) if CACHE_ENABLED else read_waveform(txt_path, dtype)
+    timer = wave_metrics.current_timer()
+    if timer is not None:
+        timer.add_parse(os.path.splitext(os.path.basename(txt_path))[0], time.perf_counter() - t0)
+    if wave.expected_len < 0:
+        print(f"[Warning] No length header in {txt_path}")
+    elif not wave.is_complete:
+        print(f"[Warning] Truncated file {txt_path} : {len(wave.samples)} / {wave.expected_len} samples")
+    return wave.samples
+
+
+def load_mapped(txt_path: str) -> np.ndarray:
+    """
+    Samples of *txt_path* memory‑mapped from its sidecar, which is written on
+    first use, so slicing a window reads only that part from disk.  Waveforms
+    that are not cached (incomplete, CACHE_ENABLED off) come back in memory.
+    """
+    samples = load_txt_file(txt_path)
+    if isinstance(samples, np.memmap) or not CACHE_ENABLED or not os.path.isfile(txt_path):
+        return samples
+    sidecar = _sidecar_path(txt_path, os.stat(txt_path))
+    try:
+        return np.load(sidecar, mmap_mode="r")
+    except (OSError, ValueError):
+        return samples
@@ -0,0 +1,156 @@
+"""
+Processed‑folder manifest (SQLite).
+
+One row per (site, DUT folder) with a fingerprint of its input txt files
+(name, size and mtime of every *.txt, hashed), the images produced and how long
+they took.  The watchers use it to
+  • drop events for folders whose inputs did not change since the last render,
+  • catch up after a restart: only new or changed folders are enqueued.
+A folder missing from the manifest whose images are already newer than its
+inputs (rendered before the manifest existed, e.g. on the first start after
+a deploy) is recorded as it is instead of being rendered again.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+SEED_BATCH = 256   # seeded rows per commit
+
+def get_base_dir() -> str:
+    if getattr(sys, "frozen", False):               # PyInstaller
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+DEFAULT_PATH = os.path.join(get_base_dir(), "wave_manifest.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dut (
+    site         TEXT NOT NULL,
+    dir_path     TEXT NOT NULL,
+    fingerprint  TEXT NOT NULL,
+    images       TEXT NOT NULL,      -- JSON list of image paths
+    render_s     REAL,               -- summed render time of all images
+    latency_s    REAL,               -- event -> last image saved
+    rendered_at  REAL NOT NULL,
+    PRIMARY KEY (site, dir_path)
+)
+"""
+
+
+def fingerprint(dut_dir: str) -> str:
+    """Hash of (name, size, mtime_ns) of every input txt in *dut_dir*."""
+    h = hashlib.sha1()
+    entries = sorted((e.name, e.stat()) for e in os.scandir(dut_dir) if e.name.endswith(".txt"))
+    for name, st in entries:
+        h.update(f"{name}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+class Manifest:
+    def __init__(self, site: str, path: str = DEFAULT_PATH, site_for=None):
+        """
+        site     : site name stored with every row
+        site_for : optional callable(dir_path) -> site name, for a process that
+                   serves several sites (wave_daemon)
+        """
+        self.site = site
+        self.site_for = site_for
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _site(self, dut_dir: str) -> str:
+        return self.site_for(dut_dir) if self.site_for is not None else self.site
+
+    # ---------- queries ------------------------------------------------------
+    def get_fingerprint(self, dut_dir: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint FROM dut WHERE site = ? AND dir_path = ?", (self._site(dut_dir), dut_dir)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_current(self, dut_dir: str, fp: str = None) -> bool:
+        """True when *dut_dir* was rendered from exactly these inputs."""
+        try:
+            fp = fp or fingerprint(dut_dir)
+        except OSError:
+            return False
+        return self.get_fingerprint(dut_dir) == fp
+
+    def changed_dirs(self, dut_dirs, outputs=None):
+        """
+        Yield the folders of *dut_dirs* that are new or changed since their last render.
+        outputs(dut_dir) -> image paths : a folder not in the manifest whose images all
+        exist and are newer than its inputs is recorded (seeded) instead of yielded.
+        """
+        with self._lock:
+            known = {(site, d): fp for site, d, fp in self._db.execute(
+                "SELECT site, dir_path, fingerprint FROM dut"
+            ).fetchall()}
+        seeds = []
+        try:
+            for dut_dir in dut_dirs:
+                try:
+                    fp = fingerprint(dut_dir)
+                except OSError:
+                    continue
+                key = (self._site(dut_dir), dut_dir)
+                if key in known:
+                    if known[key] != fp:
+                        yield dut_dir
+                    continue
+                images = self._rendered_images(dut_dir, outputs)
+                if images is None:
+                    yield dut_dir
+                    continue
+                seeds.append((key[0], dut_dir, fp, json.dumps(images), None, None, time.time()))
+                if len(seeds) >= SEED_BATCH:
+                    self._insert(seeds)
+                    seeds = []
+        finally:
+            if seeds:
+                self._insert(seeds)
+
+    @staticmethod
+    def _rendered_images(dut_dir: str, outputs):
+        """Image paths of *dut_dir* if all are up to date, else None."""
+        if outputs is None:
+            return None
+        from backfill import is_outdated, newest_input   # backfill -> wave_metrics -> wave_manifest
+        try:
+            images = outputs(dut_dir)
+            t_in = newest_input(dut_dir)
+        except (OSError, IndexError, ValueError):   # unexpected layout: render it
+            return None
+        if not images or any(is_outdated(img, t_in) for img in images):
+            return None
+        return images
+
+    # ---------- updates ------------------------------------------------------
+    def _insert(self, rows: list):
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO dut VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def record(self, dut_dir: str, fp: str, images: list, render_s: float = None,
+               latency_s: float = None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO dut VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._site(dut_dir), dut_dir, fp, json.dumps(images), render_s, latency_s, time.time()),
+            )
+            self._db.commit()
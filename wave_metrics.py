@@ -0,0 +1,292 @@
+"""
+Per‑DUT latency metrics of the watchers.
+
+Each rendered DUT produces one record:
+    t_detect     watchdog event (wall clock)
+    t_ready      all channel files present and complete (wave_ready)
+    wait_ready_s t_ready - t_detect
+    parse_s      {channel: seconds} of load_txt_file, parse_total_s their sum
+    render_s     drawing (figure update + rasterise), summed over both sides
+    encode_s     image compression + write, summed over both sides
+    total_s      t_detect -> last image on disk
+Records are appended to a size‑rotated JSON‑lines file (`metrics_<app>.jsonl`
+next to the manifest) and kept in a rolling window for p50 / p95 / p99.
+`Metrics.serve(port)` exposes the summary in Prometheus text format on
+http://127.0.0.1:<port>/metrics (localhost only).
+
+Stage times are collected where the work happens: `start_timer()` installs a
+`StageTimer` for the current thread (a RenderPool worker, the viewer's render
+thread), which load_txt_file and WaveRenderer.render report into.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from wave_manifest import get_base_dir
+
+WINDOW = 1000               # DUTs per (site, stage) kept for the percentiles
+MAX_BYTES = 5 << 20         # metrics file size before it is rotated
+BACKUPS = 5                 # rotated files kept: metrics_<app>.jsonl.1 … .5
+STAGES = ("wait_ready", "parse", "render", "encode", "total")
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+# ---------- worker side ------------------------------------------------------
+class StageTimer:
+    """Stage times of the job running on one thread."""
+
+    def __init__(self):
+        self.parse = {}       # channel -> seconds
+        self.encode_s = 0.0
+        self.encodes = []     # futures of background encodes (result = seconds)
+
+    def add_parse(self, channel: str, seconds: float):
+        self.parse[channel] = self.parse.get(channel, 0.0) + seconds
+
+    def add_encode(self, seconds: float):
+        self.encode_s += seconds
+
+    def track_encode(self, future):
+        self.encodes.append(future)
+
+    def wait_encodes(self):
+        """
+        Block until the background encodes of this job are written; re‑raise the
+        first encode error (the image is missing, so the job failed).
+        """
+        error = None
+        for fut in self.encodes:
+            try:
+                self.encode_s += fut.result()
+            except Exception as e:
+                error = error or e
+        self.encodes = []
+        if error is not None:
+            raise error
+
+    def as_dict(self) -> dict:
+        return {"parse": dict(self.parse), "encode_s": self.encode_s}
+
+
+_local = threading.local()
+
+
+def start_timer() -> StageTimer:
+    _local.timer = StageTimer()
+    return _local.timer
+
+
+def current_timer():
+    """StageTimer of this thread's job, or None outside an instrumented job."""
+    return getattr(_local, "timer", None)
+
+
+def finish_timer(wait: bool = True) -> StageTimer:
+    """
+    Detach this thread's timer.  With *wait*, block for the job's encodes
+    (raising an encode error); otherwise the caller follows `timer.encodes`.
+    """
+    timer = getattr(_local, "timer", None) or StageTimer()
+    _local.timer = None
+    if wait:
+        timer.wait_encodes()
+    return timer
+
+
+# ---------- records ----------------------------------------------------------
+def dut_record(dut_dir: str, t_detect: float, t_ready: float, job_s: float, timers: list,
+               images: list, status: str = "ok", t_done: float = None) -> dict:
+    """
+    Record of one DUT.  *job_s* is the time spent in the render jobs and
+    *timers* their StageTimer.as_dict(); render_s is what is left after parsing
+    and encoding.
+    """
+    t_done = time.time() if t_done is None else t_done
+    parse = {}
+    encode_s = 0.0
+    for t in timers:
+        for ch, s in t["parse"].items():
+            parse[ch] = parse.get(ch, 0.0) + s
+        encode_s += t["encode_s"]
+    parse_total = sum(parse.values())
+    return {
+        "dut_dir": dut_dir,
+        "status": status,
+        "t_detect": round(t_detect, 3),
+        "t_ready": round(t_ready, 3),
+        "t_done": round(t_done, 3),
+        "wait_ready_s": round(max(t_ready - t_detect, 0.0), 4),
+        "parse_s": {ch: round(s, 4) for ch, s in parse.items()},
+        "parse_total_s": round(parse_total, 4),
+        "render_s": round(max(job_s - parse_total - encode_s, 0.0), 4),
+        "encode_s": round(encode_s, 4),
+        "total_s": round(t_done - t_detect, 4),
+        "images": images,
+    }
+
+
+def _stage_values(rec: dict) -> dict:
+    return {
+        "wait_ready": rec["wait_ready_s"],
+        "parse": rec["parse_total_s"],
+        "render": rec["render_s"],
+        "encode": rec["encode_s"],
+        "total": rec["total_s"],
+    }
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest‑rank percentile of an ascending list."""
+    if not sorted_values:
+        return float("nan")
+    i = min(max(math.ceil(q * len(sorted_values)) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[i]
+
+
+# ---------- sink -------------------------------------------------------------
+class Metrics:
+    def __init__(self, app: str, path: str = None, max_bytes: int = MAX_BYTES, backups: int = BACKUPS,
+                 window: int = WINDOW, site_for=None):
+        """
+        app      : watcher name, label of every series (jincheon, paju, viewer, daemon)
+        site_for : optional callable(dir_path) -> site name (wave_daemon)
+        """
+        self.app = app
+        self.path = path or os.path.join(get_base_dir(), f"metrics_{app}.jsonl")
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.window = window
+        self.site_for = site_for
+        self._lock = threading.Lock()
+        self._windows = {}   # (site, stage) -> deque of seconds
+        self._count = {}     # (site, stage) -> DUTs since start
+        self._sum = {}       # (site, stage) -> seconds since start
+        self._failed = {}    # site -> failed DUTs since start
+        self._server = None
+
+    def _site(self, dut_dir: str) -> str:
+        return self.site_for(dut_dir) if self.site_for is not None else self.app
+
+    # ---------- recording ------------------------------------------------------
+    def record(self, rec: dict):
+        """Append *rec* (see dut_record) to the file and the rolling window."""
+        site = self._site(rec["dut_dir"])
+        rec = {"app": self.app, "site": site, **rec}
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                self._rotate_if_needed()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"[Warning] Could not write metrics {self.path} : {e}")
+            if rec["status"] != "ok":
+                self._failed[site] = self._failed.get(site, 0) + 1
+                return
+            for stage, value in _stage_values(rec).items():
+                key = (site, stage)
+                if key not in self._windows:
+                    self._windows[key] = deque(maxlen=self.window)
+                self._windows[key].append(value)
+                self._count[key] = self._count.get(key, 0) + 1
+                self._sum[key] = self._sum.get(key, 0.0) + value
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    # ---------- summary --------------------------------------------------------
+    def summary(self) -> dict:
+        """{site: {stage: {count, sum, p50, p95, p99}}} over the rolling window."""
+        with self._lock:
+            windows = {k: sorted(v) for k, v in self._windows.items()}
+            count, total = dict(self._count), dict(self._sum)
+        out = {}
+        for (site, stage), values in windows.items():
+            stats = {"count": count[(site, stage)], "sum": total[(site, stage)]}
+            for q in QUANTILES:
+                stats[f"p{int(q * 100)}"] = percentile(values, q)
+            out.setdefault(site, {})[stage] = stats
+        return out
+
+    def prometheus(self, gauges=None) -> str:
+        """Summary (and optional gauges: callable -> {name: number}) in Prometheus text format."""
+        lines = [
+            "# HELP wave_stage_seconds Per-DUT stage latency, quantiles over the last "
+            f"{self.window} DUTs.",
+            "# TYPE wave_stage_seconds summary",
+        ]
+        for site, stages in sorted(self.summary().items()):
+            for stage in STAGES:
+                s = stages.get(stage)
+                if s is None:
+                    continue
+                labels = f'app="{self.app}",site="{site}",stage="{stage}"'
+                for q in QUANTILES:
+                    lines.append(f'wave_stage_seconds{{{labels},quantile="{q}"}} {s[f"p{int(q * 100)}"]:.6f}')
+                lines.append(f"wave_stage_seconds_sum{{{labels}}} {s['sum']:.6f}")
+                lines.append(f"wave_stage_seconds_count{{{labels}}} {s['count']}")
+        with self._lock:
+            failed = dict(self._failed)
+        lines += ["# HELP wave_failed_total DUTs whose render failed.", "# TYPE wave_failed_total counter"]
+        for site, n in sorted(failed.items()):
+            lines.append(f'wave_failed_total{{app="{self.app}",site="{site}"}} {n}')
+        if gauges is not None:
+            for name, value in sorted(gauges().items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# TYPE wave_{name} gauge")
+                lines.append(f'wave_{name}{{app="{self.app}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    # ---------- endpoint -------------------------------------------------------
+    def serve(self, port: int, gauges=None):
+        """Serve /metrics on 127.0.0.1:*port* from a daemon thread (no‑op if the port is taken)."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus(gauges).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:
+            print(f"[Warning] Metrics endpoint not started on port {port} : {e}")
+            return None
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[INFO] Metrics : http://127.0.0.1:{port}/metrics , {self.path}")
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
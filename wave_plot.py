@@ -0,0 +1,88 @@
+"""
+Offset plot of one DUT side, shared by the site makers and the daemon.
+
+Channels are stacked with a fixed 8 div offset, or for SC cut to the 40–70 %
+window (or the detected event window, wave_roi) with dynamic offsets so they
+do not overlap.  Everything site specific is passed in: the makers from their
+constants (jincheon_wave_img_maker, paju_wave_img_maker), the daemon from the
+site's `SiteProfile`.
+"""
+
+import numpy as np
+
+from wave_encode import OutputFormat
+from wave_reference import reference_segment
+from wave_render import Trace, get_renderer
+from wave_roi import event_range
+
+
+def plot_and_save_offset(data_dict: dict, output_path: str, title: str, line_color: str, is_sc: bool,
+                         scale_map: dict, site: str, layout: tuple = None, decimate: str = None,
+                         output: OutputFormat = OutputFormat(), roi=None, reference: dict = None,
+                         legend_divisor: dict = None):
+    """
+    data_dict      : {label: samples}, e.g. {"IGBT1_HS_VGE": ndarray, ...}, plotted bottom up
+    scale_map      : {KEY: (value per div, unit)}; the first KEY contained in a label scales it
+    site           : default renderer layout (site, is_sc) when *layout* is None
+    decimate       : 'minmax' | 'lttb' | 'off' (None -> wave_render.DECIMATE)
+    roi            : wave_roi.EventWindow or None (fixed range)
+    reference      : {channel key: samples} of a golden reference (wave_reference), drawn faded
+    legend_divisor : {KEY: divisor} of the legend's per‑div value (paju POW1: W -> kW)
+    """
+    legend_divisor = legend_divisor or {}
+    labels = list(data_dict.keys())
+
+    max_len = max((len(data_dict[lbl]) for lbl in labels), default=0)
+    if is_sc and max_len > 4:
+        start_i, end_i = int(max_len * 0.40), int(max_len * 0.70)
+    else:
+        start_i, end_i = 0, max_len
+    if roi is not None:
+        start_i, end_i = event_range(data_dict, max_len, roi) or (start_i, end_i)
+    x_all = np.arange(start_i, end_i) / 1000.0  # time axis in us, sliced per channel
+
+    fixed_offset = 8.0
+    current_top = 0.0
+    y_lim_top = 0.0
+    traces = []
+    ref_traces = []
+
+    for idx, label in enumerate(labels):
+        raw = data_dict[label]
+        if len(raw) == 0:
+            print(f"[Warning] No '{label}' data in {output_path} folder.")
+            continue
+        segment = np.asarray(raw[start_i:end_i])
+        if segment.size == 0:
+            continue
+
+        # ---- scaling ----
+        scale_factor, unit_per_div = 1.0, "?"
+        for key, (val_per_div, unit) in scale_map.items():
+            if key in label.upper():
+                scale_factor = 1.0 / val_per_div
+                unit_per_div = f"{val_per_div / legend_divisor.get(key, 1.0)} {unit}"
+                break
+        shifted = segment * scale_factor
+
+        # ---- offset (dynamic for SC), applied in place ----
+        if is_sc:
+            lo, hi = shifted.min(), shifted.max()
+            offset = current_top - lo + 1.0
+            current_top = offset + hi
+        else:
+            offset = idx * fixed_offset
+        shifted += offset
+
+        short = label[-4:].lstrip("_").upper()
+        traces.append(Trace(x_all[:len(shifted)], shifted, f"{short} (1 div = {unit_per_div})", short))
+        ref = reference_segment(reference, label, start_i, end_i)
+        if ref is not None:
+            ref_traces.append(Trace(x_all[:len(ref)], ref * scale_factor + offset, "", short))
+        y_lim_top = max(y_lim_top, shifted.max())
+
+    # axes limits, ticks, grid and legend live in the reused template
+    renderer = get_renderer(layout or (site, is_sc))
+    renderer.render(traces, output_path, title, line_color,
+                    xlim=(start_i / 1000.0, end_i / 1000.0), y_top=y_lim_top,
+                    decimate_method=decimate, output=output, references=ref_traces)
@@ -0,0 +1,80 @@
+"""
+Min/max pyramid of one waveform for interactive zoom / pan.
+
+Level 0 is the sample array itself, ideally memory‑mapped from the npy sidecar
+(`wave_loader.load_mapped`).  Level k keeps the min and max of every
+`BLOCK * FACTOR**(k-1)` samples.  It is built once, in one sequential pass
+over the samples.
+
+A view of *span* samples drawn into *n_px* pixel columns is taken from the
+coarsest level that still has at least n_px buckets in view.  Every redraw
+therefore touches between 2·n_px and 2·FACTOR·n_px points, whatever the
+capture length.  When the span gets below about BLOCK·n_px samples, the raw
+samples of the window are sliced from level 0.  For a memmap, only those
+pages are read from disk.
+"""
+
+import numpy as np
+
+BLOCK = 8              # samples per bucket of level 1
+FACTOR = 4             # buckets merged per further level
+MIN_TOP = 256          # stop when a level has no more buckets than this
+CHUNK = BLOCK << 17    # samples reduced per step while building (bounded temp memory)
+
+
+def _reduce(values: np.ndarray, k: int, func) -> np.ndarray:
+    """*func* (np.minimum / np.maximum) over consecutive groups of *k*; the tail group may be short."""
+    n = len(values)
+    full = n // k * k
+    out = func.reduce(np.asarray(values[:full]).reshape(-1, k), axis=1)
+    if full < n:
+        out = np.append(out, func.reduce(np.asarray(values[full:])))
+    return out
+
+
+class MinMaxPyramid:
+    def __init__(self, samples: np.ndarray):
+        self.samples = samples
+        self.n = len(samples)
+        self.levels = []   # (bucket size in samples, mins, maxs), finest first
+        if self.n <= BLOCK:
+            return
+        mins, maxs = [], []
+        for start in range(0, self.n, CHUNK):   # CHUNK is a multiple of BLOCK
+            part = np.asarray(samples[start:start + CHUNK], dtype=np.float64)
+            mins.append(_reduce(part, BLOCK, np.minimum))
+            maxs.append(_reduce(part, BLOCK, np.maximum))
+        mins, maxs = np.concatenate(mins), np.concatenate(maxs)
+        size = BLOCK
+        while True:
+            self.levels.append((size, mins, maxs))
+            if len(mins) <= MIN_TOP:
+                break
+            mins, maxs = _reduce(mins, FACTOR, np.minimum), _reduce(maxs, FACTOR, np.maximum)
+            size *= FACTOR
+
+    @property
+    def nbytes(self) -> int:
+        return sum(m.nbytes + x.nbytes for _, m, x in self.levels)
+
+    def window(self, i0: float, i1: float, n_px: int):
+        """
+        (x, y, level) for samples [i0, i1) drawn into *n_px* columns.  x is in
+        samples; at level > 0 every bucket gives two points (min, max) at its
+        centre, level 0 returns the raw samples.
+        """
+        i0 = max(int(np.floor(i0)), 0)
+        i1 = min(int(np.ceil(i1)) + 1, self.n)
+        if i1 <= i0:
+            return np.empty(0), np.empty(0), 0
+        span = i1 - i0
+        for level in range(len(self.levels), 0, -1):
+            size, mins, maxs = self.levels[level - 1]
+            if span // size >= n_px:
+                j0, j1 = i0 // size, min(-(-i1 // size), len(mins))
+                centre = np.arange(j0, j1) * size + (size - 1) / 2.0
+                x = np.repeat(centre, 2)
+                y = np.empty(2 * (j1 - j0))
+                y[0::2], y[1::2] = mins[j0:j1], maxs[j0:j1]
+                return x, y, level
+        return np.arange(i0, i1, dtype=np.float64), np.asarray(self.samples[i0:i1], dtype=np.float64), 0
@@ -0,0 +1,100 @@
+"""
+Folder readiness detection — replaces the fixed `time.sleep(3)` / `sleep(0.1)`.
+
+A DUT folder is ready once
+  1. every expected channel file exists (matched by file‑name suffix, e.g.
+     'H_VGE.txt' or the full 'IGBT1_HS_VGE.txt'),
+  2. size and mtime of those files did not change for `stable_s` seconds,
+  3. every file holds as many lines as its length header announces (counted
+     as newlines, the samples are parsed later by the render worker).
+
+`ReadinessProbe` is polled (non‑blocking) by the render pool; the viewer and
+CLI tools use the blocking `wait_until_ready`.
+"""
+
+import os
+import time
+from typing import NamedTuple
+
+from wave_loader import sample_count
+
+
+class Readiness(NamedTuple):
+    ready: bool
+    missing: list   # expected suffixes with no matching file yet
+    reason: str     # why the present files are not usable yet ('' when they are)
+    files: dict     # matched file name -> (size, mtime_ns) at this poll
+
+    @property
+    def present_ok(self) -> bool:
+        """Files that exist are stable and complete (some may still be missing)."""
+        return not self.reason
+
+
+def _snapshot(dir_path: str, expected: list):
+    names = os.listdir(dir_path)
+    files = {}
+    for n in names:
+        if any(n.endswith(suffix) for suffix in expected):
+            st = os.stat(os.path.join(dir_path, n))
+            files[n] = (st.st_size, st.st_mtime_ns)
+    missing = [s for s in expected if not any(n.endswith(s) for n in files)]
+    return files, missing
+
+
+class ReadinessProbe:
+    """Tracks one DUT folder across polls."""
+
+    def __init__(self, dir_path: str, expected: list, stable_s: float = 0.2):
+        self.dir_path = dir_path
+        self.expected = list(expected)
+        self.stable_s = stable_s
+        self.last = Readiness(False, list(expected), "not polled yet", {})
+        self._snap = None
+        self._since = 0.0
+        self._checked = (None, "")  # (snapshot, reason) of the last length check
+
+    def poll(self) -> Readiness:
+        try:
+            snap, missing = _snapshot(self.dir_path, self.expected)
+        except OSError as e:
+            self.last = Readiness(False, self.expected, str(e), {})
+            return self.last
+
+        now = time.monotonic()
+        if snap != self._snap:
+            self._snap, self._since = snap, now
+
+        if not snap:
+            reason = "no channel files yet"
+        elif now - self._since < self.stable_s:
+            reason = "files still changing"
+        elif self._checked[0] == snap:
+            reason = self._checked[1]   # unchanged since the last length check
+        else:
+            reason = self._check_lengths(snap)
+            self._checked = (snap, reason)
+        self.last = Readiness(not reason and not missing, missing, reason, snap)
+        return self.last
+
+    def _check_lengths(self, snap: dict) -> str:
+        for name in snap:
+            try:
+                expected, lines = sample_count(os.path.join(self.dir_path, name))
+            except OSError as e:
+                return f"{name} : {e}"
+            if expected < 0 or lines < expected:
+                return f"{name} : {lines} / {expected} samples"
+        return ""
+
+
+def wait_until_ready(dir_path: str, expected: list, timeout_s: float = 30.0,
+                     poll_s: float = 0.1, stable_s: float = 0.2) -> Readiness:
+    """Block until *dir_path* is ready or *timeout_s* expires; return the last state."""
+    probe = ReadinessProbe(dir_path, expected, stable_s)
+    deadline = time.monotonic() + timeout_s
+    while True:
+        state = probe.poll()
+        if state.ready or time.monotonic() >= deadline:
+            return state
+        time.sleep(poll_s)
@@ -0,0 +1,111 @@
+"""
+Golden references: a known‑good capture drawn faded behind each channel.
+
+A reference is a DUT folder copied into the reference directory, named after its
+test_item key (and `_SC` for short circuit):
+    <reference dir>\\HK51B_585A_004.00_024.00\\*.txt
+    <reference dir>\\HK5_200A_000.50_000.50_SC\\*.txt
+Channels are matched to the failed DUT's by their last two name fields
+(`H_VGE`, `HS_ICE` ...), so the reference may come from any barcode.  The
+faded trace is scaled and offset together with the DUT's trace.
+
+Parsed references stay in a per‑process LRU (`get_references`), so a burst of
+fails of one test item parses its reference once per worker.  Misses are
+remembered for MISS_TTL_S so that a reference added later is picked up.
+References are read without the sidecar cache (nothing is written into the
+shared reference directory) and do not count as the DUT's parse time.
+
+Settings are per site: `REFERENCE_DIR` in the makers (None: off),
+`"reference_dir"` in site_profiles.json for the daemon.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from wave_loader import find_dut_dirs, read_waveform
+
+MAX_ENTRIES = 16      # references kept per process
+MISS_TTL_S = 60.0     # a missing reference is looked up again after this
+
+
+def reference_name(test_key: tuple, is_sc: bool) -> str:
+    """Folder name of the reference for (device, current, rg_on, rg_off)."""
+    return "_".join(test_key) + ("_SC" if is_sc else "")
+
+
+def channel_key(label: str) -> str:
+    """'..._IGBT1_H_VGE' -> 'H_VGE', 'IGBT2_LS_ICE' -> 'LS_ICE'."""
+    return "_".join(label.upper().split("_")[-2:])
+
+
+class ReferenceCache:
+    def __init__(self, ref_dir: str, max_entries: int = MAX_ENTRIES):
+        self.ref_dir = ref_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # name -> {channel key: samples}, most recent last
+        self._misses = {}               # name -> time of the failed lookup
+        self.loads = 0                  # references parsed
+
+    def _load(self, name: str):
+        folder = os.path.join(self.ref_dir, name)
+        if not os.path.isdir(folder):
+            return None
+        for dut_dir in find_dut_dirs(folder):   # the folder itself or a copied DUT tree
+            self.loads += 1
+            return {channel_key(f[:-4]): read_waveform(os.path.join(dut_dir, f)).samples
+                    for f in os.listdir(dut_dir) if f.endswith(".txt")}
+        return None
+
+    def get(self, test_key: tuple, is_sc: bool):
+        """{channel key: samples} of the reference, or None if there is none."""
+        name = reference_name(test_key, is_sc)
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                return self._entries[name]
+            if time.monotonic() - self._misses.get(name, -MISS_TTL_S) < MISS_TTL_S:
+                return None
+            try:
+                ref = self._load(name)
+            except (OSError, ValueError) as e:
+                print(f"[Warning] Could not load reference {name} : {e}")
+                ref = None
+            if ref is None:
+                self._misses[name] = time.monotonic()
+                return None
+            self._misses.pop(name, None)
+            self._entries[name] = ref
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return ref
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._misses.clear()
+
+
+_CACHES = {}
+
+
+def get_references(ref_dir: str) -> ReferenceCache:
+    """Per‑process reference cache of *ref_dir*."""
+    cache = _CACHES.get(ref_dir)
+    if cache is None:
+        cache = _CACHES[ref_dir] = ReferenceCache(ref_dir)
+    return cache
+
+
+def reference_segment(reference: dict, label: str, start_i: int, end_i: int):
+    """Samples [start_i, end_i) of the reference channel matching *label*, or None."""
+    if not reference:
+        return None
+    samples = reference.get(channel_key(label))
+    if samples is None or len(samples) <= start_i:
+        return None
+    return np.asarray(samples[start_i:end_i], dtype=np.float64)
@@ -0,0 +1,218 @@
+"""
+Reusable waveform figure.
+
+Creating a 16x8 figure and setting up its locators, grids, formatters and
+ticks costs more than drawing the waveforms.  `WaveRenderer` builds that
+template once per layout (site, is_sc); for every DUT it only swaps
+the line data, moves the channel labels, rewrites title / legend and saves.
+With `DECIMATE = "off"` the output is pixel‑identical to the old
+plt.figure‑per‑image code.
+
+Renderers are cached per process (`get_renderer`, at most MAX_RENDERERS,
+least recently used dropped first), so every RenderPool worker keeps its own
+warm templates.  They do not use pyplot, so they can also run
+outside the main thread.  Encoding is a separate stage (wave_encode): the
+drawn RGBA buffer is copied and compressed on a background thread.
+
+Long captures are decimated before drawing: each trace is reduced to a min/max
+envelope with one bucket per horizontal pixel of the axes, which keeps every
+spike (VCE overshoot, ICE peak) visible.  `DECIMATE` selects the method:
+"minmax" (default), "lttb", or "off" for full‑fidelity exports.
+"""
+
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import MultipleLocator
+from PIL import Image
+
+import wave_metrics
+from wave_encode import OutputFormat, encode, get_encoder
+
+
+DECIMATE = "minmax"
+REFERENCE_ALPHA = 0.3   # golden reference traces: the DUT colour, faded
+MAX_RENDERERS = 4       # cached figure templates per process (one full‑size Agg canvas each)
+
+
+# ---------- decimation -------------------------------------------------------
+def decimate_minmax(x: np.ndarray, y: np.ndarray, n_buckets: int):
+    """
+    Keep min and max of every bucket (in time order) plus the first and last
+    sample.  Exactly *n_buckets* buckets (one per pixel column), so returns
+    2 * n_buckets + 2 points; shorter traces are returned unchanged.
+    """
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return x, y
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.intp)
+    starts, ends = edges[:-1], edges[1:]
+    k = int((ends - starts).max())
+    # (bucket, k) sample indices; shorter buckets repeat their last sample
+    cols = np.minimum(starts[:, None] + np.arange(k), ends[:, None] - 1)
+    blocks = y[cols]
+
+    rows = np.arange(n_buckets)
+    i_min = cols[rows, blocks.argmin(axis=1)]
+    i_max = cols[rows, blocks.argmax(axis=1)]
+    idx = np.empty(2 * n_buckets + 2, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    idx[1:-1:2] = np.minimum(i_min, i_max)
+    idx[2:-1:2] = np.maximum(i_min, i_max)
+    return x[idx], y[idx]
+
+
+def decimate_lttb(x: np.ndarray, y: np.ndarray, n_out: int):
+    """Largest‑Triangle‑Three‑Buckets down‑sampling to *n_out* points."""
+    n = len(y)
+    if n_out < 3 or n <= n_out:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:nxt_hi].mean() if nxt_hi > hi else x[-1]
+        avg_y = y[hi:nxt_hi].mean() if nxt_hi > hi else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def decimate(x, y, n_px: int, method: str = None):
+    """Reduce a trace for an axes *n_px* pixels wide (method defaults to DECIMATE)."""
+    method = method or DECIMATE
+    x, y = np.asarray(x), np.asarray(y)
+    if method == "minmax":
+        return decimate_minmax(x, y, n_px)
+    if method == "lttb":
+        return decimate_lttb(x, y, 2 * n_px)
+    return x, y
+
+
+def axes_width_px(ax, dpi: float = None) -> int:
+    """Width of *ax* in output pixels at *dpi* (figure dpi by default)."""
+    fig = ax.get_figure()
+    return int(fig.get_figwidth() * (dpi or fig.dpi) * ax.get_position().width)
+
+
+# ---------- reusable figure ---------------------------------------------------
+class Trace(NamedTuple):
+    x: np.ndarray     # time axis in us
+    y: np.ndarray     # scaled + offset samples
+    legend: str       # "VCE (1 div = 200.0 V)"
+    short: str        # channel label drawn left of the trace
+
+
+class WaveRenderer:
+    def __init__(self, figsize=(16, 8)):
+        self.fig = Figure(figsize=figsize)
+        FigureCanvasAgg(self.fig)
+        self.ax = ax = self.fig.add_subplot()
+
+        ax.tick_params(axis="y", labelleft=False)
+        ax.xaxis.set_major_locator(MultipleLocator(5.0))   # major = 5 us
+        ax.xaxis.set_minor_locator(MultipleLocator(1.0))   # minor = 1 us
+        ax.xaxis.set_major_formatter(lambda val, _: f"{int(val)} us")
+        ax.grid(True, which="major", axis="both", linestyle="--", linewidth=0.5)
+        ax.grid(True, which="minor", axis="both", linestyle="--", linewidth=0.3)
+
+        self._lines = []   # reused Line2D, one per trace slot
+        self._texts = []   # reused channel labels
+        self._ref_lines = []   # reused Line2D of reference traces, drawn below
+
+    def _slot(self, i: int):
+        if i == len(self._lines):
+            (line,) = self.ax.plot([], [], linewidth=1.0)
+            text = self.ax.text(0, 0, "", va="center", ha="right", fontsize=9, color="k")
+            self._lines.append(line)
+            self._texts.append(text)
+        return self._lines[i], self._texts[i]
+
+    def _ref_slot(self, i: int):
+        if i == len(self._ref_lines):
+            (line,) = self.ax.plot([], [], linewidth=1.0, alpha=REFERENCE_ALPHA, zorder=1.5)
+            self._ref_lines.append(line)
+        return self._ref_lines[i]
+
+    def render(self, traces: list, output_path: str, title: str, color: str,
+               xlim: tuple, y_top: float, decimate_method: str = None,
+               output: OutputFormat = OutputFormat(), background: bool = True,
+               references: list = None):
+        """
+        Draw *traces* in *color* and write *output_path* in *output* format;
+        with *background* the encode runs on this process's encoder thread.
+        *references* (Traces, same scaling) are drawn faded below, without legend.
+        """
+        references = references or []
+        ax = self.ax
+        ax.set_title(title)
+        n_px = axes_width_px(ax, output.dpi)   # width at the dpi this image is drawn at
+
+        for i, tr in enumerate(traces):
+            line, text = self._slot(i)
+            line.set_data(*decimate(tr.x, tr.y, n_px, decimate_method))
+            line.set_color(color)
+            line.set_label(tr.legend)
+            line.set_visible(True)
+            text.set_position((tr.x[0], tr.y[0]))
+            text.set_text(tr.short + "   ")
+            text.set_visible(True)
+        for line, text in zip(self._lines[len(traces):], self._texts[len(traces):]):
+            line.set_visible(False)
+            text.set_visible(False)
+        for i, tr in enumerate(references):
+            line = self._ref_slot(i)
+            line.set_data(*decimate(tr.x, tr.y, n_px, decimate_method))
+            line.set_color(color)
+            line.set_visible(True)
+        for line in self._ref_lines[len(references):]:
+            line.set_visible(False)
+
+        ax.set_xlim(*xlim)
+        # Include some margin on the top for labels
+        ax.set_ylim(-2, y_top + 1.0)
+        ax.set_yticks(np.arange(-2, y_top + 2.0, 1.0))
+
+        if ax.legend_ is not None:
+            ax.legend_.remove()
+        if traces:
+            ax.legend(handles=self._lines[:len(traces)], loc="lower right", fontsize=9,
+                      handlelength=0, handletextpad=0)
+
+        self.fig.set_dpi(output.dpi)
+        self.fig.canvas.draw()
+        w, h = self.fig.canvas.get_width_height()
+        # copy: the buffer is redrawn by the next DUT while this one is encoding
+        img = Image.frombytes("RGBA", (w, h), bytes(self.fig.canvas.buffer_rgba()))
+        timer = wave_metrics.current_timer()
+        if background:
+            fut = get_encoder().submit(img, output_path, output)
+            if timer is not None:
+                timer.track_encode(fut)
+        else:
+            t0 = time.perf_counter()
+            encode(img, output_path, output)
+            if timer is not None:
+                timer.add_encode(time.perf_counter() - t0)
+
+
+_RENDERERS = OrderedDict()
+
+
+def get_renderer(layout: tuple) -> WaveRenderer:
+    """Per‑process LRU renderer cache keyed by layout, e.g. ('jincheon', False)."""
+    renderer = _RENDERERS.pop(layout, None)
+    if renderer is None:
+        renderer = WaveRenderer()
+        while len(_RENDERERS) >= MAX_RENDERERS:
+            _RENDERERS.popitem(last=False)
+    _RENDERERS[layout] = renderer
+    return renderer
@@ -0,0 +1,84 @@
+"""
+Event window of a capture: plot only the switching / short‑circuit events.
+
+Without it the makers plot the whole capture, or for SC the fixed 40–70 %
+window, which is mostly flat baseline.  With an `EventWindow` the active
+stretches are located by threshold crossings (one vectorised pass per channel):
+    gate on      VGE above vge_on_v
+    conducting   |ICE| above ice_level of its peak (at least ice_min_a)
+Runs shorter than min_run samples are dropped (noise), runs closer than
+merge_gap are one event.  The plot spans the first to the last event (or
+the first *events* of them), plus pre_us / post_us margins.  When nothing
+is detected the fixed window stays.
+
+Settings are per site: `ROI` in the makers, `"roi"` in site_profiles.json
+for the daemon, e.g.
+    {"pre_us": 1.0, "post_us": 2.0, "events": 1}
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+SAMPLES_PER_US = 1000   # time axis of the plots: sample / 1000 = us
+
+
+class EventWindow(NamedTuple):
+    pre_us: float = 1.0       # margin before the first event
+    post_us: float = 2.0      # margin after the last event
+    vge_on_v: float = 5.0     # gate counts as on above this
+    ice_level: float = 0.1    # conducting above this fraction of the ICE peak ...
+    ice_min_a: float = 20.0   # ... but never below this (passive side: noise only)
+    min_run: int = 10         # samples; shorter runs are noise
+    merge_gap: int = 500      # samples; closer runs are one event
+    events: int = 0           # plot the first N events only (0 = all)
+
+
+def event_window(raw: dict = None):
+    """EventWindow from a JSON dict (missing keys keep their defaults), None if *raw* is None."""
+    return None if raw is None else EventWindow(**raw)
+
+
+def _channel(data_dict: dict, name: str):
+    """Samples of the channel whose label ends with *name* (VGE, ICE), or None."""
+    for label, samples in data_dict.items():
+        if label.upper().endswith(name) and len(samples):
+            return np.asarray(samples, dtype=np.float64)
+    return None
+
+
+def find_events(data_dict: dict, roi: EventWindow = EventWindow()) -> list:
+    """[(start, end)] sample ranges of the events in *data_dict* (label -> samples)."""
+    n = max((len(a) for a in data_dict.values()), default=0)
+    active = np.zeros(n, dtype=bool)
+    vge = _channel(data_dict, "VGE")
+    if vge is not None:
+        active[:len(vge)] |= vge > roi.vge_on_v
+    ice = _channel(data_dict, "ICE")
+    if ice is not None:
+        mag = np.abs(ice)
+        active[:len(ice)] |= mag > max(roi.ice_level * mag.max(), roi.ice_min_a)
+
+    # runs of True: +1 / -1 steps of the padded mask
+    step = np.diff(active.astype(np.int8), prepend=0, append=0)
+    starts, ends = np.flatnonzero(step == 1), np.flatnonzero(step == -1)
+    keep = ends - starts >= roi.min_run
+    starts, ends = starts[keep], ends[keep]
+    if starts.size == 0:
+        return []
+    split = starts[1:] - ends[:-1] >= roi.merge_gap
+    starts = starts[np.concatenate(([True], split))]
+    ends = ends[np.concatenate((split, [True]))]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def event_range(data_dict: dict, max_len: int, roi: EventWindow):
+    """(start_i, end_i) to plot, or None when no event was found (keep the fixed window)."""
+    events = find_events(data_dict, roi)
+    if roi.events > 0:
+        events = events[:roi.events]
+    if not events:
+        return None
+    start = max(events[0][0] - int(roi.pre_us * SAMPLES_PER_US), 0)
+    end = min(events[-1][1] + int(roi.post_us * SAMPLES_PER_US), max_len)
+    return (start, end) if end > start else None
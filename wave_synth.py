@@ -0,0 +1,126 @@
+"""
+Synthetic FAIL_WFM trees for benchmarks (real SPEA data cannot leave the site).
+
+    <root>\\AC_HK51B_hot_V12_ngd\\<barcode>_<low barcode>_<date>_<time>\\AC_L9_850V_585A_+15.0V_-05.0V_004.00ohm_024.00ohm_001.00ohm
+
+Device / current / Rg combinations are taken from the site's test_item table
+in site_profiles.json, so every folder resolves to a real test type.  SC
+folders get the `_SC` suffix and a short‑circuit pulse.  Channel files follow
+the site's channel set (jincheon `…_H_VGE.txt`, paju `IGBT1_HS_VGE.txt` …);
+each holds the length header, optionally preceded by extra text lines, and
+one sample per line.
+
+    python wave_synth.py D:\\bench\\FAIL_WFM --duts 100 --site jincheon --samples 20000 --sc-ratio 0.2
+"""
+
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from site_profiles import load_profiles
+
+STATION_ROOT = r"C:\!FAIL_WFM"   # depth the naming rules expect (parts[2] = device folder)
+
+
+# ---------- waveforms --------------------------------------------------------
+def make_waveforms(n: int, is_sc: bool, rng: np.random.Generator, i_peak: float = 585.0) -> dict:
+    """VGE / VCE / ICE / VCE2 / POW1 of one double‑pulse (or SC) capture, *n* samples."""
+    t = np.arange(n)
+    on, off = int(n * 0.3), int(n * 0.6)
+    gate = (t > on) & (t < off)
+    vge = np.where(gate, 15.0, -5.0) + rng.normal(0, 0.2, n)
+    if is_sc:
+        ice = np.where(gate, np.minimum((t - on) * 2.0, 6.0 * i_peak), 0.0)
+        vce = np.where(gate, 800.0, 850.0)
+    else:
+        ice = np.where(gate, np.minimum((t - on) * i_peak / max(off - on, 1), i_peak), 0.0)
+        vce = np.where(gate, 2.0, 850.0)
+        vce[off:off + max(n // 1000, 1)] += 300.0          # turn‑off overshoot
+    ice = ice + rng.normal(0, 2.0, n)
+    vce = vce + rng.normal(0, 3.0, n)
+    return {"VGE": vge, "VCE": vce, "ICE": ice, "VCE2": vce * 0.9, "POW1": vce * ice}
+
+
+def write_channel(path: str, samples: np.ndarray, header_lines: int = 0):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for i in range(header_lines):
+            f.write(f"# synthetic channel header {i}\n")
+        f.write(f"{len(samples)}\n")
+        np.savetxt(f, samples, fmt="%.6g")
+
+
+def channel_files(site: str, side: str) -> dict:
+    """{channel: file name} of one side ('H' / 'L') for *site*."""
+    if site == "paju":
+        prefix = "IGBT1_HS" if side == "H" else "IGBT2_LS"
+        return {ch: f"{prefix}_{ch}.txt" for ch in ("VGE", "VCE", "ICE", "POW1")}
+    prefix = "IGBT1" if side == "H" else "IGBT2"
+    return {ch: f"{prefix}_{side}_{ch}.txt" for ch in ("VGE", "VCE", "ICE", "VCE2")}
+
+
+# ---------- tree -------------------------------------------------------------
+def dut_folder_names(site: str, test_items: list, rng: random.Random, t0: datetime, i: int, is_sc: bool):
+    device, current, rg_on, rg_off, _ = rng.choice(test_items)
+    barcode = f"378001X000JR{590000 + i:06d}"
+    low = f"LOW{i:08d}"
+    stamp = t0 + timedelta(seconds=37 * i)
+    date, time_ = stamp.strftime("%Y%m%d"), stamp.strftime("%H%M%S")
+    if site == "paju":
+        dut = f"{low}_{date}_{time_}_{barcode}"           # naming rule barcode = [3, 3]
+    else:
+        dut = f"{barcode}_{low}_{date}_{time_}"           # naming rule barcode = [3, 0]
+    leaf = f"AC_L9_850V_{current}_+15.0V_-05.0V_{rg_on}ohm_{rg_off}ohm_001.00ohm"
+    if is_sc:
+        leaf += "_SC"
+    return f"AC_{device}_hot_V12_ngd", dut, leaf
+
+
+def make_tree(root: str, n_duts: int, site: str = "jincheon", samples: int = 20000,
+              sc_ratio: float = 0.2, header_lines: int = 0, seed: int = 0) -> list:
+    """Write *n_duts* DUT folders under *root*; return their paths."""
+    profile = load_profiles(enabled_only=False)[site]
+    test_items = [list(k) + [v] for k, v in profile.test_item.items()]
+    rng = random.Random(seed)
+    nrng = np.random.default_rng(seed)
+    t0 = datetime(2025, 3, 1, 6, 0, 0)
+    dirs = []
+    for i in range(n_duts):
+        is_sc = rng.random() < sc_ratio
+        device, dut, leaf = dut_folder_names(site, test_items, rng, t0, i, is_sc)
+        dut_dir = os.path.join(root, device, dut, leaf)
+        os.makedirs(dut_dir, exist_ok=True)
+        waves = make_waveforms(samples, is_sc, nrng)
+        for side in ("H", "L"):
+            for ch, name in channel_files(site, side).items():
+                if is_sc and ch == "VCE2":
+                    continue
+                write_channel(os.path.join(dut_dir, name), waves[ch], header_lines)
+        dirs.append(dut_dir)
+    return dirs
+
+
+def station_path(dut_dir: str, root: str, station_root: str = STATION_ROOT) -> str:
+    """*dut_dir* as the tester would see it (Windows path at the naming rules' depth)."""
+    rel = os.path.relpath(dut_dir, root)
+    return "\\".join([station_root] + rel.split(os.sep))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate a synthetic FAIL_WFM tree.")
+    ap.add_argument("root")
+    ap.add_argument("--duts", type=int, default=100)
+    ap.add_argument("--site", choices=("jincheon", "paju"), default="jincheon")
+    ap.add_argument("--samples", type=int, default=20000, help="samples per channel")
+    ap.add_argument("--sc-ratio", type=float, default=0.2, help="fraction of SC folders")
+    ap.add_argument("--header-lines", type=int, default=0, help="extra text lines before the length header")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    dirs = make_tree(args.root, args.duts, args.site, args.samples, args.sc_ratio, args.header_lines, args.seed)
+    print(f"[INFO] {len(dirs)} DUT folders written under {args.root}")
+
+
+if __name__ == "__main__":
+    main()